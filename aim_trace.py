@@ -0,0 +1,175 @@
+"""
+Aim Trace 분석 - 플레이어별 yaw/pitch 궤적과 구간 점수를 NumPy로 계산
+
+index.html은 킬/포커스 구간을 고를 때마다 aimIndex를 다시 만들고 점수를 계산해
+긴 경기에서 탭이 멈췄다. 여기서는 플레이어마다 궤적을 한 번 만들어 두고
+(yaw는 ±180° 경계를 넘을 때 끊기지 않도록 unwrap), 이동 각도의 누적합 배열로
+임의 구간의 점수를 O(1)에 계산한다.
+
+    path_length     구간 안에서 조준점이 움직인 총 각도 (도)
+    displacement    구간 처음과 끝 조준점 사이의 직선 각도 (도)
+    straightness    displacement / path_length (1에 가까울수록 곧게 이동)
+    angular_velocity  평균 각속도 (도/초), peak_angular_velocity는 구간 최대값
+
+    start_tick, end_tick, start_time, end_time   점수를 낼 구간 (없으면 경기 전체)
+    windows         여러 틱 구간을 한 번에 ("100-160,420-480")
+    samples         true면 구간의 궤적 샘플도 반환 (offset/limit로 페이지)
+"""
+import threading
+
+import numpy as np
+
+from api_query import MAX_TICKS_PER_PAGE, parse_range_args
+
+# windows 파라미터로 한 번에 점수를 낼 수 있는 최대 구간 수
+MAX_WINDOWS = 1000
+
+_tracks_lock = threading.Lock()
+
+
+def _round(value):
+    return round(float(value), 4)
+
+
+class AimTrack:
+    """한 플레이어의 조준 궤적 (yaw/pitch가 있는 행만, 틱 순)"""
+
+    def __init__(self, store, player_id):
+        rows = np.flatnonzero(store.player_ids == player_id)
+        yaw = store.yaw[rows].astype(np.float64)
+        pitch = store.pitch[rows].astype(np.float64)
+        valid = ~(np.isnan(yaw) | np.isnan(pitch))
+        rows = rows[valid]
+
+        # 행 번호 -> 틱 인덱스
+        self.tick_index = np.searchsorted(store.tick_offsets, rows, side='right') - 1
+        self.ticks = store.tick_values[self.tick_index]
+        self.times = store.tick_times[self.tick_index]
+        self.yaw = yaw[valid]
+        self.pitch = pitch[valid]
+        # -179° -> 179°가 358° 회전이 아니라 2° 회전이 되도록 연속 각도로 펼친다
+        self.yaw_unwrapped = np.unwrap(self.yaw, period=360.0)
+
+        step = np.hypot(np.diff(self.yaw_unwrapped), np.diff(self.pitch))
+        dt = np.diff(self.times)
+        self.step = step
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.velocity = np.where(dt > 0, step / dt, 0.0)
+        # cum_path[j] - cum_path[i] = 샘플 i~j 사이 이동 각도
+        self.cum_path = np.concatenate(([0.0], np.cumsum(step)))
+
+    def __len__(self):
+        return len(self.ticks)
+
+    def sample_range(self, lo, hi):
+        """틱 인덱스 구간 [lo, hi)에 속하는 샘플 범위 [i, j)"""
+        return (int(np.searchsorted(self.tick_index, lo, side='left')),
+                int(np.searchsorted(self.tick_index, hi, side='left')))
+
+    def score(self, i, j):
+        """샘플 범위 [i, j)의 점수 (누적합으로 O(1), 최대 각속도만 구간 max)"""
+        count = max(j - i, 0)
+        result = {
+            'start_tick': int(self.ticks[i]) if count else None,
+            'end_tick': int(self.ticks[j - 1]) if count else None,
+            'samples': count,
+            'path_length': 0.0,
+            'displacement': 0.0,
+            'straightness': None,
+            'duration': 0.0,
+            'angular_velocity': None,
+            'peak_angular_velocity': None
+        }
+        if count < 2:
+            return result
+
+        last = j - 1
+        path = self.cum_path[last] - self.cum_path[i]
+        displacement = np.hypot(self.yaw_unwrapped[last] - self.yaw_unwrapped[i],
+                                self.pitch[last] - self.pitch[i])
+        duration = self.times[last] - self.times[i]
+        result.update({
+            'path_length': _round(path),
+            'displacement': _round(displacement),
+            # 움직이지 않았으면 완전히 곧은 것으로 본다
+            'straightness': _round(min(displacement / path, 1.0)) if path > 0 else 1.0,
+            'duration': _round(duration),
+            'angular_velocity': _round(path / duration) if duration > 0 else None,
+            'peak_angular_velocity': _round(self.velocity[i:last].max())
+        })
+        return result
+
+    def samples(self, i, j):
+        """샘플 범위 [i, j)의 궤적 (yaw는 원래 값과 펼친 값을 함께)"""
+        velocity = np.concatenate(([0.0], self.velocity))[i:j] if j > i else np.zeros(0)
+        return [
+            {'tick': tick, 'game_time': t, 'yaw': _round(yaw), 'yaw_unwrapped': _round(yaw_u),
+             'pitch': _round(pitch), 'angular_velocity': _round(v)}
+            for tick, t, yaw, yaw_u, pitch, v in zip(
+                self.ticks[i:j].tolist(), self.times[i:j].tolist(), self.yaw[i:j],
+                self.yaw_unwrapped[i:j], self.pitch[i:j], velocity)
+        ]
+
+
+def player_track(data, name):
+    """플레이어 궤적 (처음 요청 시 만들어 data['aim_tracks']에 보관, 없는 플레이어면 None)"""
+    store = data['store']
+    player_id = store.player_id(name)
+    if player_id is None:
+        return None
+    tracks = data['aim_tracks']
+    track = tracks.get(name)
+    if track is None:
+        with _tracks_lock:
+            track = tracks.get(name)
+            if track is None:
+                track = AimTrack(store, player_id)
+                tracks[name] = track
+    return track
+
+
+def _parse_windows(value):
+    """"100-160,420-480" -> [(100, 160), (420, 480)] (형식이 틀린 항목은 무시)"""
+    windows = []
+    for part in (value or '').split(','):
+        start, sep, end = part.strip().partition('-')
+        try:
+            windows.append((int(start), int(end)) if sep else (int(start), int(start)))
+        except ValueError:
+            continue
+    return windows[:MAX_WINDOWS]
+
+
+def aim_report(data, name, args):
+    """/api/aim/<player> 응답 (구간 점수 + 선택적으로 windows 점수 / 샘플 페이지)"""
+    track = player_track(data, name)
+    store = data['store']
+    query = parse_range_args(args)
+    lo, hi = store.index_range(query['start_tick'], query['end_tick'],
+                               query['start_time'], query['end_time'])
+    i, j = track.sample_range(lo, hi)
+
+    report = {
+        'player': name,
+        'total_samples': len(track),
+        'score': track.score(i, j)
+    }
+
+    if 'windows' in args:
+        scores = []
+        for start_tick, end_tick in _parse_windows(args.get('windows')):
+            w_lo, w_hi = store.index_range(start_tick=start_tick, end_tick=end_tick)
+            scores.append(dict(track.score(*track.sample_range(w_lo, w_hi)),
+                               window=[start_tick, end_tick]))
+        report['windows'] = scores
+
+    if args.get('samples', '').strip().lower() in ('1', 'true', 'yes'):
+        limit = query['limit']
+        if limit is None or limit <= 0 or limit > MAX_TICKS_PER_PAGE:
+            limit = MAX_TICKS_PER_PAGE
+        start = min(i + query['offset'], j)
+        stop = min(start + limit, j)
+        report['offset'] = start - i
+        report['next_offset'] = stop - i if stop < j else None
+        report['samples'] = track.samples(start, stop)
+    return report
@@ -0,0 +1,298 @@
+"""
+에임봇 의심 일괄 분석 - 여러 경기 CSV의 킬마다 조준 지표를 계산해 플레이어 순위 보고서 작성
+
+킬 틱 CSV 디렉터리를 받아 파일마다 fast_processor와 같은 방식으로 파싱하고,
+킬 직전 구간의 공격자 조준 궤적(aim_trace.AimTrack)에서 아래 지표를 NumPy로
+한꺼번에(공격자별 킬 전체를 배열 연산으로) 계산한다. 파일은 프로세스 풀로 나눠 처리한다.
+
+    snap_angle              킬 직전 snap 구간 동안 조준점이 이동한 직선 각도 (도)
+    straightness            snap 구간의 직선 각도 / 이동 각도 (path_length)
+    peak_angular_velocity   킬 직전 분석 구간의 최대 각속도 (도/초)
+    time_to_target          분석 구간 안에서 최종 킬 조준점을 향한 마지막 접근이
+                            시작된 뒤 tolerance 안에 들어오기까지 걸린 시간 (초)
+                            (구간 내내 tolerance 안이었다면 0)
+
+snap 각이 크고, 목표 도달이 빠르고, 경로가 곧은 킬을 의심 킬로 표시하며
+플레이어 의심 점수는 100 * 의심 킬 / (킬 + PRIOR_KILLS)로 킬 수가 적으면 낮게 잡힌다.
+
+사용법:
+    python aimbot_scan.py <CSV 디렉터리> [--output aimbot_report] [--workers 0] ...
+    -> aimbot_report.csv (플레이어 순위), aimbot_report.json (요약 + 플레이어 + 처리량)
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from aim_trace import AimTrack
+from fast_processor import parse_csv
+
+# 킬 직전 분석 구간 (초)
+PRE_KILL_SECONDS = 1.0
+# snap 각을 재는 킬 직전 구간 (초)
+SNAP_SECONDS = 0.25
+# 최종 조준점과 이 각도(도) 안이면 목표에 도달한 것으로 본다
+TARGET_TOLERANCE_DEG = 3.0
+
+# 의심 킬 판정 기준
+SUSPICIOUS_SNAP_DEG = 30.0
+SUSPICIOUS_TIME_TO_TARGET = 0.1
+SUSPICIOUS_STRAIGHTNESS = 0.8
+# 킬 수가 적은 플레이어의 점수를 낮추는 가상 킬 수
+PRIOR_KILLS = 5
+
+KILL_FIELDS = ('match', 'tick', 'game_time', 'attacker', 'victim', 'weapon', 'headshot',
+               'samples', 'snap_angle', 'peak_angular_velocity', 'time_to_target',
+               'straightness', 'path_length', 'suspicious')
+PLAYER_FIELDS = ('rank', 'player', 'suspicion_score', 'kills', 'suspicious_kills', 'matches',
+                 'mean_snap_angle', 'max_peak_angular_velocity', 'median_time_to_target',
+                 'mean_straightness')
+
+
+def _kill_events(events):
+    """공격자가 있는 킬 이벤트 (같은 틱/공격자/피해자 중복 제거)"""
+    seen = set()
+    kills = []
+    for event in events:
+        attacker = (event.get('attacker') or {}).get('name')
+        victim = (event.get('victim') or {}).get('name')
+        key = (event['tick'], attacker, victim)
+        if attacker and key not in seen:
+            seen.add(key)
+            kills.append(event)
+    return kills
+
+
+def kill_features(track, kill_ticks, pre_kill=PRE_KILL_SECONDS, snap=SNAP_SECONDS,
+                  tolerance=TARGET_TOLERANCE_DEG):
+    """한 공격자의 킬 틱 배열에 대한 지표 배열 사전 (궤적 샘플이 없는 킬은 valid=False)"""
+    kill_ticks = np.asarray(kill_ticks, dtype=np.int64)
+    if not len(track):
+        return {'valid': np.zeros(len(kill_ticks), dtype=bool)}
+    # 킬 시점 샘플: 킬 틱 이하의 마지막 샘플
+    k = np.searchsorted(track.ticks, kill_ticks, side='right') - 1
+    valid = k >= 0
+    k = np.maximum(k, 0)
+
+    times, yaw, pitch = track.times, track.yaw_unwrapped, track.pitch
+    t_kill = times[k]
+    i = np.searchsorted(times, t_kill - pre_kill, side='left')
+    s = np.searchsorted(times, t_kill - snap, side='left')
+
+    # snap 구간 [s, k]의 직선 각도와 경로 길이 (누적합으로 O(1))
+    snap_angle = np.hypot(yaw[k] - yaw[s], pitch[k] - pitch[s])
+    path = track.cum_path[k] - track.cum_path[s]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        straightness = np.where(path > 0, np.minimum(snap_angle / path, 1.0), 1.0)
+
+    # 구간 샘플을 (킬 수 x 최대 구간 길이) 행렬로 펼쳐 한 번에 계산
+    width = int((k - i).max()) + 1
+    idx = i[:, None] + np.arange(width)
+    inside = idx <= k[:, None]
+    idx = np.minimum(idx, len(track) - 1)
+
+    # velocity[m]은 샘플 m -> m+1 이동이므로 마지막 샘플(k)은 제외
+    steps = inside & (idx < k[:, None])
+    velocity = np.append(track.velocity, 0.0)
+    peak = np.where(steps, velocity[idx], 0.0).max(axis=1)
+
+    # 목표 도달: 최종 조준점에서 tolerance 밖에 있던 마지막 샘플의 다음 샘플
+    distance = np.hypot(yaw[idx] - yaw[k][:, None], pitch[idx] - pitch[k][:, None])
+    off_target = inside & (distance > tolerance)
+    last_off = width - 1 - np.argmax(off_target[:, ::-1], axis=1)
+    on_col = np.where(off_target.any(axis=1), np.minimum(last_off + 1, k - i), 0)
+
+    # 접근 시작: 목표 도달 직전까지 거리가 계속 줄어든 구간의 첫 샘플
+    cols = np.arange(width - 1)
+    not_closing = (distance[:, 1:] >= distance[:, :-1]) & (cols < on_col[:, None])
+    last_stall = width - 2 - np.argmax(not_closing[:, ::-1], axis=1)
+    start_col = np.where(not_closing.any(axis=1), last_stall + 1, 0)
+    time_to_target = times[i + on_col] - times[i + start_col]
+
+    return {
+        'valid': valid,
+        'samples': k - i + 1,
+        'snap_angle': snap_angle,
+        'peak_angular_velocity': peak,
+        'time_to_target': time_to_target,
+        'straightness': straightness,
+        'path_length': path
+    }
+
+
+def _is_suspicious(snap_angle, time_to_target, straightness):
+    return (snap_angle >= SUSPICIOUS_SNAP_DEG and time_to_target <= SUSPICIOUS_TIME_TO_TARGET
+            and straightness >= SUSPICIOUS_STRAIGHTNESS)
+
+
+def scan_match(csv_path, pre_kill=PRE_KILL_SECONDS, snap=SNAP_SECONDS,
+               tolerance=TARGET_TOLERANCE_DEG):
+    """경기 CSV 하나의 킬별 지표 행 목록"""
+    store, events = parse_csv(csv_path)
+    kills = _kill_events(events)
+    match = os.path.basename(csv_path)
+
+    by_attacker = {}
+    for event in kills:
+        by_attacker.setdefault(event['attacker']['name'], []).append(event)
+
+    rows = []
+    for name, attacker_kills in by_attacker.items():
+        player_id = store.player_id(name)
+        if player_id is None:
+            continue
+        track = AimTrack(store, player_id)
+        features = kill_features(track, [e['tick'] for e in attacker_kills], pre_kill, snap, tolerance)
+        for n, event in enumerate(attacker_kills):
+            if not features['valid'][n]:
+                continue
+            row = {
+                'match': match,
+                'tick': event['tick'],
+                'game_time': event['game_time'],
+                'attacker': name,
+                'victim': (event.get('victim') or {}).get('name'),
+                'weapon': event.get('weapon'),
+                'headshot': bool(event.get('headshot')),
+                'samples': int(features['samples'][n])
+            }
+            for field in ('snap_angle', 'peak_angular_velocity', 'time_to_target',
+                          'straightness', 'path_length'):
+                row[field] = round(float(features[field][n]), 4)
+            row['suspicious'] = _is_suspicious(row['snap_angle'], row['time_to_target'],
+                                               row['straightness'])
+            rows.append(row)
+    rows.sort(key=lambda r: (r['tick'], r['attacker']))
+    return rows
+
+
+def _scan_task(task):
+    """프로세스 풀 작업 단위: (경로, 킬 행 목록, 오류 메시지)"""
+    csv_path, pre_kill, snap, tolerance = task
+    try:
+        return csv_path, scan_match(csv_path, pre_kill, snap, tolerance), None
+    except (OSError, ValueError, KeyError, csv.Error) as e:
+        return csv_path, [], str(e)
+
+
+def rank_players(kill_rows):
+    """킬 행들을 플레이어별로 모아 의심 점수 순으로 정렬한 목록"""
+    grouped = {}
+    for row in kill_rows:
+        grouped.setdefault(row['attacker'], []).append(row)
+
+    players = []
+    for name, rows in grouped.items():
+        snap_angle = np.array([r['snap_angle'] for r in rows])
+        peak = np.array([r['peak_angular_velocity'] for r in rows])
+        time_to_target = np.array([r['time_to_target'] for r in rows])
+        straightness = np.array([r['straightness'] for r in rows])
+        suspicious = sum(r['suspicious'] for r in rows)
+        players.append({
+            'player': name,
+            'suspicion_score': round(100.0 * suspicious / (len(rows) + PRIOR_KILLS), 2),
+            'kills': len(rows),
+            'suspicious_kills': suspicious,
+            'matches': len({r['match'] for r in rows}),
+            'mean_snap_angle': round(float(snap_angle.mean()), 4),
+            'max_peak_angular_velocity': round(float(peak.max()), 4),
+            'median_time_to_target': round(float(np.median(time_to_target)), 4),
+            'mean_straightness': round(float(straightness.mean()), 4)
+        })
+
+    players.sort(key=lambda p: (-p['suspicion_score'], -p['suspicious_kills'], p['player']))
+    for rank, player in enumerate(players, 1):
+        player['rank'] = rank
+    return players
+
+
+def _write_csv(path, fields, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def scan_directory(directory, output='aimbot_report', workers=None, pre_kill=PRE_KILL_SECONDS,
+                   snap=SNAP_SECONDS, tolerance=TARGET_TOLERANCE_DEG, write_kills=False):
+    """디렉터리의 모든 CSV를 분석해 보고서(CSV/JSON)를 쓰고 요약을 반환"""
+    paths = sorted(glob.glob(os.path.join(directory, '*.csv')))
+    workers = workers or os.cpu_count() or 1
+    tasks = [(path, pre_kill, snap, tolerance) for path in paths]
+    print(f"경기 {len(paths)}개 분석 시작 (워커 {workers}개)")
+
+    started = time.perf_counter()
+    kill_rows, errors = [], {}
+    if workers == 1:
+        results = map(_scan_task, tasks)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(_scan_task, tasks)
+    try:
+        for done, (path, rows, error) in enumerate(results, 1):
+            if error:
+                errors[os.path.basename(path)] = error
+                print(f"[{done}/{len(paths)}] {os.path.basename(path)} 실패: {error}")
+            else:
+                kill_rows.extend(rows)
+                print(f"[{done}/{len(paths)}] {os.path.basename(path)}: 킬 {len(rows)}개")
+    finally:
+        if workers != 1:
+            pool.shutdown()
+    elapsed = time.perf_counter() - started
+
+    players = rank_players(kill_rows)
+    matches = len(paths) - len(errors)
+    summary = {
+        'matches': matches,
+        'failed': errors,
+        'kills': len(kill_rows),
+        'suspicious_kills': sum(r['suspicious'] for r in kill_rows),
+        'seconds': round(elapsed, 3),
+        'matches_per_minute': round(matches / elapsed * 60, 2) if elapsed > 0 else None,
+        'kills_per_second': round(len(kill_rows) / elapsed, 2) if elapsed > 0 else None,
+        'workers': workers,
+        'params': {
+            'pre_kill_seconds': pre_kill,
+            'snap_seconds': snap,
+            'target_tolerance_deg': tolerance,
+            'suspicious_snap_deg': SUSPICIOUS_SNAP_DEG,
+            'suspicious_time_to_target': SUSPICIOUS_TIME_TO_TARGET,
+            'suspicious_straightness': SUSPICIOUS_STRAIGHTNESS,
+            'prior_kills': PRIOR_KILLS
+        }
+    }
+
+    _write_csv(output + '.csv', PLAYER_FIELDS, players)
+    with open(output + '.json', 'w', encoding='utf-8') as f:
+        json.dump({'summary': summary, 'players': players}, f, ensure_ascii=False, indent=2)
+    if write_kills:
+        _write_csv(output + '_kills.csv', KILL_FIELDS, kill_rows)
+
+    print(f"완료! 경기 {matches}개, 킬 {len(kill_rows)}개, {elapsed:.2f}초 "
+          f"({summary['matches_per_minute']} 경기/분)")
+    print(f"- 보고서: {output}.csv, {output}.json")
+    for player in players[:10]:
+        print(f"  {player['rank']:>3}. {player['player']}: {player['suspicion_score']} "
+              f"(의심 킬 {player['suspicious_kills']}/{player['kills']})")
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='킬 틱 CSV 디렉터리의 에임봇 의심 보고서 작성')
+    parser.add_argument('directory', help='경기 CSV 파일이 있는 디렉터리')
+    parser.add_argument('--output', default='aimbot_report', help='보고서 파일 이름 (확장자 제외)')
+    parser.add_argument('--workers', type=int, default=0, help='프로세스 수 (0 = CPU 코어 수)')
+    parser.add_argument('--pre-kill', type=float, default=PRE_KILL_SECONDS, help='킬 직전 분석 구간 (초)')
+    parser.add_argument('--snap', type=float, default=SNAP_SECONDS, help='snap 각 측정 구간 (초)')
+    parser.add_argument('--tolerance', type=float, default=TARGET_TOLERANCE_DEG, help='목표 도달 판정 각도 (도)')
+    parser.add_argument('--kills', action='store_true', help='킬별 지표도 <output>_kills.csv로 저장')
+    args = parser.parse_args()
+
+    scan_directory(args.directory, args.output, args.workers or None, args.pre_kill,
+                   args.snap, args.tolerance, args.kills)
@@ -0,0 +1,102 @@
+"""
+API 공통 조회 파라미터 처리 - tick/time 구간 조회와 페이지 나누기
+
+두 Flask 서버(app.py, app_direct.py)가 같은 규칙으로 positions를 잘라 내도록
+요청 파라미터 해석과 응답 구성을 여기에 모아 둔다.
+
+    start_tick, end_tick   틱 번호 구간 (양 끝 포함)
+    start_time, end_time   game_time 구간 (초, 양 끝 포함)
+    offset, limit          구간 안에서 건너뛸 틱 수 / 한 번에 받을 최대 틱 수
+"""
+from bisect import bisect_left, bisect_right
+
+# 한 번의 요청으로 돌려주는 최대 틱 수
+MAX_TICKS_PER_PAGE = 5000
+
+RANGE_PARAMS = ('start_tick', 'end_tick', 'start_time', 'end_time', 'offset', 'limit')
+
+
+def has_range_args(args):
+    """구간/페이지 파라미터가 하나라도 있으면 True (없으면 기존 전체 응답)"""
+    return any(name in args for name in RANGE_PARAMS)
+
+
+def parse_range_args(args):
+    """request.args에서 구간 파라미터를 읽는다 (형식이 틀린 값은 무시)"""
+    return {
+        'start_tick': args.get('start_tick', type=int),
+        'end_tick': args.get('end_tick', type=int),
+        'start_time': args.get('start_time', type=float),
+        'end_time': args.get('end_time', type=float),
+        'offset': max(args.get('offset', 0, type=int), 0),
+        'limit': args.get('limit', type=int)
+    }
+
+
+def page_bounds(store, query):
+    """구간 + 페이지 조건을 틱 인덱스 범위로 변환
+
+    반환값: (lo, hi, start, stop) - [lo, hi)는 구간 전체, [start, stop)은 이번 페이지
+    """
+    lo, hi = store.index_range(query['start_tick'], query['end_tick'],
+                               query['start_time'], query['end_time'])
+    limit = query['limit']
+    if limit is None or limit <= 0 or limit > MAX_TICKS_PER_PAGE:
+        limit = MAX_TICKS_PER_PAGE
+    start = min(lo + query['offset'], hi)
+    stop = min(start + limit, hi)
+    return lo, hi, start, stop
+
+
+def page_info(lo, hi, start, stop):
+    """페이지 응답에 함께 넣는 안내 정보"""
+    return {
+        'total_ticks': hi - lo,
+        'offset': start - lo,
+        'count': stop - start,
+        'next_offset': stop - lo if stop < hi else None,
+        'max_ticks': MAX_TICKS_PER_PAGE
+    }
+
+
+def positions_page(store, args):
+    """구간/페이지 조건에 맞는 positions와 페이지 정보 반환"""
+    query = parse_range_args(args)
+    lo, hi, start, stop = page_bounds(store, query)
+    page = page_info(lo, hi, start, stop)
+    page['positions'] = store.positions(start, stop)
+    return page
+
+
+def event_tick_index(events):
+    """이벤트를 tick 순으로 (안정) 정렬하고 이진 탐색용 tick 리스트를 함께 반환"""
+    events = sorted(events, key=lambda e: e['tick'])
+    return events, [e['tick'] for e in events]
+
+
+def events_between(events, event_ticks, store, start, stop):
+    """틱 인덱스 범위 [start, stop)에 속하는 이벤트 반환
+
+    event_ticks는 events와 같은 순서의 tick 리스트(정렬됨)로, 이진 탐색에 쓴다.
+    """
+    if start >= stop:
+        return []
+    first_tick = int(store.tick_values[start])
+    last_tick = int(store.tick_values[stop - 1])
+    return events[bisect_left(event_ticks, first_tick):bisect_right(event_ticks, last_tick)]
+
+
+def data_page(data, args, store=None):
+    """/api/data 구간 조회 응답 (metadata + 구간 positions + 구간 events)
+
+    store: positions를 만들 저장소 (없으면 원본, LOD 단계 저장소를 넘길 수 있다)
+    """
+    store = store if store is not None else data['store']
+    query = parse_range_args(args)
+    lo, hi, start, stop = page_bounds(store, query)
+    return {
+        'metadata': data['metadata'],
+        'positions': store.positions(start, stop),
+        'events': events_between(data['events'], data['event_ticks'], store, start, stop),
+        'page': page_info(lo, hi, start, stop)
+    }
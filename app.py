@@ -1,55 +1,303 @@
 """
 Flask 웹 서버 - 3D 시뮬레이션 데이터 제공
 """
-from flask import Flask, render_template, jsonify
+from flask import Flask, Response, abort, render_template, jsonify, request
 from flask_cors import CORS
 import json
 import os
 
+import aim_trace
+import binary_frames
+import combat_stats
+import delta_export
+import json_stream
+import store_cache
+from api_query import data_page, has_range_args, positions_page
+from background_load import BackgroundLoader, LoadFailed, StillLoading
+from event_index import INT_PARAMS, events_page, has_event_args, valid_event_args, with_ids
+from kill_context import context_window, window_args
+from line_of_sight import event_sight, has_sight_args
+from lod import select_store
+from match_catalog import MatchCatalog, make_data
+from metrics import instrument, stage
+from resample import MIN_RATE
+from spatial_grid import HEATMAP_KINDS, heatmap_args, nearby_query
+from tick_store import TickStore
+
 app = Flask(__name__)
 CORS(app)
+instrument(app)
 
 # 데이터 로드
 SIMULATION_DATA = None
 
-def load_data():
+DATA_PATH = 'simulation_data.json'
+# JSON이 없으면 키프레임 + 델타 형식 파일을 읽는다
+DELTA_DATA_PATH = 'simulation_data.csd'
+
+def load_match(path, progress=None):
+    """전처리된 경기 파일(JSON 또는 .csd) 하나를 읽어서 데이터 반환 (progress는 사용하지 않음)
+
+    JSON은 디스크 캐시가 유효하면 메모리 매핑으로 로드하고, .csd(키프레임 + 델타)는
+    블록 단위 복원이 충분히 빨라 바로 읽는다.
+    """
+    if delta_export.is_delta_file(path):
+        with stage('app', 'read'):
+            store, metadata, events = delta_export.load(path)
+        with stage('app', 'index'):
+            return make_data(store, metadata, events)
+    with stage('app', 'cache_load'):
+        cached = store_cache.load(path)
+    if cached is not None:
+        store, metadata, events = cached
+    else:
+        with stage('app', 'read'):
+            with open(path, 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+        # positions는 컬럼 저장소로 변환하고 원본 리스트는 버린다
+        with stage('app', 'tick_grouping'):
+            store = TickStore.from_positions(raw.get('positions', []))
+        metadata = raw.get('metadata', {})
+        events = raw.get('events', [])
+        with stage('app', 'cache_save'):
+            store_cache.save(path, store, metadata, events)
+    with stage('app', 'index'):
+        return make_data(store, metadata, events, store_cache.load_rounds(path))
+
+def _load_default(progress=None):
+    """기본 경기 파일을 읽어 SIMULATION_DATA에 저장 (default_loader의 로드 함수)"""
     global SIMULATION_DATA
-    if os.path.exists('simulation_data.json'):
-        with open('simulation_data.json', 'r', encoding='utf-8') as f:
-            SIMULATION_DATA = json.load(f)
+    if os.path.exists(DATA_PATH):
+        path = DATA_PATH
+    elif os.path.exists(DELTA_DATA_PATH):
+        path = DELTA_DATA_PATH
+    else:
+        raise FileNotFoundError(f'{DATA_PATH} / {DELTA_DATA_PATH}')
+    SIMULATION_DATA = load_match(path)
+    # 로드가 끝나면 바로 통계 부분 집계를 계산해 저장
+    stats_engine.record(os.path.splitext(os.path.basename(path))[0], path, SIMULATION_DATA)
     return SIMULATION_DATA
 
+# 기본 경기 로더 (요청 경로와 /api/stats가 같은 로드 하나를 함께 쓴다)
+default_loader = BackgroundLoader(_load_default, name='default')
+
+def load_data():
+    """기본 경기 데이터 반환 (처음 한 번만 로드, 로드 중이면 끝날 때까지 대기, 파일이 없으면 None)"""
+    try:
+        return default_loader.wait()
+    except LoadFailed:
+        return None
+
+# MATCH_DIR의 경기 JSON / .csd 목록 (/api/matches/<id>/...)
+# 로드가 끝난 경기는 바로 통계 부분 집계를 계산해 저장
+catalog = MatchCatalog(load_match, extensions=('.json', delta_export.EXTENSION),
+                       on_load=lambda match_id, path, data: stats_engine.record(match_id, path, data))
+
+def _stats_sources():
+    """통계 대상 경기 (카탈로그 경기, 카탈로그가 비어 있으면 기본 경기)"""
+    paths = catalog.paths()
+    if not paths:
+        for path in (DATA_PATH, DELTA_DATA_PATH):
+            if os.path.exists(path):
+                return {os.path.splitext(os.path.basename(path))[0]: path}
+    return paths
+
+def _stats_load(match_id):
+    """통계용 경기 로드 (기다리지 않음, 로드 중이면 StillLoading)"""
+    if catalog.paths():
+        return catalog.get(match_id, wait=False)
+    return default_loader.get()
+
+# 경기별 부분 집계 + 전체 합계 (/api/stats)
+stats_engine = combat_stats.StatsEngine(_stats_sources, _stats_load)
+
+def get_match_data(match_id=None):
+    """match_id가 없으면 기본 경기, 있으면 카탈로그의 경기 (없는 id면 404)"""
+    if match_id is None:
+        return load_data()
+    data = catalog.get(match_id)
+    if data is None:
+        response = jsonify({'error': f'경기 {match_id}를 찾을 수 없습니다.'})
+        response.status_code = 404
+        abort(response)
+    return data
+
+def get_store(data):
+    """요청 파라미터(rate / lod / tolerance)에 맞는 저장소 (rate가 잘못되었으면 400)"""
+    store = select_store(data, request.args)
+    if store is None:
+        response = jsonify({'error': f'rate는 {MIN_RATE:g} 이상의 유한한 숫자여야 합니다.'})
+        response.status_code = 400
+        abort(response)
+    return store
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.route('/api/matches')
+def get_matches():
+    """경기 카탈로그 (MATCH_DIR의 경기 파일 목록과 로드 상태)"""
+    return jsonify({'matches': catalog.matches(), 'cache': catalog.stats()})
+
 @app.route('/api/data')
-def get_data():
-    """전체 시뮬레이션 데이터 반환"""
-    if SIMULATION_DATA is None:
-        load_data()
-    return jsonify(SIMULATION_DATA)
+@app.route('/api/matches/<match_id>/data')
+def get_data(match_id=None):
+    """전체 시뮬레이션 데이터 반환 (구간 파라미터가 있으면 해당 구간만, lod/tolerance로 궤적 단순화, rate로 일정 간격 재샘플링)"""
+    data = get_match_data(match_id)
+    store = get_store(data)
+    if has_range_args(request.args):
+        produce = lambda: json_stream.iter_value_json(data_page(data, request.args, store))
+    else:
+        # 전체 응답은 틱 묶음 단위로 인코딩 (직렬화 문자열 전체를 만들지 않음)
+        produce = lambda: json_stream.iter_data_json(data['metadata'], store, data['events'])
+    return data['responses'].respond(produce)
 
 @app.route('/api/positions')
-def get_positions():
-    """플레이어 위치 데이터만 반환"""
-    if SIMULATION_DATA is None:
-        load_data()
-    return jsonify(SIMULATION_DATA.get('positions', []))
+@app.route('/api/matches/<match_id>/positions')
+def get_positions(match_id=None):
+    """플레이어 위치 데이터만 반환 (구간 파라미터가 있으면 페이지 단위, lod/tolerance로 궤적 단순화, rate로 일정 간격 재샘플링)"""
+    data = get_match_data(match_id)
+    store = get_store(data)
+    if has_range_args(request.args):
+        produce = lambda: json_stream.iter_value_json(positions_page(store, request.args))
+    else:
+        produce = lambda: json_stream.iter_positions_array(store)
+    return data['responses'].respond(produce)
+
+@app.route('/api/positions.bin')
+@app.route('/api/matches/<match_id>/positions.bin')
+def get_positions_binary(match_id=None):
+    """플레이어 위치 데이터를 바이너리 프레임으로 반환 (항상 페이지 단위)"""
+    data = get_match_data(match_id)
+    body = binary_frames.encode_page(get_store(data), request.args)
+    return Response(body, mimetype=binary_frames.MIMETYPE)
 
 @app.route('/api/events')
-def get_events():
-    """이벤트 데이터만 반환"""
-    if SIMULATION_DATA is None:
-        load_data()
-    return jsonify(SIMULATION_DATA.get('events', []))
+@app.route('/api/matches/<match_id>/events')
+def get_events(match_id=None):
+    """이벤트 데이터 반환 (조회 파라미터가 있으면 역색인으로 필터링 + 집계, los/wallbang은 시야 검사)"""
+    data = get_match_data(match_id)
+    if has_event_args(request.args):
+        if not valid_event_args(request.args):
+            return jsonify({'error': f'{", ".join(INT_PARAMS)}는 정수여야 합니다.'}), 400
+        sight = None
+        if has_sight_args(request.args):
+            sight = event_sight(data, request.args.get('map'))
+            if sight is None:
+                return jsonify({'error': '맵 지오메트리를 찾을 수 없습니다.'}), 404
+        produce = lambda: json_stream.iter_value_json(events_page(data['event_index'], request.args, sight))
+    else:
+        produce = lambda: json_stream.iter_value_json(with_ids(data.get('events', [])))
+    return data['responses'].respond(produce)
+
+@app.route('/api/events/<int:event_id>/context')
+@app.route('/api/matches/<match_id>/events/<int:event_id>/context')
+def get_event_context(event_id, match_id=None):
+    """킬 이벤트 전후 구간(positions, 공격자 조준, 주변 이벤트) 반환"""
+    data = get_match_data(match_id)
+    before, after = window_args(request.args)
+    if not 0 <= event_id < len(data['event_index'].events):
+        return jsonify({'error': f'이벤트 {event_id}를 찾을 수 없습니다.'}), 404
+    produce = lambda: json_stream.iter_value_json(context_window(data, event_id, before, after))
+    return data['responses'].respond(produce)
+
+@app.route('/api/rounds')
+@app.route('/api/matches/<match_id>/rounds')
+def get_rounds(match_id=None):
+    """라운드 목록 (틱 구간, 시작/끝 시간, 킬 수)"""
+    data = get_match_data(match_id)
+    return data['responses'].respond(lambda: json_stream.iter_value_json({'rounds': data['rounds'].rounds()}))
+
+@app.route('/api/rounds/<int:round_num>/positions')
+@app.route('/api/matches/<match_id>/rounds/<int:round_num>/positions')
+def get_round_positions(round_num, match_id=None):
+    """라운드 하나의 위치 데이터 (처음 요청 시 그 라운드 샤드만 로드, 구간 파라미터가 있으면 페이지 단위)"""
+    data = get_match_data(match_id)
+    shard = data['rounds'].get(round_num)
+    if shard is None:
+        return jsonify({'error': f'라운드 {round_num}를 찾을 수 없습니다.'}), 404
+    if has_range_args(request.args):
+        produce = lambda: json_stream.iter_value_json(positions_page(shard.store, request.args))
+    else:
+        produce = lambda: json_stream.iter_positions_array(shard.store)
+    return data['responses'].respond(produce)
+
+@app.route('/api/rounds/<int:round_num>/events')
+@app.route('/api/matches/<match_id>/rounds/<int:round_num>/events')
+def get_round_events(round_num, match_id=None):
+    """라운드 하나의 이벤트"""
+    data = get_match_data(match_id)
+    shard = data['rounds'].get(round_num)
+    if shard is None:
+        return jsonify({'error': f'라운드 {round_num}를 찾을 수 없습니다.'}), 404
+    return data['responses'].respond(lambda: json_stream.iter_value_json(shard.events))
+
+@app.route('/api/players/<player>/track')
+@app.route('/api/matches/<match_id>/players/<player>/track')
+def get_player_track(player, match_id=None):
+    """플레이어 한 명의 궤적 (틱 구간 + 페이지, 생존/사망 구간 포함)"""
+    data = get_match_data(match_id)
+    if data['store'].player_id(player) is None:
+        return jsonify({'error': f'플레이어 {player}를 찾을 수 없습니다.'}), 404
+    produce = lambda: json_stream.iter_value_json(data['tracks'].track(player, request.args))
+    return data['responses'].respond(produce)
+
+@app.route('/api/aim/<player>')
+@app.route('/api/matches/<match_id>/aim/<player>')
+def get_aim(player, match_id=None):
+    """플레이어 조준 궤적 점수 (직선도, 각속도, 이동 각도) 반환"""
+    data = get_match_data(match_id)
+    if data['store'].player_id(player) is None:
+        return jsonify({'error': f'플레이어 {player}를 찾을 수 없습니다.'}), 404
+    produce = lambda: json_stream.iter_value_json(aim_trace.aim_report(data, player, request.args))
+    return data['responses'].respond(produce)
+
+@app.route('/api/heatmap')
+@app.route('/api/matches/<match_id>/heatmap')
+def get_heatmap(match_id=None):
+    """격자 히트맵 (kind=occupancy|kills|deaths, round=쉼표 구분, team, player)"""
+    data = get_match_data(match_id)
+    query = heatmap_args(request.args)
+    if query is None:
+        return jsonify({'error': f'kind는 {", ".join(HEATMAP_KINDS)} 중 하나, '
+                                 f'round는 쉼표로 구분한 정수여야 합니다.'}), 400
+    produce = lambda: json_stream.iter_value_json(data['spatial'].heatmap_report(**query))
+    return data['responses'].respond(produce)
+
+@app.route('/api/nearby')
+@app.route('/api/matches/<match_id>/nearby')
+def get_nearby(match_id=None):
+    """틱 t(또는 start_tick~end_tick)에 점 (x, y[, z])에서 radius 안에 있던 플레이어"""
+    data = get_match_data(match_id)
+    result = nearby_query(data, request.args)
+    if result is None:
+        return jsonify({'error': 'x, y, radius 파라미터가 필요합니다.'}), 400
+    return jsonify(result)
+
+@app.route('/api/stats')
+@app.route('/api/matches/<match_id>/stats')
+def get_stats(match_id=None):
+    """킬/데스/헤드샷/무기/트레이드/오프닝/멀티킬 통계 (match=쉼표 구분, player, weapon)"""
+    if match_id is not None and match_id not in _stats_sources():
+        return jsonify({'error': f'경기 {match_id}를 찾을 수 없습니다.'}), 404
+    try:
+        result = stats_engine.stats(request.args, None if match_id is None else [match_id])
+    except StillLoading as e:
+        response = jsonify({'error': '통계를 계산할 경기를 로드하는 중입니다.', 'loading': e.status})
+        response.status_code = 503
+        response.headers['Retry-After'] = '2'
+        return response
+    except LoadFailed as e:
+        return jsonify({'error': '데이터 로드에 실패했습니다.', 'loading': e.status}), 500
+    return jsonify(result)
 
 @app.route('/api/metadata')
-def get_metadata():
+@app.route('/api/matches/<match_id>/metadata')
+def get_metadata(match_id=None):
     """메타데이터만 반환"""
-    if SIMULATION_DATA is None:
-        load_data()
-    return jsonify(SIMULATION_DATA.get('metadata', {}))
+    data = get_match_data(match_id)
+    return data['responses'].respond(lambda: json_stream.iter_value_json(data.get('metadata', {})))
 
 if __name__ == '__main__':
     load_data()
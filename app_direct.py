@@ -1,39 +1,172 @@
 """
 Flask 웹 서버 - CSV를 직접 읽어서 처리 (전처리 불필요)
 """
-from flask import Flask, render_template, jsonify
+from flask import Flask, Response, abort, render_template, jsonify, request, stream_with_context
 from flask_cors import CORS
 import csv
 import json
 import os
+import threading
 from collections import defaultdict
 
+import aim_trace
+import binary_frames
+import combat_stats
+import json_stream
+import live_tail
+import store_cache
+from api_query import data_page, has_range_args, positions_page
+from background_load import BackgroundLoader, LoadFailed, StillLoading
+from event_index import INT_PARAMS, events_page, has_event_args, valid_event_args, with_ids
+from kill_context import context_window, window_args
+from line_of_sight import event_sight, has_sight_args
+from lod import select_store
+from match_catalog import MatchCatalog, make_data
+from metrics import StageTimer, ingest_rows, instrument, stage, stage_summary
+from resample import MIN_RATE
+from spatial_grid import HEATMAP_KINDS, heatmap_args, nearby_query
+from tick_store import NAN, TickStoreBuilder, build_metadata
+
 app = Flask(__name__)
 CORS(app)
+instrument(app)
 
-# 캐시
-_data_cache = None
+DEFAULT_CSV = 'sample_dataset_kill_tick_info.csv'
 
-def load_data_from_csv(csv_path='sample_dataset_kill_tick_info.csv'):
-    """CSV를 직접 읽어서 데이터 반환"""
-    global _data_cache
-    
-    if _data_cache is not None:
-        return _data_cache
+# 경로별 단일 로더 (동시에 들어온 첫 요청들도 파싱은 한 번만)
+_loaders = {}
+_loaders_lock = threading.Lock()
+
+def load_match(csv_path, progress=None):
+    """CSV 경기 하나를 읽어서 데이터 반환 (디스크 캐시가 유효하면 파싱 생략)"""
+    with stage('app_direct', 'cache_load'):
+        cached = store_cache.load(csv_path)
+    if cached is not None:
+        store, metadata, events = cached
+        print("전처리 캐시에서 로드")
+    else:
+        store, events = parse_csv(csv_path, progress)
+        with stage('app_direct', 'metadata'):
+            metadata = build_metadata(store, events)
+        with stage('app_direct', 'cache_save'):
+            store_cache.save(csv_path, store, metadata, events)
     
+    with stage('app_direct', 'index'):
+        data = make_data(store, metadata, events, store_cache.load_rounds(csv_path))
+    print(f"로딩 완료! {store.n_ticks} 틱, {len(events)} 이벤트 "
+          f"(위치 데이터 {store.nbytes / 1024 / 1024:.1f}MB)")
+    print(f"단계별 시간: {stage_summary('app_direct')}")
+    return data
+
+def get_loader(csv_path=DEFAULT_CSV):
+    """csv_path 경기의 BackgroundLoader (처음 호출 시 생성)"""
+    with _loaders_lock:
+        loader = _loaders.get(csv_path)
+        if loader is None:
+            total_bytes = os.path.getsize(csv_path) if os.path.exists(csv_path) else None
+            match_id = os.path.splitext(os.path.basename(csv_path))[0]
+            loader = BackgroundLoader(lambda progress: load_match(csv_path, progress),
+                                      name=csv_path, total_bytes=total_bytes,
+                                      on_ready=lambda data: stats_engine.record(match_id, csv_path, data))
+            _loaders[csv_path] = loader
+        return loader
+
+def load_data_from_csv(csv_path=DEFAULT_CSV):
+    """기본 경기 데이터 반환 (처음 한 번만 로드, 로드 중이면 끝날 때까지 대기)"""
+    return get_loader(csv_path).wait()
+
+def warm_up(csv_path=DEFAULT_CSV):
+    """기본 경기 로드를 백그라운드에서 미리 시작"""
+    get_loader(csv_path).start()
+
+# MATCH_DIR의 경기 CSV 목록 (/api/matches/<id>/...)
+# 로드가 끝난 경기는 바로 통계 부분 집계를 계산해 저장
+catalog = MatchCatalog(load_match, extensions=('.csv',),
+                       on_load=lambda match_id, path, data: stats_engine.record(match_id, path, data))
+
+def _stats_sources():
+    """통계 대상 경기 (카탈로그 경기, 카탈로그가 비어 있으면 기본 경기)"""
+    paths = catalog.paths()
+    if not paths and os.path.exists(DEFAULT_CSV):
+        return {os.path.splitext(os.path.basename(DEFAULT_CSV))[0]: DEFAULT_CSV}
+    return paths
+
+def _stats_load(match_id):
+    """통계용 경기 로드 (기다리지 않음, 로드 중이면 StillLoading)"""
+    return catalog.get(match_id, wait=False) if catalog.paths() else get_loader().get()
+
+# 경기별 부분 집계 + 전체 합계 (/api/stats)
+stats_engine = combat_stats.StatsEngine(_stats_sources, _stats_load)
+
+def _loading_response(e, retry_after):
+    """로드 중이면 503 + Retry-After, 실패했으면 500"""
+    if isinstance(e, StillLoading):
+        response = jsonify({'error': '데이터를 로드하는 중입니다.', 'loading': e.status})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(retry_after)
+    else:
+        response = jsonify({'error': '데이터 로드에 실패했습니다.', 'loading': e.status})
+        response.status_code = 500
+    return response
+
+def get_match_data(match_id=None):
+    """match_id가 없으면 기본 경기, 있으면 카탈로그의 경기 (없는 id면 404)
+
+    로드가 끝나지 않았으면 기다리지 않고 503 + Retry-After로 응답한다.
+    """
+    if match_id is None:
+        loader = get_loader()
+        try:
+            return loader.get()
+        except (StillLoading, LoadFailed) as e:
+            abort(_loading_response(e, loader.retry_after()))
+    try:
+        data = catalog.get(match_id, wait=False)
+    except (StillLoading, LoadFailed) as e:
+        abort(_loading_response(e, 2))
+    if data is None:
+        response = jsonify({'error': f'경기 {match_id}를 찾을 수 없습니다.'})
+        response.status_code = 404
+        abort(response)
+    return data
+
+def get_live_match():
+    """실시간 수집기 (LIVE_CSV가 설정되지 않았으면 404)"""
+    live = live_tail.get_live()
+    if live is None:
+        response = jsonify({'error': '실시간 수집 CSV(LIVE_CSV)가 설정되지 않았습니다.'})
+        response.status_code = 404
+        abort(response)
+    return live
+
+def _counted_lines(f, counter):
+    """바이너리 파일의 줄을 UTF-8로 디코딩해 넘기면서 읽은 바이트 수를 counter[0]에 누적"""
+    for line in f:
+        counter[0] += len(line)
+        yield line.decode('utf-8')
+
+def parse_csv(csv_path, progress=None):
+    """CSV를 파싱하여 (TickStore, events) 반환
+
+    progress(rows, bytes_read, total_bytes)가 있으면 5000줄마다 진행 상황을 알린다.
+    """
     print("CSV 파일 로딩 중...")
-    positions = []
+    timer = StageTimer('app_direct')
+    builder = TickStoreBuilder()
     events = []
+    total_bytes = os.path.getsize(csv_path)
+    bytes_read = [0]
+    idx = -1
     
-    tick_data = {}
-    current_tick = None
-    
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
+    # 진행률을 파일 크기(바이트)와 비교하므로 바이너리로 읽어 바이트 수를 센다
+    with open(csv_path, 'rb') as f:
+        reader = csv.DictReader(_counted_lines(f, bytes_read))
         
         for idx, row in enumerate(reader):
             if idx % 5000 == 0 and idx > 0:
                 print(f"처리 중... {idx}줄")
+                if progress is not None:
+                    progress(idx, bytes_read[0], total_bytes)
             
             tick_str = row.get('tick', '').strip()
             if not tick_str:
@@ -45,31 +178,23 @@ def load_data_from_csv(csv_path='sample_dataset_kill_tick_info.csv'):
             except (ValueError, KeyError):
                 continue
             
-            # 틱이 바뀌면 저장
-            if current_tick != tick and current_tick is not None and tick_data.get('players'):
-                positions.append({
-                    'tick': current_tick,
-                    'game_time': tick_data.get('game_time', 0),
-                    'players': tick_data.get('players', [])
-                })
-                tick_data = {'players': []}
-            
-            current_tick = tick
-            tick_data['game_time'] = game_time
+            # 틱이 바뀌면 이전 틱을 저장소에 기록
+            builder.begin_tick(tick, game_time)
             
             # 플레이어 위치 정보
             x, y, z = row.get('X', '').strip(), row.get('Y', '').strip(), row.get('Z', '').strip()
-            if x and y and z:
+            name = row.get('name', '').strip()
+            if x and y and z and name:
                 try:
-                    player_info = {
-                        'name': row.get('name', '').strip(),
-                        'team': row.get('team_name', '').strip(),
-                        'position': [float(x), float(z), float(y)],
-                        'health': float(row.get('health', 100) or 100),
-                        'round': int(row.get('round', 1) or 1)
-                    }
-                    if player_info['name']:
-                        tick_data.setdefault('players', []).append(player_info)
+                    builder.add_player(
+                        name,
+                        row.get('team_name', '').strip(),
+                        float(x), float(z), float(y),
+                        float(row.get('health', 100) or 100),
+                        int(row.get('round', 1) or 1),
+                        float(row['yaw']) if row.get('yaw') and row['yaw'].strip() else NAN,
+                        float(row['pitch']) if row.get('pitch') and row['pitch'].strip() else NAN
+                    )
                 except (ValueError, KeyError):
                     pass
             
@@ -110,79 +235,240 @@ def load_data_from_csv(csv_path='sample_dataset_kill_tick_info.csv'):
                 except (ValueError, KeyError):
                     pass
         
-        # 마지막 틱
-        if current_tick is not None and tick_data.get('players'):
-            positions.append({
-                'tick': current_tick,
-                'game_time': tick_data.get('game_time', 0),
-                'players': tick_data.get('players', [])
-            })
-    
-    # 메타데이터
-    game_times = [p['game_time'] for p in positions if p.get('game_time')]
-    ticks = [p['tick'] for p in positions if p.get('tick')]
-    
-    players = set()
-    for pos in positions:
-        for player in pos.get('players', []):
-            if player.get('name'):
-                players.add(player['name'])
-    
-    metadata = {
-        'total_ticks': len(positions),
-        'total_events': len(events),
-        'time_range': {
-            'min': min(game_times) if game_times else 0,
-            'max': max(game_times) if game_times else 0
-        },
-        'tick_range': {
-            'min': min(ticks) if ticks else 0,
-            'max': max(ticks) if ticks else 0
-        },
-        'players': sorted(list(players)),
-        'teams': ['CT', 'TERRORIST']
-    }
-    
-    _data_cache = {
-        'metadata': metadata,
-        'positions': positions,
-        'events': events
-    }
-    
-    print(f"로딩 완료! {len(positions)} 틱, {len(events)} 이벤트")
-    return _data_cache
+    timer.mark('parse')
+    ingest_rows.inc(idx + 1, 'app_direct')
+    # 마지막 틱까지 닫고 배열로 변환
+    store = builder.build()
+    timer.mark('tick_grouping')
+    return store, events
+
+def get_store(data):
+    """요청 파라미터(rate / lod / tolerance)에 맞는 저장소 (rate가 잘못되었으면 400)"""
+    store = select_store(data, request.args)
+    if store is None:
+        response = jsonify({'error': f'rate는 {MIN_RATE:g} 이상의 유한한 숫자여야 합니다.'})
+        response.status_code = 400
+        abort(response)
+    return store
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.route('/api/status')
+def get_status():
+    """데이터 로드 진행 상황 (로드 중에도 항상 200)"""
+    return jsonify({
+        'default': get_loader().status(),
+        'matches': catalog.loading_status()
+    })
+
+@app.route('/api/ready')
+def get_ready():
+    """기본 경기가 로드되어 요청을 받을 수 있으면 200, 아니면 503 (로드 시작)"""
+    loader = get_loader()
+    try:
+        loader.get()
+    except (StillLoading, LoadFailed) as e:
+        return _loading_response(e, loader.retry_after())
+    return jsonify({'ready': True, 'status': loader.status()})
+
+@app.route('/api/matches')
+def get_matches():
+    """경기 카탈로그 (MATCH_DIR의 경기 파일 목록과 로드 상태)"""
+    return jsonify({'matches': catalog.matches(), 'cache': catalog.stats()})
+
+@app.route('/api/live/status')
+def get_live_status():
+    """실시간 수집 상태 (LIVE_CSV 환경 변수로 지정한 기록 중인 CSV)"""
+    live = get_live_match()
+    return jsonify(live.status())
+
+@app.route('/api/live/stream')
+def get_live_stream():
+    """새로 닫힌 틱과 이벤트를 Server-Sent Events로 전송 (Last-Event-ID로 이어 받기)"""
+    live = get_live_match()
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    if last_event_id is None:
+        last_event_id = request.args.get('last_event_id', type=int)
+    response = Response(stream_with_context(live.stream(last_event_id)), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # 프록시(nginx 등)가 응답을 모아 두지 않도록
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/live/positions')
+def get_live_positions():
+    """지금까지 수집된 위치 데이터 (구간/페이지 파라미터 사용)"""
+    live = get_live_match()
+    return jsonify(positions_page(live.store(), request.args))
+
+@app.route('/api/live/events')
+def get_live_events():
+    """지금까지 수집된 이벤트"""
+    live = get_live_match()
+    return jsonify(list(live.events))
+
 @app.route('/api/data')
-def get_data():
-    """전체 시뮬레이션 데이터 반환"""
-    data = load_data_from_csv()
-    return jsonify(data)
+@app.route('/api/matches/<match_id>/data')
+def get_data(match_id=None):
+    """전체 시뮬레이션 데이터 반환 (구간 파라미터가 있으면 해당 구간만, lod/tolerance로 궤적 단순화, rate로 일정 간격 재샘플링)"""
+    data = get_match_data(match_id)
+    store = get_store(data)
+    if has_range_args(request.args):
+        produce = lambda: json_stream.iter_value_json(data_page(data, request.args, store))
+    else:
+        # 전체 응답은 틱 묶음 단위로 인코딩 (직렬화 문자열 전체를 만들지 않음)
+        produce = lambda: json_stream.iter_data_json(data['metadata'], store, data['events'])
+    return data['responses'].respond(produce)
 
 @app.route('/api/positions')
-def get_positions():
-    """플레이어 위치 데이터만 반환"""
-    data = load_data_from_csv()
-    return jsonify(data.get('positions', []))
+@app.route('/api/matches/<match_id>/positions')
+def get_positions(match_id=None):
+    """플레이어 위치 데이터만 반환 (구간 파라미터가 있으면 페이지 단위, lod/tolerance로 궤적 단순화, rate로 일정 간격 재샘플링)"""
+    data = get_match_data(match_id)
+    store = get_store(data)
+    if has_range_args(request.args):
+        produce = lambda: json_stream.iter_value_json(positions_page(store, request.args))
+    else:
+        produce = lambda: json_stream.iter_positions_array(store)
+    return data['responses'].respond(produce)
+
+@app.route('/api/positions.bin')
+@app.route('/api/matches/<match_id>/positions.bin')
+def get_positions_binary(match_id=None):
+    """플레이어 위치 데이터를 바이너리 프레임으로 반환 (항상 페이지 단위)"""
+    data = get_match_data(match_id)
+    body = binary_frames.encode_page(get_store(data), request.args)
+    return Response(body, mimetype=binary_frames.MIMETYPE)
 
 @app.route('/api/events')
-def get_events():
-    """이벤트 데이터만 반환"""
-    data = load_data_from_csv()
-    return jsonify(data.get('events', []))
+@app.route('/api/matches/<match_id>/events')
+def get_events(match_id=None):
+    """이벤트 데이터 반환 (조회 파라미터가 있으면 역색인으로 필터링 + 집계, los/wallbang은 시야 검사)"""
+    data = get_match_data(match_id)
+    if has_event_args(request.args):
+        if not valid_event_args(request.args):
+            return jsonify({'error': f'{", ".join(INT_PARAMS)}는 정수여야 합니다.'}), 400
+        sight = None
+        if has_sight_args(request.args):
+            sight = event_sight(data, request.args.get('map'))
+            if sight is None:
+                return jsonify({'error': '맵 지오메트리를 찾을 수 없습니다.'}), 404
+        produce = lambda: json_stream.iter_value_json(events_page(data['event_index'], request.args, sight))
+    else:
+        produce = lambda: json_stream.iter_value_json(with_ids(data.get('events', [])))
+    return data['responses'].respond(produce)
+
+@app.route('/api/events/<int:event_id>/context')
+@app.route('/api/matches/<match_id>/events/<int:event_id>/context')
+def get_event_context(event_id, match_id=None):
+    """킬 이벤트 전후 구간(positions, 공격자 조준, 주변 이벤트) 반환"""
+    data = get_match_data(match_id)
+    before, after = window_args(request.args)
+    if not 0 <= event_id < len(data['event_index'].events):
+        return jsonify({'error': f'이벤트 {event_id}를 찾을 수 없습니다.'}), 404
+    produce = lambda: json_stream.iter_value_json(context_window(data, event_id, before, after))
+    return data['responses'].respond(produce)
+
+@app.route('/api/rounds')
+@app.route('/api/matches/<match_id>/rounds')
+def get_rounds(match_id=None):
+    """라운드 목록 (틱 구간, 시작/끝 시간, 킬 수)"""
+    data = get_match_data(match_id)
+    return data['responses'].respond(lambda: json_stream.iter_value_json({'rounds': data['rounds'].rounds()}))
+
+@app.route('/api/rounds/<int:round_num>/positions')
+@app.route('/api/matches/<match_id>/rounds/<int:round_num>/positions')
+def get_round_positions(round_num, match_id=None):
+    """라운드 하나의 위치 데이터 (처음 요청 시 그 라운드 샤드만 로드, 구간 파라미터가 있으면 페이지 단위)"""
+    data = get_match_data(match_id)
+    shard = data['rounds'].get(round_num)
+    if shard is None:
+        return jsonify({'error': f'라운드 {round_num}를 찾을 수 없습니다.'}), 404
+    if has_range_args(request.args):
+        produce = lambda: json_stream.iter_value_json(positions_page(shard.store, request.args))
+    else:
+        produce = lambda: json_stream.iter_positions_array(shard.store)
+    return data['responses'].respond(produce)
+
+@app.route('/api/rounds/<int:round_num>/events')
+@app.route('/api/matches/<match_id>/rounds/<int:round_num>/events')
+def get_round_events(round_num, match_id=None):
+    """라운드 하나의 이벤트"""
+    data = get_match_data(match_id)
+    shard = data['rounds'].get(round_num)
+    if shard is None:
+        return jsonify({'error': f'라운드 {round_num}를 찾을 수 없습니다.'}), 404
+    return data['responses'].respond(lambda: json_stream.iter_value_json(shard.events))
+
+@app.route('/api/players/<player>/track')
+@app.route('/api/matches/<match_id>/players/<player>/track')
+def get_player_track(player, match_id=None):
+    """플레이어 한 명의 궤적 (틱 구간 + 페이지, 생존/사망 구간 포함)"""
+    data = get_match_data(match_id)
+    if data['store'].player_id(player) is None:
+        return jsonify({'error': f'플레이어 {player}를 찾을 수 없습니다.'}), 404
+    produce = lambda: json_stream.iter_value_json(data['tracks'].track(player, request.args))
+    return data['responses'].respond(produce)
+
+@app.route('/api/aim/<player>')
+@app.route('/api/matches/<match_id>/aim/<player>')
+def get_aim(player, match_id=None):
+    """플레이어 조준 궤적 점수 (직선도, 각속도, 이동 각도) 반환"""
+    data = get_match_data(match_id)
+    if data['store'].player_id(player) is None:
+        return jsonify({'error': f'플레이어 {player}를 찾을 수 없습니다.'}), 404
+    produce = lambda: json_stream.iter_value_json(aim_trace.aim_report(data, player, request.args))
+    return data['responses'].respond(produce)
+
+@app.route('/api/heatmap')
+@app.route('/api/matches/<match_id>/heatmap')
+def get_heatmap(match_id=None):
+    """격자 히트맵 (kind=occupancy|kills|deaths, round=쉼표 구분, team, player)"""
+    data = get_match_data(match_id)
+    query = heatmap_args(request.args)
+    if query is None:
+        return jsonify({'error': f'kind는 {", ".join(HEATMAP_KINDS)} 중 하나, '
+                                 f'round는 쉼표로 구분한 정수여야 합니다.'}), 400
+    produce = lambda: json_stream.iter_value_json(data['spatial'].heatmap_report(**query))
+    return data['responses'].respond(produce)
+
+@app.route('/api/nearby')
+@app.route('/api/matches/<match_id>/nearby')
+def get_nearby(match_id=None):
+    """틱 t(또는 start_tick~end_tick)에 점 (x, y[, z])에서 radius 안에 있던 플레이어"""
+    data = get_match_data(match_id)
+    result = nearby_query(data, request.args)
+    if result is None:
+        return jsonify({'error': 'x, y, radius 파라미터가 필요합니다.'}), 400
+    return jsonify(result)
+
+@app.route('/api/stats')
+@app.route('/api/matches/<match_id>/stats')
+def get_stats(match_id=None):
+    """킬/데스/헤드샷/무기/트레이드/오프닝/멀티킬 통계 (match=쉼표 구분, player, weapon)"""
+    if match_id is not None and match_id not in _stats_sources():
+        return jsonify({'error': f'경기 {match_id}를 찾을 수 없습니다.'}), 404
+    try:
+        result = stats_engine.stats(request.args, None if match_id is None else [match_id])
+    except (StillLoading, LoadFailed) as e:
+        return _loading_response(e, 2)
+    return jsonify(result)
 
 @app.route('/api/metadata')
-def get_metadata():
+@app.route('/api/matches/<match_id>/metadata')
+def get_metadata(match_id=None):
     """메타데이터만 반환"""
-    data = load_data_from_csv()
-    return jsonify(data.get('metadata', {}))
+    data = get_match_data(match_id)
+    return data['responses'].respond(lambda: json_stream.iter_value_json(data.get('metadata', {})))
 
 if __name__ == '__main__':
     print("서버 시작 중...")
     print("CSV 파일을 처음 로드할 때 시간이 걸릴 수 있습니다.")
+    # 디버그 리로더는 자식 프로세스에서 서버를 실행하므로 그쪽에서만 미리 로드
+    if os.environ.get('WARMUP', '1') != '0' and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        warm_up()
     app.run(debug=True, port=5000, threaded=True)
 
 
@@ -0,0 +1,138 @@
+"""
+백그라운드 단일 로드(single-flight) - 같은 데이터를 동시에 여러 번 읽지 않는다
+
+첫 요청이 몰리면 요청마다 CSV 전체를 파싱해 시작 직후 CPU/메모리가 몇 배로 뛰었다.
+BackgroundLoader는 로드를 스레드 하나에서 한 번만 실행하고, 다른 호출자는 그 결과를
+기다리거나(wait) 아직 로드 중이라는 StillLoading을 받아 곧바로 503을 응답한다.
+로드 함수는 progress(rows, bytes_read, total_bytes)로 진행 상황을 알려 줄 수 있다.
+"""
+import threading
+import time
+
+
+class StillLoading(Exception):
+    """로드가 진행 중 (status: BackgroundLoader.status())"""
+
+    def __init__(self, status):
+        super().__init__(status.get('name'))
+        self.status = status
+
+
+class LoadFailed(Exception):
+    """로드 실패 (다음 요청에서 다시 시도한다)"""
+
+    def __init__(self, status):
+        super().__init__(status.get('error'))
+        self.status = status
+
+
+class BackgroundLoader:
+    """load(progress)를 한 번만 실행하는 로더 (idle -> loading -> ready / error)"""
+
+    def __init__(self, load, name=None, total_bytes=None, on_ready=None):
+        self.load = load
+        self.name = name
+        self.on_ready = on_ready  # 로드가 끝나면 결과와 함께 호출
+        self.data = None
+        self.state = 'idle'
+        self.error = None
+        self.rows = 0
+        self.bytes_read = 0
+        self.total_bytes = total_bytes
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def start(self):
+        """로드가 시작되지 않았으면 백그라운드 스레드에서 시작"""
+        with self._lock:
+            if self.state in ('loading', 'ready'):
+                return
+            self.state = 'loading'
+            self.error = None
+            self.rows = self.bytes_read = 0
+            self.started, self.finished = time.time(), None
+            self._done.clear()
+        threading.Thread(target=self._run, name=f'load-{self.name}', daemon=True).start()
+
+    def _progress(self, rows, bytes_read=None, total_bytes=None):
+        self.rows = rows
+        if bytes_read is not None:
+            self.bytes_read = bytes_read
+        if total_bytes is not None:
+            self.total_bytes = total_bytes
+
+    def _run(self):
+        try:
+            data = self.load(self._progress)
+        except Exception as e:  # 로드 스레드의 예외는 상태로 전달
+            with self._lock:
+                self.state, self.error = 'error', f'{type(e).__name__}: {e}'
+                self.finished = time.time()
+            print(f"로드 실패 ({self.name}): {self.error}")
+        else:
+            with self._lock:
+                self.data, self.state = data, 'ready'
+                self.finished = time.time()
+            # 콜백이 실패해도 로드 결과는 그대로 쓴다 (로드 중 상태에 머물지 않도록 ready 이후에 호출)
+            if self.on_ready is not None:
+                try:
+                    self.on_ready(data)
+                except Exception as e:
+                    print(f"로드 완료 콜백 실패 ({self.name}): {type(e).__name__}: {e}")
+        finally:
+            self._done.set()
+
+    def get(self):
+        """로드된 데이터 반환, 아직이면 로드를 시작하고 StillLoading / 실패했으면 LoadFailed"""
+        if self.state == 'ready':
+            return self.data
+        if self.state == 'error':
+            status = self.status()
+            with self._lock:
+                self.state = 'idle'
+            raise LoadFailed(status)
+        self.start()
+        if self.state == 'ready':
+            return self.data
+        raise StillLoading(self.status())
+
+    def wait(self, timeout=None):
+        """로드가 끝날 때까지 기다려 데이터 반환 (실패하면 LoadFailed)"""
+        self.start()
+        self._done.wait(timeout)
+        if self.state == 'ready':
+            return self.data
+        if self.state == 'error':
+            return self.get()
+        raise StillLoading(self.status())
+
+    def status(self):
+        """진행 상황 (progress는 바이트 기준 0~1, 전체 크기를 모르면 None)"""
+        now = time.time()
+        elapsed = ((self.finished or now) - self.started) if self.started else None
+        progress = None
+        if self.state == 'ready':
+            progress = 1.0
+        elif self.total_bytes:
+            progress = round(min(self.bytes_read / self.total_bytes, 1.0), 4)
+        return {
+            'name': self.name,
+            'state': self.state,
+            'rows': self.rows,
+            'bytes_read': self.bytes_read,
+            'total_bytes': self.total_bytes,
+            'progress': progress,
+            'elapsed': round(elapsed, 3) if elapsed is not None else None,
+            'error': self.error
+        }
+
+    def retry_after(self, default=2, maximum=30):
+        """남은 예상 시간(초)으로 Retry-After 값 계산"""
+        status = self.status()
+        progress, elapsed = status['progress'], status['elapsed']
+        if not progress or not elapsed:
+            return default
+        remaining = elapsed * (1 - progress) / progress
+        return int(min(max(remaining, 1), maximum))
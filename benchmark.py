@@ -0,0 +1,259 @@
+"""
+처리기 / API 벤치마크 - 합성 CSV(synth_match.py) 크기별로 각 처리기와 엔드포인트를 측정
+
+측정 항목마다 새 파이썬 프로세스에서 실행해 최대 메모리(peak RSS)가 서로 섞이지 않게 하고,
+결과는 비교용 JSON으로 저장한다. --baseline으로 이전 결과를 주면 같은 항목의 시간을
+비교해 threshold 배 이상 느려진 항목을 회귀로 표시하고 종료 코드 1을 반환한다.
+
+    simple_processor   simple_processor.process_csv_to_json (csv 모듈, dict 목록)
+    fast_processor     fast_processor.process_csv_to_json (TickStore, 스트리밍 JSON 저장)
+    data_processor     data_processor.DataProcessor.save_json (pandas)
+    app_direct         app_direct 경기 로드 (store_cache는 빈 디렉터리에서 시작)
+                       --endpoints면 같은 프로세스에서 API 엔드포인트 응답 시간도 측정
+
+    python benchmark.py --rows 100000,1000000 --endpoints --output benchmark_results.json
+    python benchmark.py --rows 100000 --baseline benchmark_results.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+try:
+    import psutil
+except ImportError:  # 선택 의존성
+    psutil = None
+
+PROCESSORS = ('simple_processor', 'fast_processor', 'data_processor', 'app_direct')
+# app_direct 로드 후 측정하는 엔드포인트 (경기 카탈로그 경로 기준)
+ENDPOINTS = (
+    'metadata',
+    'events',
+    'events?los=true&map=Anubis',
+    'positions?offset=0&limit=1000',
+    'positions.bin?offset=0&limit=1000',
+    'data?lod=6',
+    'heatmap',
+    'heatmap?kind=kills',
+    'aim/Player1',
+    'nearby?tick=1000&x=0&y=0&radius=500',
+)
+# 엔드포인트마다 첫 요청 뒤 반복 횟수 (중앙값을 warm 시간으로)
+ENDPOINT_REPEAT = 5
+DEFAULT_TIMEOUT = 1800
+
+
+def _peak_rss_mb():
+    """이 프로세스의 최대 RSS (MB), 알 수 없으면 None
+
+    ru_maxrss는 Linux는 KB 단위 / macOS는 바이트 단위. resource가 없으면(Windows)
+    psutil의 peak working set을 쓴다.
+    """
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    if psutil is not None:
+        peak = getattr(psutil.Process().memory_info(), 'peak_wset', None)
+        if peak is not None:
+            return round(peak / (1024 * 1024), 1)
+    return None
+
+
+def _measure_endpoints(app_direct, match_id):
+    client = app_direct.app.test_client()
+    results = []
+    for endpoint in ENDPOINTS:
+        url = f'/api/matches/{match_id}/{endpoint}'
+        started = time.perf_counter()
+        response = client.get(url)
+        size = len(response.get_data())
+        cold = time.perf_counter() - started
+        warm = []
+        for _ in range(ENDPOINT_REPEAT):
+            started = time.perf_counter()
+            client.get(url).get_data()
+            warm.append(time.perf_counter() - started)
+        warm.sort()
+        results.append({
+            'endpoint': url,
+            'status': response.status_code,
+            'bytes': size,
+            'cold_ms': round(cold * 1000, 2),
+            'warm_ms': round(warm[len(warm) // 2] * 1000, 3)
+        })
+    return results
+
+
+def run_task(task, csv_path, workdir, endpoints=False):
+    """측정 항목 하나 실행 (자식 프로세스 안에서 호출) -> 결과 dict"""
+    output = os.path.join(workdir, f'{task}.json')
+    result = {'task': task}
+    log = io.StringIO()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(log):
+        if task == 'simple_processor':
+            import simple_processor
+            simple_processor.process_csv_to_json(csv_path, output)
+        elif task == 'fast_processor':
+            import fast_processor
+            fast_processor.process_csv_to_json(csv_path, output)
+        elif task == 'data_processor':
+            from data_processor import DataProcessor
+            DataProcessor(csv_path).save_json(output)
+        elif task == 'app_direct':
+            # 전처리 캐시와 경기 목록을 임시 디렉터리로 (처음 로드 그대로 측정)
+            os.environ['STORE_CACHE_DIR'] = os.path.join(workdir, 'store_cache')
+            os.environ['MATCH_DIR'] = os.path.dirname(os.path.abspath(csv_path))
+            import app_direct
+            match_id = os.path.splitext(os.path.basename(csv_path))[0]
+            data = app_direct.catalog.get(match_id)
+            output = None
+            result['memory_bytes'] = int(data['store'].nbytes)
+        else:
+            raise ValueError(f'알 수 없는 항목: {task}')
+    result['wall_seconds'] = round(time.perf_counter() - started, 3)
+    result['peak_rss_mb'] = _peak_rss_mb()
+    result['output_bytes'] = os.path.getsize(output) if output else None
+    if task == 'app_direct' and endpoints:
+        with contextlib.redirect_stdout(log):
+            result['endpoints'] = _measure_endpoints(app_direct, match_id)
+        result['peak_rss_mb_after_endpoints'] = _peak_rss_mb()
+    return result
+
+
+def _spawn(task, csv_path, endpoints, timeout):
+    """측정 항목을 새 프로세스에서 실행하고 결과 dict 반환 (실패/시간 초과도 결과로)"""
+    with tempfile.TemporaryDirectory(prefix='bench_') as workdir:
+        result_path = os.path.join(workdir, 'result.json')
+        command = [sys.executable, os.path.abspath(__file__), '--task', task, '--csv', os.path.abspath(csv_path),
+                   '--workdir', workdir, '--result', result_path]
+        if endpoints:
+            command.append('--endpoints')
+        try:
+            proc = subprocess.run(command, capture_output=True, text=True, timeout=timeout,
+                                  cwd=os.path.dirname(os.path.abspath(__file__)))
+        except subprocess.TimeoutExpired:
+            return {'task': task, 'error': f'timeout ({timeout}s)'}
+        if proc.returncode != 0 or not os.path.exists(result_path):
+            return {'task': task, 'error': (proc.stderr.strip().splitlines() or ['실패'])[-1]}
+        with open(result_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+
+def _dataset(data_dir, rows, players, seed):
+    """크기별 합성 CSV 경로 (이미 있으면 다시 만들지 않음)"""
+    import synth_match
+    path = os.path.join(data_dir, f'synthetic_{rows}_{players}p_s{seed}.csv')
+    if not os.path.exists(path):
+        print(f"합성 CSV 생성 중: {path}")
+        synth_match.generate(path, players=players, ticks=max(1, rows // players), seed=seed)
+    return path
+
+
+def _entries(report):
+    """비교 키 -> 비교할 시간 값 (처리기는 wall_seconds, 엔드포인트는 warm_ms)"""
+    entries = {}
+    for result in report.get('results', []):
+        if result.get('wall_seconds') is not None:
+            entries[(result['task'], result['rows'], None)] = result['wall_seconds']
+        for endpoint in result.get('endpoints', []):
+            entries[(result['task'], result['rows'], endpoint['endpoint'].split('/', 4)[-1])] = endpoint['warm_ms']
+    return entries
+
+
+def compare(report, baseline, threshold):
+    """baseline 대비 threshold 배 이상 느려진 항목 목록"""
+    current, previous = _entries(report), _entries(baseline)
+    regressions = []
+    for key, value in sorted(current.items(), key=str):
+        old = previous.get(key)
+        if old:
+            ratio = value / old
+            if ratio >= threshold:
+                task, rows, endpoint = key
+                regressions.append({'task': task, 'rows': rows, 'endpoint': endpoint,
+                                    'baseline': old, 'current': value, 'ratio': round(ratio, 2)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='처리기 / API 엔드포인트 벤치마크 (합성 CSV)')
+    parser.add_argument('--rows', default='100000', help='쉼표로 구분한 CSV 행 수 목록')
+    parser.add_argument('--players', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--processors', default=','.join(PROCESSORS), help='쉼표로 구분한 측정 항목')
+    parser.add_argument('--endpoints', action='store_true', help='app_direct 로드 후 엔드포인트도 측정')
+    parser.add_argument('--data-dir', default='bench_data', help='합성 CSV를 둘 디렉터리')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help='비교할 이전 결과 JSON')
+    parser.add_argument('--threshold', type=float, default=1.25, help='회귀로 볼 시간 배수')
+    parser.add_argument('--timeout', type=int, default=DEFAULT_TIMEOUT, help='항목별 제한 시간 (초)')
+    # 자식 프로세스용
+    parser.add_argument('--task', help=argparse.SUPPRESS)
+    parser.add_argument('--csv', help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.task:
+        result = run_task(args.task, args.csv, args.workdir, args.endpoints)
+        with open(args.result, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        return
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    tasks = [task.strip() for task in args.processors.split(',') if task.strip()]
+    results = []
+    for rows in (int(n) for n in args.rows.split(',')):
+        csv_path = _dataset(args.data_dir, rows, args.players, args.seed)
+        csv_bytes = os.path.getsize(csv_path)
+        for task in tasks:
+            print(f"[{rows}줄] {task} 측정 중...")
+            result = _spawn(task, csv_path, args.endpoints, args.timeout)
+            result.update({'rows': rows, 'csv_bytes': csv_bytes})
+            if result.get('wall_seconds'):
+                result['rows_per_second'] = round(rows / result['wall_seconds'])
+                print(f"  {result['wall_seconds']}초, {result['rows_per_second']}줄/초, "
+                      f"peak RSS {result['peak_rss_mb'] if result['peak_rss_mb'] is not None else '-'}MB")
+            else:
+                print(f"  실패: {result.get('error')}")
+            for endpoint in result.get('endpoints', []):
+                print(f"  {endpoint['endpoint']}: {endpoint['status']}, cold {endpoint['cold_ms']}ms, "
+                      f"warm {endpoint['warm_ms']}ms, {endpoint['bytes']}B")
+            results.append(result)
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': {'players': args.players, 'seed': args.seed, 'endpoints': args.endpoints},
+        'results': results
+    }
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            report['regressions'] = compare(report, json.load(f), args.threshold)
+        for item in report['regressions']:
+            print(f"회귀: {item['task']} {item['endpoint'] or ''} ({item['rows']}줄) "
+                  f"{item['baseline']} -> {item['current']} ({item['ratio']}배)")
+        exit_code = 1 if report['regressions'] else 0
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"결과 저장: {args.output}")
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+바이너리 프레임 인코더 - positions를 JSON 대신 little-endian 배열로 전송
+
+응답 구조 (모든 정수는 little-endian):
+
+    0   4바이트  매직 b'CSF1'
+    4   uint32   헤더(JSON, UTF-8) 길이
+    8   헤더     플레이어/팀 테이블, 틱 수, 섹션 목록
+    --  8바이트 경계까지 0으로 채움 (여기부터 본문)
+    본문 섹션   헤더의 sections[*].offset(본문 시작 기준)에 차례로 위치, 각 8바이트 정렬
+
+섹션은 TickStore 배열을 그대로 내려보낸 것이라 행마다 파이썬 객체를 만들지 않고,
+브라우저는 ArrayBuffer 위에 TypedArray를 바로 씌워 읽을 수 있다.
+"""
+import json
+import struct
+
+import numpy as np
+
+from api_query import page_bounds, page_info, parse_range_args
+
+MAGIC = b'CSF1'
+FORMAT_VERSION = 1
+ALIGN = 8
+MIMETYPE = 'application/octet-stream'
+
+
+def _pad(length):
+    return (-length) % ALIGN
+
+
+def frame_sections(store, start, stop):
+    """틱 인덱스 구간 [start, stop)의 섹션 배열 목록 (이름, little-endian 배열)"""
+    row_start, row_stop = store.row_range(start, stop)
+    return [
+        ('tick', store.tick_values[start:stop].astype('<i4')),
+        ('game_time', store.tick_times[start:stop].astype('<f8')),
+        ('player_count', np.diff(store.tick_offsets[start:stop + 1]).astype('<u2')),
+        ('player', store.player_ids[row_start:row_stop].astype('<u2')),
+        ('team', store.team_ids[row_start:row_stop].astype('<u2')),
+        ('round', store.rounds[row_start:row_stop].astype('<u2')),
+        ('health', store.health[row_start:row_stop].astype('<f4', copy=False)),
+        ('position', store.position[row_start:row_stop].astype('<f4', copy=False)),
+        ('yaw', store.yaw[row_start:row_stop].astype('<f4', copy=False)),
+        ('pitch', store.pitch[row_start:row_stop].astype('<f4', copy=False)),
+    ]
+
+
+def encode_frames(store, start=0, stop=None, page=None):
+    """틱 인덱스 구간을 바이너리 프레임 응답(bytes)으로 인코딩"""
+    if stop is None:
+        stop = store.n_ticks
+    sections = frame_sections(store, start, stop)
+
+    layout = []
+    offset = 0
+    for name, arr in sections:
+        layout.append({
+            'name': name,
+            'dtype': arr.dtype.str,
+            'offset': offset,
+            'length': int(arr.size)
+        })
+        offset += arr.nbytes + _pad(arr.nbytes)
+
+    row_start, row_stop = store.row_range(start, stop)
+    header = {
+        'version': FORMAT_VERSION,
+        'tick_count': stop - start,
+        'row_count': row_stop - row_start,
+        'position_stride': 3,  # 행마다 float32 3개 (X, Z, Y)
+        'players': store.players,
+        'teams': store.teams,
+        'sections': layout
+    }
+    if page is not None:
+        header['page'] = page
+    header_bytes = json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    prefix_len = len(MAGIC) + 4 + len(header_bytes)
+    chunks = [MAGIC, struct.pack('<I', len(header_bytes)), header_bytes, b'\0' * _pad(prefix_len)]
+    for _, arr in sections:
+        # 배열 버퍼를 그대로 이어 붙인다 (행 단위 변환 없음)
+        chunks.append(memoryview(np.ascontiguousarray(arr)).cast('B'))
+        chunks.append(b'\0' * _pad(arr.nbytes))
+    return b''.join(chunks)
+
+
+def encode_page(store, args):
+    """요청 파라미터(구간/페이지)에 맞는 틱만 인코딩"""
+    lo, hi, start, stop = page_bounds(store, parse_range_args(args))
+    return encode_frames(store, start, stop, page_info(lo, hi, start, stop))
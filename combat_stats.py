@@ -0,0 +1,276 @@
+"""
+전투 통계 - 킬 이벤트로 경기별 부분 집계를 만들고 여러 경기를 합산
+
+경기 하나의 이벤트(tick 순)와 이벤트별 라운드 번호로 부분 집계를 만든다. 부분 집계는
+숫자는 더하고 경기 id 목록은 합치는 방식으로 병합하므로 결합 법칙이 성립하고, 새 경기가
+추가되면 지금까지의 합계에 그 경기의 부분 집계만 더하면 된다(이전 경기 이벤트를 다시 읽지
+않음). 부분 집계는 경기 로드가 끝날 때 계산해 store_cache 디렉터리에 stats.json으로
+저장하므로, /api/stats는 저장된 부분 집계만 읽고 서버를 다시 시작해도 경기를 로드하지 않는다.
+아직 집계가 없는 경기는 백그라운드 로드를 시작하고 503 + Retry-After로 응답한다.
+
+    kills, deaths, headshots      킬 / 데스 / 헤드샷 킬 수 (kd, headshot_pct는 응답 시 계산)
+    trade_kills, traded_deaths    같은 팀원을 죽인 상대를 TRADE_TICKS 틱 안에 죽인 킬 / 그렇게 복수된 데스
+    opening_kills, opening_deaths 라운드 첫 킬 / 첫 데스
+    multi_kills                   한 라운드에 2/3/4/5킬 이상을 한 라운드 수 ('2'..'5')
+    weapons                       무기별 kills / headshots / deaths
+
+    /api/stats?match=m1,m2&player=이름&weapon=ak47
+"""
+import os
+import threading
+
+import store_cache
+
+# 트레이드로 보는 최대 간격 (틱, 64틱 기준 5초)
+TRADE_TICKS = int(os.environ.get('STATS_TRADE_TICKS', 320))
+# 멀티킬 구간 (이 값 이상은 마지막 구간에 센다)
+MAX_MULTI_KILL = 5
+# 부분 집계 형식이 바뀌면 올린다 (이전 stats.json은 다시 계산)
+STATS_VERSION = 1
+STATS_FILE = 'stats.json'
+
+PLAYER_COUNTERS = ('kills', 'deaths', 'headshots', 'trade_kills', 'traded_deaths',
+                   'opening_kills', 'opening_deaths')
+
+
+def _player(players, name):
+    entry = players.get(name)
+    if entry is None:
+        entry = players[name] = dict.fromkeys(PLAYER_COUNTERS, 0)
+        entry['multi_kills'] = {}
+        entry['weapons'] = {}
+    return entry
+
+
+def _weapon(weapons, name):
+    entry = weapons.get(name)
+    if entry is None:
+        entry = weapons[name] = {'kills': 0, 'headshots': 0, 'deaths': 0}
+    return entry
+
+
+def match_stats(match_id, events, rounds, trade_ticks=TRADE_TICKS):
+    """경기 하나의 부분 집계 (events는 tick 순, rounds는 이벤트마다의 라운드 번호 또는 None)"""
+    players = {}
+    weapons = {}
+    round_kills = {}      # (라운드, 공격자) -> 킬 수
+    opened = set()        # 첫 킬이 나온 라운드
+    recent = []           # 트레이드 후보: [tick, round, 공격자, 피해자, 피해자 팀, 복수 여부]
+
+    for event, round_num in zip(events, rounds):
+        attacker = event.get('attacker') or {}
+        victim = event.get('victim') or {}
+        killer, killer_team = attacker.get('name'), attacker.get('team')
+        dead, dead_team = victim.get('name'), victim.get('team')
+        weapon = event.get('weapon') or 'unknown'
+        headshot = bool(event.get('headshot'))
+        tick = event['tick']
+
+        weapon_total = _weapon(weapons, weapon)
+        if killer:
+            entry = _player(players, killer)
+            entry['kills'] += 1
+            weapon_total['kills'] += 1
+            per_weapon = _weapon(entry['weapons'], weapon)
+            per_weapon['kills'] += 1
+            if headshot:
+                entry['headshots'] += 1
+                weapon_total['headshots'] += 1
+                per_weapon['headshots'] += 1
+            if round_num is not None:
+                round_kills[(round_num, killer)] = round_kills.get((round_num, killer), 0) + 1
+        if dead:
+            entry = _player(players, dead)
+            entry['deaths'] += 1
+            weapon_total['deaths'] += 1
+            _weapon(entry['weapons'], weapon)['deaths'] += 1
+
+        if round_num is not None and round_num not in opened and killer and dead:
+            opened.add(round_num)
+            _player(players, killer)['opening_kills'] += 1
+            _player(players, dead)['opening_deaths'] += 1
+
+        # 트레이드: 방금 죽은 사람이 TRADE_TICKS 안에 이 공격자의 팀원을 죽였는지
+        recent = [item for item in recent if tick - item[0] <= trade_ticks]
+        if killer and dead:
+            for item in reversed(recent):
+                _, item_round, item_killer, item_dead, item_dead_team, traded = item
+                if (not traded and item_killer == dead and item_round == round_num
+                        and item_dead != killer and (killer_team is None or item_dead_team == killer_team)):
+                    item[5] = True
+                    _player(players, killer)['trade_kills'] += 1
+                    _player(players, item_dead)['traded_deaths'] += 1
+                    break
+            recent.append([tick, round_num, killer, dead, dead_team, False])
+
+    for (_, killer), count in round_kills.items():
+        if count >= 2:
+            key = str(min(count, MAX_MULTI_KILL))
+            multi = players[killer]['multi_kills']
+            multi[key] = multi.get(key, 0) + 1
+
+    return {
+        'matches': [match_id],
+        'rounds': len({r for r in rounds if r is not None}),
+        'events': len(events),
+        'players': players,
+        'weapons': weapons
+    }
+
+
+def _merge_into(target, source):
+    for key, value in source.items():
+        if isinstance(value, dict):
+            _merge_into(target.setdefault(key, {}), value)
+        elif isinstance(value, list):
+            items = target.setdefault(key, [])
+            items.extend(v for v in value if v not in items)
+        else:
+            target[key] = target.get(key, 0) + value
+    return target
+
+
+def merge(*partials):
+    """부분 집계 병합 (숫자는 합, 경기 id는 합집합) - 입력은 바꾸지 않는다"""
+    result = empty()
+    for partial in partials:
+        _merge_into(result, partial)
+    return result
+
+
+def empty():
+    return {'matches': [], 'rounds': 0, 'events': 0, 'players': {}, 'weapons': {}}
+
+
+def _ratios(entry, kd=False):
+    """응답용 비율 추가 (kd는 데스가 없으면 킬 수 그대로)"""
+    kills = entry.get('kills', 0)
+    result = dict(entry)
+    if kd:
+        deaths = entry.get('deaths', 0)
+        result['kd'] = round(kills / deaths, 3) if deaths else float(kills)
+    result['headshot_pct'] = round(100.0 * entry.get('headshots', 0) / kills, 1) if kills else 0.0
+    return result
+
+
+def report(partial, player=None, weapon=None, trade_ticks=TRADE_TICKS):
+    """/api/stats 응답 (player / weapon이 있으면 해당 항목만)"""
+    players = partial['players']
+    if player is not None:
+        players = {player: players[player]} if player in players else {}
+    weapons = partial['weapons']
+    if weapon is not None:
+        # 무기를 지정하면 플레이어 항목은 그 무기의 킬/헤드샷/데스만
+        players = {name: _ratios(entry['weapons'][weapon])
+                   for name, entry in players.items() if weapon in entry['weapons']}
+        weapons = {weapon: weapons[weapon]} if weapon in weapons else {}
+    else:
+        players = {
+            name: dict(_ratios(entry, kd=True), weapons={w: _ratios(v) for w, v in sorted(entry['weapons'].items())})
+            for name, entry in players.items()
+        }
+    return {
+        'matches': partial['matches'],
+        'rounds': partial['rounds'],
+        'events': partial['events'],
+        'trade_ticks': trade_ticks,
+        'players': dict(sorted(players.items())),
+        'weapons': {name: _ratios(entry) for name, entry in sorted(weapons.items())}
+    }
+
+
+class StatsEngine:
+    """경기별 부분 집계 보관 + 전체 합계를 경기가 추가될 때마다 이어서 갱신
+
+    sources(): 경기 id -> 원본 파일 경로
+    load(경기 id): 로드된 경기 데이터 사전을 바로 반환하고, 아직이면 백그라운드 로드를 시작한 뒤
+    StillLoading을 던진다 (기다리지 않음). 부분 집계는 경기 로드가 끝날 때 로더의 완료 콜백이
+    record()로 계산해 저장하므로, 요청은 저장된 부분 집계만 읽는다.
+    """
+
+    def __init__(self, sources, load, trade_ticks=TRADE_TICKS):
+        self.sources = sources
+        self.load = load
+        self.trade_ticks = trade_ticks
+        self._partials = {}     # 경기 id -> (원본 파일 정보, 부분 집계)
+        self._total = empty()
+        self._total_parts = {}  # 합계에 들어간 경기 id -> 부분 집계
+        self._lock = threading.Lock()
+
+    def record(self, match_id, path, data):
+        """로드된 경기의 부분 집계를 계산해 저장 (경기 로드 완료 콜백에서 호출, 예외를 던지지 않는다)"""
+        try:
+            info = store_cache.source_info(path)
+            partial = match_stats(match_id, data['events'], data['event_index'].rounds, self.trade_ticks)
+        except Exception as e:  # 로드 스레드에서 호출되므로 실패해도 로드 결과는 그대로 둔다
+            print(f"통계 계산 실패 ({match_id}): {type(e).__name__}: {e}")
+            return None
+        store_cache.save_extra(path, STATS_FILE, {'version': STATS_VERSION, 'trade_ticks': self.trade_ticks,
+                                                  'stats': partial})
+        with self._lock:
+            self._partials[match_id] = (info, partial)
+        return partial
+
+    def _saved(self, match_id, path):
+        """저장된 부분 집계 (없거나 형식/trade_ticks가 다르면 None)"""
+        saved = store_cache.load_extra(path, STATS_FILE)
+        if saved is None or saved.get('version') != STATS_VERSION or saved.get('trade_ticks') != self.trade_ticks:
+            return None
+        partial = saved['stats']
+        partial['matches'] = [match_id]
+        return partial
+
+    def partials(self, match_ids=None):
+        """경기 id -> 부분 집계, match_ids가 없으면 전체 경기
+
+        저장된 부분 집계가 없는 경기는 로드를 시작하고 StillLoading을 던진다. 메모리를 아끼려고
+        한 번에 한 경기만 로드하며, 다음 요청이 그다음 경기를 이어서 로드한다.
+        """
+        sources = self.sources()
+        ids = list(sources) if match_ids is None else [m for m in match_ids if m in sources]
+        result = {}
+        for match_id in ids:
+            path = sources[match_id]
+            try:
+                info = store_cache.source_info(path)
+            except OSError:
+                continue
+            with self._lock:
+                cached = self._partials.get(match_id)
+            if cached is not None and cached[0] == info:
+                result[match_id] = cached[1]
+                continue
+            partial = self._saved(match_id, path)
+            if partial is None:
+                data = self.load(match_id)
+                if data is None:
+                    continue
+                partial = self.record(match_id, path, data)
+                if partial is None:
+                    continue
+            with self._lock:
+                self._partials[match_id] = (info, partial)
+            result[match_id] = partial
+        return result
+
+    def total(self):
+        """전체 경기 합계 (새 경기는 부분 집계만 더하고, 빠지거나 바뀐 경기가 있으면 부분 집계로 다시 합산)"""
+        partials = self.partials()
+        with self._lock:
+            if any(partials.get(match_id) is not partial for match_id, partial in self._total_parts.items()):
+                self._total, self._total_parts = empty(), {}
+            for match_id, partial in partials.items():
+                if match_id not in self._total_parts:
+                    _merge_into(self._total, partial)
+                    self._total_parts[match_id] = partial
+            return merge(self._total)
+
+    def stats(self, args, match_ids=None):
+        """request.args(match, player, weapon)에 맞는 /api/stats 응답 (match_ids가 있으면 match 대신)"""
+        if match_ids is None and args.get('match'):
+            match_ids = [m.strip() for m in args.get('match').split(',') if m.strip()]
+        if match_ids is not None:
+            partial = merge(*self.partials(match_ids).values())
+        else:
+            partial = self.total()
+        return report(partial, args.get('player'), args.get('weapon'), self.trade_ticks)
@@ -1,121 +1,163 @@
 """
 CSV 데이터를 처리하여 3D 시뮬레이션에 필요한 형태로 변환
+
+필터링, 형 변환, X/Z/Y 축 교환, 틱별 묶기는 모두 컬럼 단위(NumPy/pandas)로 처리하고
+마지막 dict 조립만 파이썬에서 한다. 틱은 파일 순서대로 연속된 같은 tick 행이 하나의
+묶음이며(경계를 미리 계산), 결과는 행 단위로 처리하던 이전 구현과 같다.
 """
+import gc
 import pandas as pd
+import numpy as np
 import json
 from typing import Dict, List, Tuple
 
+from metrics import ingest_rows, stage
+
+# 읽을 컬럼과 형식 (없는 컬럼은 건너뛰고 빈 값으로 취급)
+FLOAT_COLUMNS = ('game_time', 'round', 'X', 'Y', 'Z', 'health',
+                 'attacker_X', 'attacker_Y', 'attacker_Z', 'attacker_yaw', 'attacker_pitch', 'attacker_health',
+                 'victim_X', 'victim_Y', 'victim_Z', 'victim_health')
+STRING_COLUMNS = ('name', 'team_name', 'event', 'attacker_name', 'attacker_team_name',
+                  'victim_name', 'victim_team_name', 'weapon', 'headshot')
+DTYPES = {'tick': 'int64', **{c: 'float64' for c in FLOAT_COLUMNS}, **{c: 'object' for c in STRING_COLUMNS}}
+# pandas가 불리언으로 읽던 거짓 값 (headshot)
+FALSE_VALUES = ('false', '0', '0.0')
+
+
+def _optional(series: pd.Series, convert=None) -> List:
+    """빈 값은 None, 나머지는 파이썬 값(convert 적용) 목록"""
+    values = series.astype(object).where(series.notna(), None).tolist()
+    if convert is None:
+        return values
+    return [convert(v) if v is not None else None for v in values]
+
+
 class DataProcessor:
     def __init__(self, csv_path: str):
-        self.df = pd.read_csv(csv_path)
+        with stage('data_processor', 'read'):
+            self.df = pd.read_csv(csv_path, usecols=lambda c: c in DTYPES, dtype=DTYPES)
+        ingest_rows.inc(len(self.df), 'data_processor')
+        for column in DTYPES:
+            if column not in self.df:
+                self.df[column] = pd.Series(np.nan, index=self.df.index, dtype=DTYPES[column])
         self.processed_data = None
-        
-    def process(self) -> Dict:
-        """데이터를 처리하여 JSON 형태로 반환"""
-        # 킬 이벤트가 있는 행만 필터링
-        kill_events = self.df[self.df['event'].notna()].copy()
-        
-        # 플레이어 위치 데이터 (모든 틱)
-        player_positions = []
-        current_tick = None
-        tick_data = {}
-        
-        for _, row in self.df.iterrows():
-            tick = int(row['tick'])
-            game_time = float(row['game_time'])
-            
-            if current_tick != tick:
-                if current_tick is not None:
-                    player_positions.append({
-                        'tick': current_tick,
-                        'game_time': tick_data.get('game_time', 0),
-                        'players': tick_data.get('players', [])
-                    })
-                current_tick = tick
-                tick_data = {
-                    'game_time': game_time,
-                    'players': []
-                }
-            
-            # 플레이어 정보 추가
-            if pd.notna(row['X']) and pd.notna(row['Y']) and pd.notna(row['Z']):
-                player_info = {
-                    'name': str(row['name']),
-                    'team': str(row['team_name']),
-                    'position': [float(row['X']), float(row['Z']), float(row['Y'])],  # X, Y, Z를 3D 좌표로 (Y는 높이)
-                    'health': float(row['health']) if pd.notna(row['health']) else 100.0,
-                    'round': int(row['round']) if pd.notna(row['round']) else 1
-                }
-                tick_data['players'].append(player_info)
-        
-        # 마지막 틱 추가
-        if current_tick is not None:
-            player_positions.append({
-                'tick': current_tick,
-                'game_time': tick_data.get('game_time', 0),
-                'players': tick_data.get('players', [])
-            })
-        
-        # 킬 이벤트 처리
-        events = []
-        for _, row in kill_events.iterrows():
-            event = {
-                'tick': int(row['tick']),
-                'game_time': float(row['game_time']),
-                'event_type': str(row['event']),
+
+    def _tick_runs(self) -> Tuple[np.ndarray, np.ndarray]:
+        """연속된 같은 tick 행 묶음의 시작 행 번호와 행마다의 묶음 번호"""
+        ticks = self.df['tick'].to_numpy()
+        changed = np.ones(len(ticks), dtype=bool)
+        changed[1:] = ticks[1:] != ticks[:-1]
+        return np.flatnonzero(changed), np.cumsum(changed) - 1
+
+    def _positions(self) -> List[Dict]:
+        df = self.df
+        starts, run_id = self._tick_runs()
+
+        # 위치가 있는 행만 플레이어 정보로 (X, Y, Z를 3D 좌표로, Y는 높이)
+        valid = (df['X'].notna() & df['Y'].notna() & df['Z'].notna()).to_numpy()
+        players = df[valid]
+        names = [str(v) for v in players['name'].tolist()]
+        teams = [str(v) for v in players['team_name'].tolist()]
+        positions = players[['X', 'Z', 'Y']].to_numpy(dtype=np.float64).tolist()
+        health = players['health'].fillna(100.0).to_numpy(dtype=np.float64).tolist()
+        rounds = players['round'].fillna(1).to_numpy(dtype=np.float64).astype(np.int64).tolist()
+        infos = [
+            {'name': name, 'team': team, 'position': position, 'health': hp, 'round': round_num}
+            for name, team, position, hp, round_num in zip(names, teams, positions, health, rounds)
+        ]
+
+        # 틱 묶음별 플레이어 범위 (위치가 있는 행만 센다)
+        counts = np.bincount(run_id[valid], minlength=len(starts))
+        offsets = np.concatenate(([0], np.cumsum(counts))).tolist()
+        tick_values = df['tick'].to_numpy()[starts].tolist()
+        game_times = df['game_time'].to_numpy()[starts].tolist()
+        return [
+            {'tick': tick, 'game_time': game_time, 'players': infos[offsets[i]:offsets[i + 1]]}
+            for i, (tick, game_time) in enumerate(zip(tick_values, game_times))
+        ]
+
+    def _events(self) -> List[Dict]:
+        kill_events = self.df[self.df['event'].notna()]
+        column = lambda name, convert=None: _optional(kill_events[name], convert)
+        position = lambda prefix: zip(column(f'{prefix}_X'), column(f'{prefix}_Z'), column(f'{prefix}_Y'))
+
+        headshot = kill_events['headshot']
+        headshots = (headshot.notna() & ~headshot.astype(str).str.lower().isin(FALSE_VALUES)).tolist()
+
+        return [
+            {
+                'tick': tick,
+                'game_time': game_time,
+                'event_type': event_type,
                 'attacker': {
-                    'name': str(row['attacker_name']) if pd.notna(row['attacker_name']) else None,
-                    'team': str(row['attacker_team_name']) if pd.notna(row['attacker_team_name']) else None,
-                    'position': [
-                        float(row['attacker_X']) if pd.notna(row['attacker_X']) else None,
-                        float(row['attacker_Z']) if pd.notna(row['attacker_Z']) else None,
-                        float(row['attacker_Y']) if pd.notna(row['attacker_Y']) else None
-                    ],
-                    'yaw': float(row['attacker_yaw']) if pd.notna(row['attacker_yaw']) else None,
-                    'pitch': float(row['attacker_pitch']) if pd.notna(row['attacker_pitch']) else None,
-                    'health': float(row['attacker_health']) if pd.notna(row['attacker_health']) else None
+                    'name': attacker_name,
+                    'team': attacker_team,
+                    'position': list(attacker_position),
+                    'yaw': attacker_yaw,
+                    'pitch': attacker_pitch,
+                    'health': attacker_health
                 },
                 'victim': {
-                    'name': str(row['victim_name']) if pd.notna(row['victim_name']) else None,
-                    'team': str(row['victim_team_name']) if pd.notna(row['victim_team_name']) else None,
-                    'position': [
-                        float(row['victim_X']) if pd.notna(row['victim_X']) else None,
-                        float(row['victim_Z']) if pd.notna(row['victim_Z']) else None,
-                        float(row['victim_Y']) if pd.notna(row['victim_Y']) else None
-                    ],
-                    'health': float(row['victim_health']) if pd.notna(row['victim_health']) else None
+                    'name': victim_name,
+                    'team': victim_team,
+                    'position': list(victim_position),
+                    'health': victim_health
                 },
-                'weapon': str(row['weapon']) if pd.notna(row['weapon']) else None,
-                'headshot': bool(row['headshot']) if pd.notna(row['headshot']) else False
+                'weapon': weapon,
+                'headshot': is_headshot
             }
-            events.append(event)
-        
+            for (tick, game_time, event_type, attacker_name, attacker_team, attacker_position,
+                 attacker_yaw, attacker_pitch, attacker_health, victim_name, victim_team,
+                 victim_position, victim_health, weapon, is_headshot) in zip(
+                kill_events['tick'].tolist(), kill_events['game_time'].tolist(), column('event', str),
+                column('attacker_name', str), column('attacker_team_name', str), position('attacker'),
+                column('attacker_yaw'), column('attacker_pitch'), column('attacker_health'),
+                column('victim_name', str), column('victim_team_name', str), position('victim'),
+                column('victim_health'), column('weapon', str), headshots)
+        ]
+
+    def process(self) -> Dict:
+        """데이터를 처리하여 JSON 형태로 반환"""
+        # 행마다 dict/list를 만드는 동안 순환 GC가 반복 실행되지 않도록 잠시 끈다
+        # (만드는 객체에는 순환 참조가 없다)
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with stage('data_processor', 'tick_grouping'):
+                player_positions = self._positions()
+            with stage('data_processor', 'events'):
+                events = self._events()
+        finally:
+            if gc_enabled:
+                gc.enable()
+
         # 메타데이터
-        metadata = {
-            'total_ticks': len(player_positions),
-            'total_events': len(events),
-            'time_range': {
-                'min': float(self.df['game_time'].min()),
-                'max': float(self.df['game_time'].max())
-            },
-            'tick_range': {
-                'min': int(self.df['tick'].min()),
-                'max': int(self.df['tick'].max())
-            },
-            'players': list(self.df['name'].unique()),
-            'teams': list(self.df['team_name'].unique())
-        }
-        
+        with stage('data_processor', 'metadata'):
+            metadata = {
+                'total_ticks': len(player_positions),
+                'total_events': len(events),
+                'time_range': {
+                    'min': float(self.df['game_time'].min()),
+                    'max': float(self.df['game_time'].max())
+                },
+                'tick_range': {
+                    'min': int(self.df['tick'].min()),
+                    'max': int(self.df['tick'].max())
+                },
+                'players': list(self.df['name'].unique()),
+                'teams': list(self.df['team_name'].unique())
+            }
+
         return {
             'metadata': metadata,
             'positions': player_positions,
             'events': events
         }
-    
+
     def save_json(self, output_path: str):
         """처리된 데이터를 JSON 파일로 저장"""
         data = self.process()
-        with open(output_path, 'w', encoding='utf-8') as f:
+        with stage('data_processor', 'serialization'), open(output_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
         return data
 
@@ -124,5 +166,3 @@ if __name__ == '__main__':
     data = processor.save_json('simulation_data.json')
     print(f"Processed {data['metadata']['total_ticks']} ticks")
     print(f"Found {data['metadata']['total_events']} events")
-
-
@@ -0,0 +1,308 @@
+"""
+키프레임 + 양자화 델타 내보내기 (.csd) - simulation_data.json보다 5~10배 작은 위치 데이터 파일
+
+좌표를 precision 단위(기본 1/8 unit)의 정수로 양자화한 뒤, keyframe_interval 틱마다
+블록을 나누고 블록 안에서는 플레이어마다 직전 행과의 차이만 int16으로 저장한다.
+블록의 첫 등장 행(키프레임)과 int16 범위를 넘는 이동(순간이동 등)은 절대 좌표로 남긴다.
+블록마다 zlib으로 따로 압축하고 헤더에 블록 색인(틱 인덱스, 바이트 위치)을 두므로
+임의 틱으로 이동할 때 해당 블록 하나(최대 키프레임 간격 하나)만 읽어 복원하면 된다.
+
+파일 구조 (모든 정수는 little-endian):
+
+    0   4바이트  매직 b'CSD1'
+    4   uint32   헤더(JSON, UTF-8) 길이
+    8   헤더     양자화 단위, 블록 색인, 플레이어/팀 테이블, metadata, events
+    --  8바이트 경계까지 0으로 채움 (여기부터 본문)
+    본문        블록마다 zlib 압축된 섹션 묶음 (헤더 blocks[*].offset은 본문 시작 기준)
+
+복원된 좌표 오차는 precision / 2 이하이며, 델타를 양자화된 정수끼리 구하므로 누적되지 않는다.
+yaw/pitch는 0.01도 단위 int16으로 저장한다.
+
+사용법:
+    python delta_export.py simulation_data.json simulation_data.csd [precision] [keyframe_interval]
+"""
+import json
+import struct
+import zlib
+
+import numpy as np
+
+from tick_store import TickStore
+
+MAGIC = b'CSD1'
+FORMAT_VERSION = 1
+EXTENSION = '.csd'
+ALIGN = 8
+
+# 좌표 양자화 단위 (unit)
+DEFAULT_PRECISION = 0.125
+# 키프레임(블록) 간격 (틱 수)
+DEFAULT_KEYFRAME_INTERVAL = 64
+# yaw/pitch 양자화 단위 (도), NaN은 AIM_MISSING
+AIM_PRECISION = 0.01
+AIM_MISSING = -32768
+ZLIB_LEVEL = 6
+
+_INT16_MAX = 32767
+
+# 블록 안 섹션 순서: (이름, dtype, 단위) - 단위는 틱 / 행 / 절대 좌표 행
+BLOCK_SECTIONS = (
+    ('tick', '<i8', 'tick'),
+    ('game_time', '<f8', 'tick'),
+    ('player_count', '<u2', 'tick'),
+    ('player', '<u2', 'row'),
+    ('team', '<u2', 'row'),
+    ('round', '<i2', 'row'),
+    ('health', '<f4', 'row'),
+    ('yaw', '<i2', 'row'),
+    ('pitch', '<i2', 'row'),
+    ('delta', '<i2', 'row3'),
+    ('absolute_row', '<u4', 'absolute'),
+    ('absolute_position', '<i4', 'absolute3'),
+)
+
+
+def _pad(length):
+    return (-length) % ALIGN
+
+
+def _quantize_aim(values):
+    q = np.round(values.astype(np.float64) / AIM_PRECISION)
+    return np.where(np.isnan(q), AIM_MISSING, np.clip(q, -_INT16_MAX, _INT16_MAX)).astype('<i2')
+
+
+def _dequantize_aim(values):
+    aim = values.astype(np.float32) * np.float32(AIM_PRECISION)
+    aim[values == AIM_MISSING] = np.nan
+    return aim
+
+
+def encode_deltas(store, precision=DEFAULT_PRECISION, keyframe_interval=DEFAULT_KEYFRAME_INTERVAL):
+    """행마다 (int16 델타, 절대 좌표 여부, 양자화 좌표) 계산
+
+    같은 블록 안에서 같은 플레이어의 직전 행이 있고 차이가 int16 범위면 델타,
+    아니면 절대 좌표 행이 된다 (절대 좌표 행의 델타는 0).
+    """
+    quantized = np.round(store.position.astype(np.float64) / precision).astype(np.int64)
+    row_ticks = np.repeat(np.arange(store.n_ticks), np.diff(store.tick_offsets))
+    blocks = row_ticks // keyframe_interval
+
+    # 블록 -> 플레이어 -> 시간 순으로 늘어놓으면 직전 행이 바로 앞에 온다
+    order = np.lexsort((np.arange(store.n_rows), store.player_ids, blocks))
+    chained = np.zeros(store.n_rows, dtype=bool)
+    chained[1:] = ((blocks[order][1:] == blocks[order][:-1])
+                   & (store.player_ids[order][1:] == store.player_ids[order][:-1]))
+
+    diff = np.zeros_like(quantized)
+    diff[order[1:]] = quantized[order[1:]] - quantized[order[:-1]]
+    absolute = np.ones(store.n_rows, dtype=bool)
+    absolute[order] = ~chained
+    absolute |= np.abs(diff).max(axis=1, initial=0) > _INT16_MAX
+
+    delta = np.where(absolute[:, None], 0, diff).astype('<i2')
+    return delta, absolute, quantized
+
+
+def _block_sections(store, start, stop, delta, absolute, quantized):
+    """틱 인덱스 구간 [start, stop) 블록의 섹션 배열 (BLOCK_SECTIONS 순서)"""
+    row_start, row_stop = store.row_range(start, stop)
+    rows = slice(row_start, row_stop)
+    absolute_rows = np.flatnonzero(absolute[rows])
+    return [
+        store.tick_values[start:stop].astype('<i8'),
+        store.tick_times[start:stop].astype('<f8'),
+        np.diff(store.tick_offsets[start:stop + 1]).astype('<u2'),
+        store.player_ids[rows].astype('<u2'),
+        store.team_ids[rows].astype('<u2'),
+        store.rounds[rows].astype('<i2'),
+        store.health[rows].astype('<f4'),
+        _quantize_aim(store.yaw[rows]),
+        _quantize_aim(store.pitch[rows]),
+        delta[rows],
+        absolute_rows.astype('<u4'),
+        quantized[rows][absolute_rows].astype('<i4'),
+    ]
+
+
+def write(path, metadata, store, events, precision=DEFAULT_PRECISION,
+          keyframe_interval=DEFAULT_KEYFRAME_INTERVAL):
+    """TickStore + metadata + events를 .csd 파일로 저장하고 파일 크기 반환"""
+    delta, absolute, quantized = encode_deltas(store, precision, keyframe_interval)
+
+    blocks, bodies = [], []
+    offset = 0
+    for start in range(0, store.n_ticks, keyframe_interval):
+        stop = min(start + keyframe_interval, store.n_ticks)
+        sections = _block_sections(store, start, stop, delta, absolute, quantized)
+        body = zlib.compress(b''.join(np.ascontiguousarray(arr).tobytes() for arr in sections), ZLIB_LEVEL)
+        row_start, row_stop = store.row_range(start, stop)
+        blocks.append({
+            'tick_index': start,
+            'tick_count': stop - start,
+            'row_offset': row_start,
+            'row_count': row_stop - row_start,
+            'absolute_count': int(len(sections[-2])),
+            'offset': offset,
+            'length': len(body)
+        })
+        bodies.append(body)
+        offset += len(body)
+
+    header = {
+        'version': FORMAT_VERSION,
+        'precision': precision,
+        'aim_precision': AIM_PRECISION,
+        'keyframe_interval': keyframe_interval,
+        'tick_count': store.n_ticks,
+        'row_count': store.n_rows,
+        'players': store.players,
+        'teams': store.teams,
+        'blocks': blocks,
+        'metadata': metadata,
+        'events': events
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    prefix_len = len(MAGIC) + 4 + len(header_bytes)
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b'\0' * _pad(prefix_len))
+        for body in bodies:
+            f.write(body)
+    return prefix_len + _pad(prefix_len) + offset
+
+
+class DeltaFile:
+    """.csd 파일 읽기 - 헤더만 먼저 읽고 블록은 필요할 때 하나씩 복원"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f'{path}: .csd 파일이 아닙니다')
+            (header_len,) = struct.unpack('<I', f.read(4))
+            self.header = json.loads(f.read(header_len).decode('utf-8'))
+        prefix_len = len(MAGIC) + 4 + header_len
+        self.body_offset = prefix_len + _pad(prefix_len)
+        self.blocks = self.header['blocks']
+        self.precision = self.header['precision']
+        self.block_ticks = np.array([b['tick_index'] for b in self.blocks], dtype=np.int64)
+
+    @property
+    def n_ticks(self):
+        return self.header['tick_count']
+
+    def read_block(self, number, f=None):
+        """블록 하나를 복원해 섹션 이름 -> 배열 사전으로 반환 (position은 float32 좌표)"""
+        block = self.blocks[number]
+        if f is None:
+            with open(self.path, 'rb') as f:
+                return self.read_block(number, f)
+        f.seek(self.body_offset + block['offset'])
+        raw = zlib.decompress(f.read(block['length']))
+
+        counts = {'tick': block['tick_count'], 'row': block['row_count'],
+                  'row3': block['row_count'] * 3, 'absolute': block['absolute_count'],
+                  'absolute3': block['absolute_count'] * 3}
+        arrays, pos = {}, 0
+        for name, dtype, unit in BLOCK_SECTIONS:
+            arr = np.frombuffer(raw, dtype=dtype, count=counts[unit], offset=pos)
+            arrays[name] = arr
+            pos += arr.nbytes
+
+        # 플레이어별로 절대 좌표 행부터 델타를 누적 (구간 누적합)
+        n = block['row_count']
+        values = arrays['delta'].reshape(n, 3).astype(np.int64)
+        starts = np.zeros(n, dtype=bool)
+        absolute_rows = arrays['absolute_row'].astype(np.int64)
+        starts[absolute_rows] = True
+        values[absolute_rows] = arrays['absolute_position'].reshape(-1, 3)
+
+        order = np.argsort(arrays['player'], kind='stable')
+        values, starts = values[order], starts[order]
+        total = np.cumsum(values, axis=0)
+        first = np.flatnonzero(starts)
+        base = total[first] - values[first]
+        quantized = np.empty_like(values)
+        quantized[order] = total - base[np.cumsum(starts) - 1]
+        arrays['position'] = (quantized * self.precision).astype(np.float32)
+        return arrays
+
+    def block_range(self, start, stop):
+        """틱 인덱스 구간 [start, stop)과 겹치는 블록 번호 범위"""
+        first = max(int(np.searchsorted(self.block_ticks, start, side='right')) - 1, 0)
+        last = int(np.searchsorted(self.block_ticks, stop, side='left'))
+        return first, last
+
+    def read_store(self, start=0, stop=None):
+        """틱 인덱스 구간 [start, stop)을 TickStore로 복원 (겹치는 블록만 읽는다)"""
+        if stop is None:
+            stop = self.n_ticks
+        stop = min(stop, self.n_ticks)
+        first, last = self.block_range(start, stop)
+
+        parts = {name: [] for name in ('tick', 'game_time', 'player_count', 'player', 'team',
+                                       'round', 'health', 'yaw', 'pitch', 'position')}
+        with open(self.path, 'rb') as f:
+            for number in range(first, last):
+                arrays = self.read_block(number, f)
+                # 블록 안에서 요청 구간만 잘라 낸다
+                block_start = self.blocks[number]['tick_index']
+                lo = max(start - block_start, 0)
+                hi = min(stop - block_start, self.blocks[number]['tick_count'])
+                offsets = np.concatenate(([0], np.cumsum(arrays['player_count'], dtype=np.int64)))
+                rows = slice(int(offsets[lo]), int(offsets[hi]))
+                for name in ('tick', 'game_time', 'player_count'):
+                    parts[name].append(arrays[name][lo:hi])
+                for name in ('player', 'team', 'round', 'health', 'yaw', 'pitch', 'position'):
+                    parts[name].append(arrays[name][rows])
+
+        def joined(name, dtype, empty_shape=(0,)):
+            return np.concatenate(parts[name]).astype(dtype) if parts[name] else np.zeros(empty_shape, dtype)
+
+        counts = joined('player_count', np.int64)
+        return TickStore(
+            tick_values=joined('tick', np.int64),
+            tick_times=joined('game_time', np.float64),
+            tick_offsets=np.concatenate(([0], np.cumsum(counts))).astype(np.int64),
+            player_ids=joined('player', np.int32),
+            team_ids=joined('team', np.int16),
+            position=joined('position', np.float32, (0, 3)),
+            health=joined('health', np.float32),
+            rounds=joined('round', np.int16),
+            yaw=np.concatenate([_dequantize_aim(a) for a in parts['yaw']]) if parts['yaw'] else None,
+            pitch=np.concatenate([_dequantize_aim(a) for a in parts['pitch']]) if parts['pitch'] else None,
+            players=self.header['players'],
+            teams=self.header['teams']
+        )
+
+
+def load(path):
+    """.csd 파일 전체를 (store, metadata, events)로 복원"""
+    delta_file = DeltaFile(path)
+    return delta_file.read_store(), delta_file.header['metadata'], delta_file.header['events']
+
+
+def is_delta_file(path):
+    return path.lower().endswith(EXTENSION)
+
+
+if __name__ == '__main__':
+    import os
+    import sys
+
+    src = sys.argv[1] if len(sys.argv) > 1 else 'simulation_data.json'
+    dst = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(src)[0] + EXTENSION
+    precision = float(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_PRECISION
+    interval = int(sys.argv[4]) if len(sys.argv) > 4 else DEFAULT_KEYFRAME_INTERVAL
+
+    print(f"{src} 읽는 중...")
+    with open(src, 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+    store = TickStore.from_positions(raw.get('positions', []))
+    size = write(dst, raw.get('metadata', {}), store, raw.get('events', []), precision, interval)
+    src_size = os.path.getsize(src)
+    print(f"완료! {dst}에 저장됨 ({src_size / 1024 / 1024:.1f}MB -> {size / 1024 / 1024:.1f}MB, "
+          f"{src_size / max(size, 1):.1f}배 감소)")
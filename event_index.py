@@ -0,0 +1,206 @@
+"""
+킬 이벤트 역색인 - 공격자/피해자/무기/라운드/헤드샷/틱 구간으로 이벤트 조회
+
+로드 시 한 번 만들어 두고, 조회는 값별 이벤트 번호 목록(정렬된 NumPy 배열)의
+교집합으로 처리한다. events는 tick 순으로 정렬되어 있으므로 틱 구간은
+이벤트 번호 구간이 되어 이진 탐색으로 잘라 낸다.
+
+    attacker, victim   이름 (정확히 일치)
+    player             공격자 또는 피해자
+    weapon, round      무기 / 라운드 번호
+    headshot           true / false
+    start_tick, end_tick, offset, limit
+    los, wallbang, map  시야 검사 결과 포함 / 벽 너머 킬 필터 / 맵 지정 (line_of_sight.py)
+
+응답의 이벤트마다 id(events 안의 번호)를 붙인다. /api/events/<id>/context에 그대로 쓴다.
+"""
+import numpy as np
+
+EVENT_PARAMS = ('attacker', 'victim', 'player', 'weapon', 'round', 'headshot',
+                'start_tick', 'end_tick', 'offset', 'limit', 'los', 'wallbang', 'map')
+
+# 정수여야 하는 파라미터 (값이 정수가 아니면 400)
+INT_PARAMS = ('round', 'start_tick', 'end_tick', 'offset', 'limit')
+
+# 한 번에 돌려주는 최대 이벤트 수
+MAX_EVENTS_PER_PAGE = 5000
+
+_EMPTY = np.zeros(0, dtype=np.int64)
+
+
+def _postings(values):
+    """값 -> 그 값을 가진 이벤트 번호 배열(정렬) 사전"""
+    index = {}
+    for i, value in enumerate(values):
+        if value is not None:
+            index.setdefault(value, []).append(i)
+    return {value: np.array(ids, dtype=np.int64) for value, ids in index.items()}
+
+
+def event_rounds(ticks, store):
+    """이벤트 틱마다 해당 틱의 라운드 번호 (저장소에 없는 틱이면 None)"""
+    idx = np.searchsorted(store.tick_values, ticks, side='left')
+    found = idx < store.n_ticks
+    safe = np.where(found, idx, 0)
+    if store.n_ticks:
+        found &= store.tick_values[safe] == ticks
+        found &= store.tick_offsets[safe] < store.tick_offsets[safe + 1]
+    rounds = []
+    for ok, i in zip(found.tolist(), safe.tolist()):
+        rounds.append(int(store.rounds[store.tick_offsets[i]]) if ok else None)
+    return rounds
+
+
+class EventIndex:
+    """events(tick 순 정렬) 위의 역색인"""
+
+    def __init__(self, events, store):
+        self.events = events
+        self.ticks = np.array([e['tick'] for e in events], dtype=np.int64)
+        self.rounds = event_rounds(self.ticks, store)
+        # 이벤트 번호 -> 이벤트 틱 이상인 첫 저장소 틱 인덱스 (킬 컨텍스트 구간 기준점)
+        self.tick_index = np.minimum(np.searchsorted(store.tick_values, self.ticks, side='left'),
+                                     max(store.n_ticks - 1, 0))
+
+        attackers = [(e.get('attacker') or {}).get('name') for e in events]
+        victims = [(e.get('victim') or {}).get('name') for e in events]
+        weapons = [e.get('weapon') for e in events]
+
+        self.by_attacker = _postings(attackers)
+        self.by_victim = _postings(victims)
+        self.by_weapon = _postings(weapons)
+        self.by_round = _postings(self.rounds)
+        self.headshots = np.flatnonzero([bool(e.get('headshot')) for e in events])
+
+        # 결과 집계용 무기 코드
+        self.weapon_names = sorted(self.by_weapon)
+        self.weapon_codes = np.full(len(events), -1, dtype=np.int64)
+        for code, weapon in enumerate(self.weapon_names):
+            self.weapon_codes[self.by_weapon[weapon]] = code
+
+    def query(self, attacker=None, victim=None, player=None, weapon=None, round_num=None,
+              headshot=None, start_tick=None, end_tick=None):
+        """조건에 맞는 이벤트 번호 배열(tick 순) 반환"""
+        lo, hi = 0, len(self.events)
+        if start_tick is not None:
+            lo = int(np.searchsorted(self.ticks, start_tick, side='left'))
+        if end_tick is not None:
+            hi = int(np.searchsorted(self.ticks, end_tick, side='right'))
+        if lo >= hi:
+            return _EMPTY
+
+        lists = []
+        if attacker is not None:
+            lists.append(self.by_attacker.get(attacker, _EMPTY))
+        if victim is not None:
+            lists.append(self.by_victim.get(victim, _EMPTY))
+        if player is not None:
+            lists.append(np.union1d(self.by_attacker.get(player, _EMPTY),
+                                    self.by_victim.get(player, _EMPTY)))
+        if weapon is not None:
+            lists.append(self.by_weapon.get(weapon, _EMPTY))
+        if round_num is not None:
+            lists.append(self.by_round.get(round_num, _EMPTY))
+        if headshot is not None:
+            if headshot:
+                lists.append(self.headshots)
+            else:
+                lists.append(np.setdiff1d(np.arange(lo, hi), self.headshots, assume_unique=True))
+
+        if not lists:
+            return np.arange(lo, hi)
+
+        # 짧은 목록부터 교집합 (각 목록은 정렬되어 있고 중복 없음)
+        lists.sort(key=len)
+        result = lists[0]
+        result = result[np.searchsorted(result, lo):np.searchsorted(result, hi)]
+        for ids in lists[1:]:
+            if not len(result):
+                break
+            result = np.intersect1d(result, ids, assume_unique=True)
+        return result
+
+    def counts(self, ids):
+        """조회 결과 집계 (무기별 / 헤드샷 수)"""
+        codes = self.weapon_codes[ids]
+        per_weapon = np.bincount(codes[codes >= 0], minlength=len(self.weapon_names))
+        return {
+            'weapon': {name: int(n) for name, n in zip(self.weapon_names, per_weapon) if n},
+            'headshot': int(len(np.intersect1d(ids, self.headshots, assume_unique=True)))
+        }
+
+
+def with_ids(events, ids=None):
+    """이벤트마다 번호('id', /api/events/<id>/context에 쓰는 값)를 붙인 목록 (ids가 없으면 전체)"""
+    if ids is None:
+        ids = range(len(events))
+    return [{'id': i, **events[i]} for i in ids]
+
+
+def has_event_args(args):
+    """이벤트 조회 파라미터가 하나라도 있으면 True (없으면 기존 전체 목록)"""
+    return any(name in args for name in EVENT_PARAMS)
+
+
+def _parse_bool(value):
+    if value is None:
+        return None
+    return value.strip().lower() in ('1', 'true', 'yes')
+
+
+def _int_args(args, names):
+    """정수 파라미터들 (없으면 None), 값이 있는데 정수가 아니면 전체가 None"""
+    values = {}
+    for name in names:
+        value = args.get(name, type=int)
+        if value is None and args.get(name, '').strip():
+            return None
+        values[name] = value
+    return values
+
+
+def valid_event_args(args):
+    """정수 파라미터(round, start_tick, end_tick, offset, limit)가 모두 정수이거나 비어 있으면 True"""
+    return _int_args(args, INT_PARAMS) is not None
+
+
+def events_page(index, args, sight=None):
+    """request.args 조건으로 조회한 이벤트 페이지와 집계 반환 (정수 파라미터가 잘못되었으면 None)
+
+    sight(line_of_sight.EventSight)가 있으면 wallbang 필터를 적용하고 이벤트마다
+    line_of_sight 결과를 붙인다.
+    """
+    numbers = _int_args(args, INT_PARAMS)
+    if numbers is None:
+        return None
+    ids = index.query(
+        attacker=args.get('attacker'),
+        victim=args.get('victim'),
+        player=args.get('player'),
+        weapon=args.get('weapon'),
+        round_num=numbers['round'],
+        headshot=_parse_bool(args.get('headshot')),
+        start_tick=numbers['start_tick'],
+        end_tick=numbers['end_tick']
+    )
+    wallbang = _parse_bool(args.get('wallbang'))
+    if sight is not None and wallbang is not None:
+        ids = ids[sight.wallbang[ids] == wallbang]
+    offset = max(numbers['offset'] or 0, 0)
+    limit = numbers['limit']
+    if limit is None or limit <= 0 or limit > MAX_EVENTS_PER_PAGE:
+        limit = MAX_EVENTS_PER_PAGE
+    page = ids[offset:offset + limit]
+    counts = index.counts(ids)
+    if sight is not None:
+        counts['wallbang'] = int(sight.wallbang[ids].sum())
+        events = [{'id': i, **index.events[i], 'line_of_sight': sight.describe(i)} for i in page.tolist()]
+    else:
+        events = with_ids(index.events, page.tolist())
+    return {
+        'total': int(len(ids)),
+        'offset': offset,
+        'count': int(len(page)),
+        'counts': counts,
+        'events': events
+    }
@@ -1,165 +1,284 @@
 """
 빠른 CSV to JSON 변환기 (최적화 버전)
+
+workers > 1이면 파일을 틱 경계에 맞춘 바이트 구간으로 나눠 프로세스 풀에서
+병렬로 파싱한 뒤, 구간 순서대로 합쳐 직렬 처리와 같은 결과를 만든다.
 """
 import csv
-import json
-from collections import defaultdict
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
 
-def process_csv_to_json(csv_path, output_path, sample_ratio=1):
-    """
-    sample_ratio: 1 = 전체, 0.1 = 10%만, 0.5 = 50%만
+import delta_export
+from json_stream import write_data_json
+from metrics import ingest_rows, stage, stage_summary
+from tick_store import NAN, TickStoreBuilder, build_metadata, concat_stores
+
+# 워커 하나당 나눌 구간 수 (구간마다 처리 시간이 달라도 고르게 분배되도록)
+CHUNKS_PER_WORKER = 4
+# 이보다 작은 구간으로는 나누지 않음
+MIN_CHUNK_BYTES = 1024 * 1024
+
+def process_rows(rows, builder, events, sample_ratio=1, first_idx=0, progress=False):
+    """CSV 행(dict)들을 builder/events에 반영하고 처리한 행 수 반환
+
+    같은 builder/events로 여러 번 호출해 이어 붙일 수 있다 (live_tail의 증분 수집).
+    first_idx: 첫 행의 파일 전체 기준 번호 (샘플링 판정용)
     """
-    positions = []
-    events = []
-    
-    tick_data = {}
-    current_tick = None
     processed_count = 0
-    
-    print("CSV 파일 읽는 중...")
-    
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
+    for idx, row in enumerate(rows, first_idx):
+        # 샘플링 (빠른 테스트용)
+        if sample_ratio < 1 and idx % int(1/sample_ratio) != 0:
+            continue
+            
+        tick_str = row.get('tick', '').strip()
+        if not tick_str:
+            continue
+            
+        try:
+            tick = int(tick_str)
+            game_time = float(row.get('game_time', 0) or 0)
+        except (ValueError, KeyError):
+            continue
         
-        for idx, row in enumerate(reader):
-            # 샘플링 (빠른 테스트용)
-            if sample_ratio < 1 and idx % int(1/sample_ratio) != 0:
-                continue
-                
-            tick_str = row.get('tick', '').strip()
-            if not tick_str:
-                continue
-                
+        # 틱이 바뀌면 이전 틱을 저장소에 기록
+        builder.begin_tick(tick, game_time)
+        
+        # 플레이어 위치 정보 (값이 있는 경우만)
+        x, y, z = row.get('X', ''), row.get('Y', ''), row.get('Z', '')
+        name = row.get('name', '').strip()
+        if x and y and z and name:  # 이름이 있는 경우만 추가
             try:
-                tick = int(tick_str)
-                game_time = float(row.get('game_time', 0) or 0)
+                builder.add_player(
+                    name,
+                    row.get('team_name', '').strip(),
+                    float(x), float(z), float(y),  # X, Z, Y 순서
+                    float(row.get('health', 100) or 100),
+                    int(row.get('round', 1) or 1),
+                    float(row['yaw']) if row.get('yaw') and row['yaw'].strip() else NAN,
+                    float(row['pitch']) if row.get('pitch') and row['pitch'].strip() else NAN
+                )
             except (ValueError, KeyError):
-                continue
-            
-            # 틱이 바뀌면 저장
-            if current_tick != tick and current_tick is not None and tick_data.get('players'):
-                positions.append({
-                    'tick': current_tick,
-                    'game_time': tick_data.get('game_time', 0),
-                    'players': tick_data.get('players', [])
-                })
-                tick_data = {'players': []}
-            
-            current_tick = tick
-            tick_data['game_time'] = game_time
-            
-            # 플레이어 위치 정보 (값이 있는 경우만)
-            x, y, z = row.get('X', ''), row.get('Y', ''), row.get('Z', '')
-            if x and y and z:
-                try:
-                    player_info = {
-                        'name': row.get('name', '').strip(),
-                        'team': row.get('team_name', '').strip(),
-                        'position': [float(x), float(z), float(y)],  # X, Z, Y 순서
-                        'health': float(row.get('health', 100) or 100),
-                        'round': int(row.get('round', 1) or 1)
-                    }
-                    if player_info['name']:  # 이름이 있는 경우만 추가
-                        tick_data.setdefault('players', []).append(player_info)
-                except (ValueError, KeyError):
-                    pass
-            
-            # 킬 이벤트 처리
-            event = row.get('event', '').strip()
-            if event:
-                try:
-                    attacker_x = row.get('attacker_X', '').strip()
-                    attacker_y = row.get('attacker_Y', '').strip()
-                    attacker_z = row.get('attacker_Z', '').strip()
-                    
-                    event_data = {
-                        'tick': tick,
-                        'game_time': game_time,
-                        'event_type': event,
-                        'attacker': {
-                            'name': row.get('attacker_name', '').strip() or None,
-                            'team': row.get('attacker_team_name', '').strip() or None,
-                            'position': [
-                                float(attacker_x) if attacker_x else None,
-                                float(attacker_z) if attacker_z else None,
-                                float(attacker_y) if attacker_y else None
-                            ],
-                            'yaw': float(row['attacker_yaw']) if row.get('attacker_yaw') and row['attacker_yaw'].strip() else None,
-                            'pitch': float(row['attacker_pitch']) if row.get('attacker_pitch') and row['attacker_pitch'].strip() else None,
-                            'health': float(row['attacker_health']) if row.get('attacker_health') and row['attacker_health'].strip() else None
-                        },
-                        'victim': {
-                            'name': row.get('victim_name', '').strip() or None,
-                            'team': row.get('victim_team_name', '').strip() or None,
-                            'position': [
-                                float(row['victim_X']) if row.get('victim_X') and row['victim_X'].strip() else None,
-                                float(row['victim_Z']) if row.get('victim_Z') and row['victim_Z'].strip() else None,
-                                float(row['victim_Y']) if row.get('victim_Y') and row['victim_Y'].strip() else None
-                            ],
-                            'health': float(row['victim_health']) if row.get('victim_health') and row['victim_health'].strip() else None
-                        },
-                        'weapon': row.get('weapon', '').strip() or None,
-                        'headshot': row.get('headshot', '').strip().lower() == 'true'
-                    }
-                    events.append(event_data)
-                except (ValueError, KeyError) as e:
-                    pass
-            
-            processed_count += 1
-            if processed_count % 10000 == 0:
-                print(f"처리 중... {processed_count}줄")
+                pass
         
-        # 마지막 틱 저장
-        if current_tick is not None and tick_data.get('players'):
-            positions.append({
-                'tick': current_tick,
-                'game_time': tick_data.get('game_time', 0),
-                'players': tick_data.get('players', [])
-            })
+        # 킬 이벤트 처리
+        event = row.get('event', '').strip()
+        if event:
+            try:
+                attacker_x = row.get('attacker_X', '').strip()
+                attacker_y = row.get('attacker_Y', '').strip()
+                attacker_z = row.get('attacker_Z', '').strip()
+                
+                event_data = {
+                    'tick': tick,
+                    'game_time': game_time,
+                    'event_type': event,
+                    'attacker': {
+                        'name': row.get('attacker_name', '').strip() or None,
+                        'team': row.get('attacker_team_name', '').strip() or None,
+                        'position': [
+                            float(attacker_x) if attacker_x else None,
+                            float(attacker_z) if attacker_z else None,
+                            float(attacker_y) if attacker_y else None
+                        ],
+                        'yaw': float(row['attacker_yaw']) if row.get('attacker_yaw') and row['attacker_yaw'].strip() else None,
+                        'pitch': float(row['attacker_pitch']) if row.get('attacker_pitch') and row['attacker_pitch'].strip() else None,
+                        'health': float(row['attacker_health']) if row.get('attacker_health') and row['attacker_health'].strip() else None
+                    },
+                    'victim': {
+                        'name': row.get('victim_name', '').strip() or None,
+                        'team': row.get('victim_team_name', '').strip() or None,
+                        'position': [
+                            float(row['victim_X']) if row.get('victim_X') and row['victim_X'].strip() else None,
+                            float(row['victim_Z']) if row.get('victim_Z') and row['victim_Z'].strip() else None,
+                            float(row['victim_Y']) if row.get('victim_Y') and row['victim_Y'].strip() else None
+                        ],
+                        'health': float(row['victim_health']) if row.get('victim_health') and row['victim_health'].strip() else None
+                    },
+                    'weapon': row.get('weapon', '').strip() or None,
+                    'headshot': row.get('headshot', '').strip().lower() == 'true'
+                }
+                events.append(event_data)
+            except (ValueError, KeyError) as e:
+                pass
+        
+        processed_count += 1
+        if progress and processed_count % 10000 == 0:
+            print(f"처리 중... {processed_count}줄")
     
-    print(f"데이터 처리 완료: {len(positions)} 틱, {len(events)} 이벤트")
+    return processed_count
+
+def _read_header(csv_path):
+    """헤더 컬럼 목록과 본문 시작 바이트 위치 반환"""
+    with open(csv_path, 'rb') as f:
+        header_line = f.readline()
+        fieldnames = next(csv.reader([header_line.decode('utf-8')]))
+        return fieldnames, f.tell()
+
+def _line_tick(line, tick_col):
+    """CSV 한 줄의 tick 값 (비어 있거나 읽을 수 없으면 None - 파싱 시에도 건너뛰는 행)"""
+    try:
+        return int(next(csv.reader([line.decode('utf-8')]))[tick_col].strip())
+    except (StopIteration, IndexError, UnicodeDecodeError, ValueError):
+        return None
+
+def _align_to_tick(f, pos, tick_col, file_size):
+    """pos 이후에서 틱 번호가 바뀌는 첫 줄의 시작 위치 반환"""
+    f.seek(pos)
+    f.readline()  # 중간에서 시작한 줄은 건너뜀
+    prev_tick = None
+    while True:
+        line_start = f.tell()
+        line = f.readline()
+        if not line:
+            return file_size
+        tick = _line_tick(line, tick_col)
+        if tick is None:
+            continue
+        if prev_tick is not None and tick != prev_tick:
+            return line_start
+        prev_tick = tick
+
+def split_chunks(csv_path, n_chunks):
+    """본문을 틱 경계에 맞춘 바이트 구간 [(start, end), ...]으로 나눈다"""
+    fieldnames, data_start = _read_header(csv_path)
+    file_size = os.path.getsize(csv_path)
+    if 'tick' not in fieldnames:
+        return [(data_start, file_size)]
+    tick_col = fieldnames.index('tick')
+
+    n_chunks = max(1, min(n_chunks, (file_size - data_start) // MIN_CHUNK_BYTES))
+    step = (file_size - data_start) / n_chunks
+    bounds = [data_start]
+    with open(csv_path, 'rb') as f:
+        for i in range(1, n_chunks):
+            pos = max(int(data_start + step * i), bounds[-1])
+            boundary = _align_to_tick(f, pos, tick_col, file_size)
+            if boundary > bounds[-1]:
+                bounds.append(boundary)
+    if bounds[-1] < file_size:
+        bounds.append(file_size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def _read_chunk(csv_path, start, end):
+    with open(csv_path, 'rb') as f:
+        f.seek(start)
+        return f.read(end - start).decode('utf-8')
+
+def _count_chunk_rows(task):
+    """(프로세스 풀 워커) 바이트 구간 하나의 CSV 행 수
+
+    DictReader와 같은 기준으로 센다: 빈 줄은 행이 아니고, 따옴표 안의 줄바꿈은 한 행에 속한다.
+    """
+    csv_path, start, end = task
+    return sum(1 for row in csv.reader(io.StringIO(_read_chunk(csv_path, start, end))) if row)
+
+def _count_rows_before(csv_path, chunks, pool):
+    """각 구간 시작 전까지의 행 수 (샘플링에서 전체 행 번호를 맞추는 데 사용)"""
+    firsts = []
+    count = 0
+    for rows in pool.map(_count_chunk_rows, [(csv_path, start, end) for start, end in chunks]):
+        firsts.append(count)
+        count += rows
+    return firsts
+
+def _parse_chunk(task):
+    """(프로세스 풀 워커) 바이트 구간 하나를 파싱하여 (store, events, 행 수) 반환"""
+    csv_path, fieldnames, start, end, sample_ratio, first_idx = task
+    reader = csv.DictReader(io.StringIO(_read_chunk(csv_path, start, end)), fieldnames=fieldnames)
+    builder = TickStoreBuilder()
+    events = []
+    count = process_rows(reader, builder, events, sample_ratio, first_idx)
+    return builder.build(), events, count
+
+def parse_csv(csv_path, sample_ratio=1, progress=False):
+    """CSV를 한 프로세스에서 순서대로 파싱하여 (store, events) 반환"""
+    builder = TickStoreBuilder()
+    events = []
+    with stage('fast_processor', 'parse'):
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            rows = process_rows(reader, builder, events, sample_ratio, progress=progress)
+    ingest_rows.inc(rows, 'fast_processor')
+    # 마지막 틱까지 닫고 배열로 변환
+    with stage('fast_processor', 'tick_grouping'):
+        store = builder.build()
+    return store, events
+
+def parse_csv_parallel(csv_path, sample_ratio=1, workers=None):
+    """CSV를 구간별로 병렬 파싱하여 (store, events) 반환 - 결과는 직렬 처리와 동일"""
+    workers = workers or os.cpu_count() or 1
+    fieldnames, _ = _read_header(csv_path)
+    chunks = split_chunks(csv_path, workers * CHUNKS_PER_WORKER)
+
+    print(f"병렬 처리: {len(chunks)}개 구간, 워커 {workers}개")
+    stores = []
+    events = []
+    processed_count = 0
+    with stage('fast_processor', 'parse'), ProcessPoolExecutor(max_workers=workers) as pool:
+        if sample_ratio < 1:
+            firsts = _count_rows_before(csv_path, chunks, pool)
+        else:
+            firsts = [0] * len(chunks)
+        tasks = [(csv_path, fieldnames, start, end, sample_ratio, first)
+                 for (start, end), first in zip(chunks, firsts)]
+        # map은 입력 순서대로 결과를 돌려주므로 틱 순서가 유지된다
+        for chunk_store, chunk_events, count in pool.map(_parse_chunk, tasks):
+            stores.append(chunk_store)
+            events.extend(chunk_events)
+            processed_count += count
+            print(f"처리 중... {processed_count}줄")
+    ingest_rows.inc(processed_count, 'fast_processor')
+    with stage('fast_processor', 'tick_grouping'):
+        store = concat_stores(stores)
+    return store, events
+
+def result_positions(result):
+    """process_csv_to_json 결과의 positions 리스트 (이전 반환 형식의 'positions'와 같은 값)"""
+    return result['store'].positions()
+
+def process_csv_to_json(csv_path, output_path, sample_ratio=1, workers=1):
+    """
+    sample_ratio: 1 = 전체, 0.1 = 10%만, 0.5 = 50%만
+    workers: 파싱 프로세스 수 (1 = 직렬, None = CPU 코어 수)
+    output_path가 .csd로 끝나면 키프레임 + 양자화 델타 형식(delta_export)으로 저장
+
+    반환값: {'metadata', 'store'(TickStore), 'events'} - positions 리스트는 result_positions(result)
+    """
+    print("CSV 파일 읽는 중...")
     
-    # 메타데이터 생성
-    game_times = [p['game_time'] for p in positions if p.get('game_time')]
-    ticks = [p['tick'] for p in positions if p.get('tick')]
+    if workers == 1:
+        store, events = parse_csv(csv_path, sample_ratio, progress=True)
+    else:
+        store, events = parse_csv_parallel(csv_path, sample_ratio, workers)
     
-    # 플레이어 목록 추출
-    players = set()
-    for pos in positions:
-        for player in pos.get('players', []):
-            if player.get('name'):
-                players.add(player['name'])
+    print(f"데이터 처리 완료: {store.n_ticks} 틱, {len(events)} 이벤트")
     
-    metadata = {
-        'total_ticks': len(positions),
-        'total_events': len(events),
-        'time_range': {
-            'min': min(game_times) if game_times else 0,
-            'max': max(game_times) if game_times else 0
-        },
-        'tick_range': {
-            'min': min(ticks) if ticks else 0,
-            'max': max(ticks) if ticks else 0
-        },
-        'players': sorted(list(players)),
-        'teams': ['CT', 'TERRORIST']
-    }
+    # 메타데이터 생성
+    with stage('fast_processor', 'metadata'):
+        metadata = build_metadata(store, events)
     
+    # positions는 리스트로 만들지 않고 저장소째 반환 (필요하면 result_positions(result))
     result = {
         'metadata': metadata,
-        'positions': positions,
+        'store': store,
         'events': events
     }
     
-    print("JSON 파일 저장 중...")
-    # JSON 저장 (압축 없이)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(result, f, indent=None, separators=(',', ':'), ensure_ascii=False)
+    with stage('fast_processor', 'serialization'):
+        if delta_export.is_delta_file(output_path):
+            print("키프레임 + 델타 파일 저장 중...")
+            delta_export.write(output_path, metadata, store, events)
+        else:
+            print("JSON 파일 저장 중...")
+            # JSON 스트리밍 저장 (압축 없이, 틱 묶음 단위로 기록)
+            write_data_json(output_path, metadata, store, events)
     
     print(f"완료! {output_path}에 저장됨")
     print(f"- 총 틱: {metadata['total_ticks']}")
     print(f"- 총 이벤트: {metadata['total_events']}")
     print(f"- 플레이어: {len(metadata['players'])}명")
+    print(f"- 단계별 시간: {stage_summary('fast_processor')}")
     
     return result
 
@@ -169,7 +288,16 @@ if __name__ == '__main__':
     sample = 1.0  # 전체 처리
     if len(sys.argv) > 1:
         sample = float(sys.argv[1])
+    # 두 번째 인자: 병렬 워커 수 (0 = CPU 코어 수)
+    workers = 1
+    if len(sys.argv) > 2:
+        workers = int(sys.argv[2]) or None
+    
+    # 세 번째 인자: 출력 파일 (.csd면 키프레임 + 델타 형식)
+    output = 'simulation_data.json'
+    if len(sys.argv) > 3:
+        output = sys.argv[3]
     
-    process_csv_to_json('sample_dataset_kill_tick_info.csv', 'simulation_data.json', sample)
+    process_csv_to_json('sample_dataset_kill_tick_info.csv', output, sample, workers)
 
 
@@ -0,0 +1,64 @@
+"""
+스트리밍 JSON 출력 - 전체 결과를 문자열로 만들지 않고 조각 단위로 내보낸다
+
+json.dump(result)는 데이터 모델과 직렬화된 문자열 전체가 동시에 메모리에 올라간다.
+여기서는 TickStore에서 일정 틱 수만큼씩 positions를 만들어 바로 인코딩하므로
+최대 메모리가 경기 길이와 거의 무관하고, HTTP 응답은 첫 조각부터 바로 전송된다.
+
+출력은 json.dump(result, separators=(',', ':'), ensure_ascii=False)와 같은 바이트열이다.
+"""
+import json
+
+# 한 번에 인코딩하는 틱 수
+CHUNK_TICKS = 1000
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+
+def iter_positions_json(store, start=0, stop=None, chunk_ticks=CHUNK_TICKS):
+    """positions 배열 내부([ ] 제외)를 틱 묶음 단위 문자열로 생성"""
+    if stop is None:
+        stop = store.n_ticks
+    first = True
+    for chunk_start in range(start, stop, chunk_ticks):
+        chunk_stop = min(chunk_start + chunk_ticks, stop)
+        encoded = ','.join(_dumps(tick) for tick in store.iter_positions(chunk_start, chunk_stop))
+        yield encoded if first else ',' + encoded
+        first = False
+
+
+def iter_value_json(value):
+    """작은 값(dict/list) 하나를 JSON 조각으로 생성"""
+    yield _dumps(value)
+
+
+def iter_list_json(items, chunk_size=CHUNK_TICKS):
+    """리스트 내부([ ] 제외)를 묶음 단위 문자열로 생성"""
+    for i in range(0, len(items), chunk_size):
+        encoded = ','.join(_dumps(item) for item in items[i:i + chunk_size])
+        yield encoded if i == 0 else ',' + encoded
+
+
+def iter_positions_array(store, start=0, stop=None):
+    """positions 배열 전체 JSON을 조각 단위로 생성"""
+    yield '['
+    yield from iter_positions_json(store, start, stop)
+    yield ']'
+
+
+def iter_data_json(metadata, store, events):
+    """{"metadata", "positions", "events"} 전체 JSON을 조각 단위로 생성"""
+    yield '{"metadata":' + _dumps(metadata) + ',"positions":['
+    yield from iter_positions_json(store)
+    yield '],"events":['
+    yield from iter_list_json(events)
+    yield ']}'
+
+
+def write_data_json(path, metadata, store, events):
+    """전체 결과를 파일에 스트리밍으로 저장"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for chunk in iter_data_json(metadata, store, events):
+            f.write(chunk)
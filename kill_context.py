@@ -0,0 +1,83 @@
+"""
+킬 컨텍스트 윈도우 - 킬 이벤트 전후 구간(포커스 모드)을 서버에서 잘라 반환
+
+클라이언트는 킬 이벤트의 틱을 positions 전체에서 찾은 뒤 ±30틱을 잘라 썼다.
+EventIndex가 로드 시 이벤트 번호 -> 틱 인덱스 조인(tick_index)을 만들어 두므로
+여기서는 탐색 없이 바로 구간을 자르고, 같은 구간의 공격자 조준 샘플과
+주변 이벤트를 함께 돌려준다. 응답은 ResponseCache(LRU)에 그대로 캐시된다.
+"""
+import numpy as np
+
+from tick_store import nan_to_none
+
+# README의 포커스 모드 기본값 (±30틱)
+DEFAULT_BEFORE = 30
+DEFAULT_AFTER = 30
+# 한쪽 방향 최대 틱 수
+MAX_WINDOW_TICKS = 2000
+
+
+def window_args(args):
+    """before/after(또는 양쪽 공통 window) 파라미터 해석"""
+    window = args.get('window', type=int)
+    before = args.get('before', window if window is not None else DEFAULT_BEFORE, type=int)
+    after = args.get('after', window if window is not None else DEFAULT_AFTER, type=int)
+    clamp = lambda n: min(max(n, 0), MAX_WINDOW_TICKS)
+    return clamp(before), clamp(after)
+
+
+def player_aim(store, name, start, stop):
+    """틱 인덱스 구간 [start, stop)에서 한 플레이어의 조준 샘플 목록"""
+    player_id = store.player_id(name) if name else None
+    if player_id is None or start >= stop:
+        return []
+    row_start, row_stop = store.row_range(start, stop)
+    rows = np.flatnonzero(store.player_ids[row_start:row_stop] == player_id) + row_start
+    # 행 번호 -> 틱 인덱스
+    tick_idx = np.searchsorted(store.tick_offsets, rows, side='right') - 1
+    ticks = store.tick_values[tick_idx].tolist()
+    times = store.tick_times[tick_idx].tolist()
+    yaws = nan_to_none(store.yaw[rows])
+    pitches = nan_to_none(store.pitch[rows])
+    return [
+        {'tick': tick, 'game_time': t, 'yaw': yaw, 'pitch': pitch}
+        for tick, t, yaw, pitch in zip(ticks, times, yaws, pitches)
+    ]
+
+
+def context_window(data, event_id, before=DEFAULT_BEFORE, after=DEFAULT_AFTER):
+    """이벤트 하나의 컨텍스트 (구간 positions, 공격자 조준 샘플, 주변 이벤트)
+
+    event_id가 범위를 벗어나면 None.
+    """
+    index = data['event_index']
+    if event_id < 0 or event_id >= len(index.events):
+        return None
+    store = data['store']
+    event = index.events[event_id]
+
+    center = int(index.tick_index[event_id])
+    start = max(center - before, 0)
+    stop = min(center + after + 1, store.n_ticks)
+
+    nearby = []
+    if start < stop:
+        ids = index.query(start_tick=int(store.tick_values[start]),
+                          end_tick=int(store.tick_values[stop - 1]))
+        nearby = [{'id': i, **index.events[i]} for i in ids.tolist() if i != event_id]
+
+    attacker = (event.get('attacker') or {}).get('name')
+    return {
+        'id': event_id,
+        'event': event,
+        'window': {
+            'before': before,
+            'after': after,
+            'start_tick': int(store.tick_values[start]) if start < stop else None,
+            'end_tick': int(store.tick_values[stop - 1]) if start < stop else None,
+            'tick_count': max(stop - start, 0)
+        },
+        'positions': store.positions(start, stop),
+        'aim': player_aim(store, attacker, start, stop),
+        'nearby_events': nearby
+    }
@@ -0,0 +1,300 @@
+"""
+시야(line of sight) 검사 - 킬마다 공격자 -> 피해자 선분이 맵 지오메트리를 통과하는지 판정
+
+map_data.json의 walls / buildings 상자(중심 x, y, 바닥 z, width/height/depth, 수직축
+회전 rotation도)를 화면과 같은 규칙으로 해석한다 (위치 저장소 기준 0=X, 1=Y, 2=높이).
+상자들의 축 정렬 경계 상자로 BVH를 만들고, 경기의 모든 킬 선분을 한꺼번에
+(선분, 노드) 쌍 배열로 트리를 내려가며 NumPy 슬랩 테스트로 걸러 낸다. 반복 횟수는
+트리 깊이만큼이고, 리프에 닿은 (선분, 상자) 후보는 마지막에 상자 회전을 되돌린
+로컬 좌표에서 한 번에 정밀 검사한다.
+
+선분이 상자를 지나가면 벽 너머 킬(wallbang)로 본다. 두 끝점이 모두 같은 상자
+안에 있으면(같은 건물 안) 막힌 것으로 보지 않는다.
+
+    python line_of_sight.py simulation_data.json [맵 이름]
+"""
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+
+MAP_DATA_PATH = os.environ.get('MAP_DATA', 'map_data.json')
+# 발 위치 기준 눈높이 / 피해자 조준점 높이
+ATTACKER_EYE_HEIGHT = 64.0
+VICTIM_AIM_HEIGHT = 40.0
+# BVH 리프 하나의 최대 상자 수
+LEAF_SIZE = 4
+BOX_KINDS = ('walls', 'buildings')
+SIGHT_PARAMS = ('los', 'wallbang', 'map')
+
+_maps = {}
+_maps_lock = threading.Lock()
+
+
+def load_maps(path=MAP_DATA_PATH):
+    """map_data.json 읽기 (경로별로 한 번만, 파일이 없으면 빈 사전)"""
+    with _maps_lock:
+        if path not in _maps:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    _maps[path] = json.load(f)
+            except FileNotFoundError:
+                _maps[path] = {}
+        return _maps[path]
+
+
+def detect_map(store, maps):
+    """플레이어 위치 범위와 맵 범위가 가장 비슷한 맵 이름 (웹 화면의 추론과 같은 기준)"""
+    finite = np.isfinite(store.position).all(axis=1)
+    if not finite.any():
+        return None
+    low = store.position[finite].min(axis=0)
+    high = store.position[finite].max(axis=0)
+    size = high - low
+    best, best_score = None, 0.3
+    for name, entry in maps.items():
+        try:
+            expected = np.array([entry['maxX'] - entry['minX'], entry['maxY'] - entry['minY'],
+                                 entry['maxZ'] - entry['minZ']], dtype=np.float64)
+        except KeyError:
+            continue
+        score = 1 - float(np.mean(np.abs(size - expected) / expected))
+        if score > best_score:
+            best, best_score = name, score
+    return best
+
+
+class BoxBVH:
+    """회전 상자 목록과 그 경계 상자 위의 BVH (노드 배열로 평탄화)"""
+
+    def __init__(self, center, half, angle, labels=None):
+        self.center = np.asarray(center, dtype=np.float64).reshape(-1, 3)  # (X, Y, 높이) 중심
+        self.half = np.asarray(half, dtype=np.float64).reshape(-1, 3)      # 로컬 축 반 크기
+        self.angle = np.asarray(angle, dtype=np.float64).reshape(-1)       # 수직축 회전 (라디안)
+        self.labels = labels or [str(i) for i in range(len(self.center))]
+        self.cos, self.sin = np.cos(self.angle), np.sin(self.angle)
+
+        # 회전된 상자의 축 정렬 경계
+        c, s = np.abs(self.cos), np.abs(self.sin)
+        extent = np.stack((c * self.half[:, 0] + s * self.half[:, 1],
+                           s * self.half[:, 0] + c * self.half[:, 1],
+                           self.half[:, 2]), axis=1)
+        self.box_min = self.center - extent
+        self.box_max = self.center + extent
+        self._build()
+
+    @classmethod
+    def from_geometry(cls, geometry):
+        """map_data.json의 geometry (walls / buildings)로 생성"""
+        center, half, angle, labels = [], [], [], []
+        for kind in BOX_KINDS:
+            for i, box in enumerate(geometry.get(kind, [])):
+                height = float(box.get('height', 0))
+                center.append((box['x'], box['y'], box.get('z', 0) + height / 2))
+                half.append((box.get('width', 0) / 2, box.get('depth', 0) / 2, height / 2))
+                angle.append(np.radians(box.get('rotation', 0) or 0))
+                labels.append(f'{kind}[{i}]')
+        return cls(center, half, angle, labels)
+
+    def _build(self):
+        """중심점이 가장 넓게 퍼진 축의 중앙값으로 나누는 BVH"""
+        n = len(self.center)
+        self.order = np.arange(n)
+        node_min, node_max, left, right, start, count = [], [], [], [], [], []
+
+        def build(lo, hi):
+            node = len(node_min)
+            ids = self.order[lo:hi]
+            node_min.append(self.box_min[ids].min(axis=0))
+            node_max.append(self.box_max[ids].max(axis=0))
+            left.append(-1)
+            right.append(-1)
+            start.append(lo)
+            count.append(hi - lo)
+            if hi - lo > LEAF_SIZE:
+                centers = self.center[ids]
+                axis = int(np.argmax(centers.max(axis=0) - centers.min(axis=0)))
+                mid = (hi - lo) // 2
+                self.order[lo:hi] = ids[np.argpartition(centers[:, axis], mid)]
+                left[node] = build(lo, lo + mid)
+                right[node] = build(lo + mid, hi)
+                count[node] = 0
+            return node
+
+        if n:
+            build(0, n)
+        self.node_min = np.array(node_min, dtype=np.float64).reshape(-1, 3)
+        self.node_max = np.array(node_max, dtype=np.float64).reshape(-1, 3)
+        self.left = np.array(left, dtype=np.int64)
+        self.right = np.array(right, dtype=np.int64)
+        self.leaf_start = np.array(start, dtype=np.int64)
+        self.leaf_count = np.array(count, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.center)
+
+    def candidates(self, origin, direction):
+        """경계 상자가 선분과 겹치는 (선분 번호, 상자 번호) 후보 쌍"""
+        seg = np.arange(len(origin))
+        node = np.zeros(len(origin), dtype=np.int64)
+        if not len(self.node_min):
+            seg = seg[:0]
+        inv = 1.0 / direction
+        found_seg, found_box = [], []
+        while len(seg):
+            enter, leave = _slab(origin[seg], inv[seg], self.node_min[node], self.node_max[node])
+            hit = _overlaps(enter, leave)
+            seg, node = seg[hit], node[hit]
+
+            leaf = self.left[node] < 0
+            counts = self.leaf_count[node[leaf]]
+            first = np.repeat(self.leaf_start[node[leaf]] - np.cumsum(counts) + counts, counts)
+            found_seg.append(np.repeat(seg[leaf], counts))
+            found_box.append(self.order[first + np.arange(counts.sum())])
+
+            inner = ~leaf
+            seg = np.repeat(seg[inner], 2)
+            node = np.stack((self.left[node[inner]], self.right[node[inner]]), axis=1).ravel()
+        if not found_seg:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(found_seg), np.concatenate(found_box)
+
+    def intersect(self, start, end):
+        """선분 [start, end]들이 상자를 지나는지 -> (선분 번호, 상자 번호) 쌍 (선분 순)
+
+        두 끝점이 모두 같은 상자 안이면 제외한다.
+        """
+        start = np.asarray(start, dtype=np.float64)
+        end = np.asarray(end, dtype=np.float64)
+        direction = end - start
+        # 0 성분은 아주 작은 값으로 바꿔 슬랩 계산에서 0 * inf를 피한다
+        direction = np.where(np.abs(direction) < 1e-9, 1e-9, direction)
+        seg, box = self.candidates(start, direction)
+
+        # 상자 로컬 좌표 (회전을 되돌림)
+        cos, sin = self.cos[box], self.sin[box]
+
+        def local(points):
+            d = points - self.center[box]
+            return np.stack((d[:, 0] * cos - d[:, 1] * sin, d[:, 0] * sin + d[:, 1] * cos, d[:, 2]), axis=1)
+
+        a, b = local(start[seg]), local(end[seg])
+        local_dir = b - a
+        local_dir = np.where(np.abs(local_dir) < 1e-9, 1e-9, local_dir)
+        enter, leave = _slab(a, 1.0 / local_dir, -self.half[box], self.half[box])
+        inside_both = (enter <= 0) & (leave >= 1)
+        hit = _overlaps(enter, leave) & ~inside_both
+        order = np.argsort(seg[hit], kind='stable')
+        return seg[hit][order], box[hit][order]
+
+
+def _slab(origin, inv_dir, box_min, box_max):
+    """선분 매개변수 t의 상자 진입/이탈 값 (t=0 시작점, t=1 끝점)"""
+    t1 = (box_min - origin) * inv_dir
+    t2 = (box_max - origin) * inv_dir
+    near, far = np.minimum(t1, t2), np.maximum(t1, t2)
+    # 축이 셋뿐이라 axis 방향 reduce보다 열끼리 비교가 빠르다
+    enter = np.maximum(np.maximum(near[:, 0], near[:, 1]), near[:, 2])
+    leave = np.minimum(np.minimum(far[:, 0], far[:, 1]), far[:, 2])
+    return enter, leave
+
+
+def _overlaps(enter, leave):
+    """진입/이탈 구간이 선분 구간 [0, 1]과 겹치는지"""
+    return (enter <= leave) & (leave >= 0) & (enter <= 1)
+
+
+def kill_segments(events):
+    """킬 이벤트마다 공격자 눈 -> 피해자 조준점 선분 (위치가 없으면 valid=False)"""
+    start = np.full((len(events), 3), np.nan)
+    end = np.full((len(events), 3), np.nan)
+    for i, event in enumerate(events):
+        a = (event.get('attacker') or {}).get('position') or []
+        v = (event.get('victim') or {}).get('position') or []
+        if len(a) == 3 and len(v) == 3 and None not in a and None not in v:
+            start[i] = a
+            end[i] = v
+    start[:, 2] += ATTACKER_EYE_HEIGHT
+    end[:, 2] += VICTIM_AIM_HEIGHT
+    valid = np.isfinite(start).all(axis=1) & np.isfinite(end).all(axis=1)
+    return start, end, valid
+
+
+class EventSight:
+    """경기 킬 이벤트 전체의 시야 검사 결과 (맵 하나 기준)"""
+
+    def __init__(self, events, map_name, bvh):
+        self.map_name = map_name
+        self.bvh = bvh
+        start, end, self.valid = kill_segments(events)
+        self.distance = np.linalg.norm(end - start, axis=1)
+        rows = np.flatnonzero(self.valid)
+        seg, box = bvh.intersect(start[rows], end[rows])
+        seg = rows[seg]
+        self.wallbang = np.zeros(len(events), dtype=bool)
+        self.wallbang[seg] = True
+        # 이벤트 번호 -> 통과한 상자 번호 (선분 순으로 정렬되어 있음)
+        self._blocked_offsets = np.searchsorted(seg, np.arange(len(events) + 1))
+        self._blocked = box
+
+    @property
+    def wallbang_ids(self):
+        return np.flatnonzero(self.wallbang)
+
+    def describe(self, event_id):
+        """이벤트 하나의 결과 ({map, wallbang, blocked_by, distance})"""
+        if not self.valid[event_id]:
+            return {'map': self.map_name, 'wallbang': None, 'blocked_by': [], 'distance': None}
+        lo, hi = self._blocked_offsets[event_id], self._blocked_offsets[event_id + 1]
+        return {
+            'map': self.map_name,
+            'wallbang': bool(self.wallbang[event_id]),
+            'blocked_by': [self.bvh.labels[i] for i in self._blocked[lo:hi].tolist()],
+            'distance': round(float(self.distance[event_id]), 2)
+        }
+
+
+def has_sight_args(args):
+    return any(name in args for name in SIGHT_PARAMS)
+
+
+def event_sight(data, map_name=None, maps=None):
+    """경기의 시야 검사 결과 (맵별로 한 번만 계산, 맵을 정할 수 없으면 None)
+
+    맵은 map_name, metadata의 'map', 위치 범위 추론 순으로 정한다.
+    """
+    maps = load_maps() if maps is None else maps
+    map_name = map_name or data['metadata'].get('map') or detect_map(data['store'], maps)
+    if map_name not in maps or 'geometry' not in maps[map_name]:
+        return None
+    cache = data['sight']
+    sight = cache.get(map_name)
+    if sight is None:
+        bvh = BoxBVH.from_geometry(maps[map_name]['geometry'])
+        sight = cache.setdefault(map_name, EventSight(data['event_index'].events, map_name, bvh))
+    return sight
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("사용법: python line_of_sight.py <simulation_data.json> [맵 이름]")
+        sys.exit(1)
+    from match_catalog import make_data
+    from tick_store import TickStore
+
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+    data = make_data(TickStore.from_positions(raw.get('positions', [])), raw.get('metadata', {}),
+                     raw.get('events', []))
+    sight = event_sight(data, sys.argv[2] if len(sys.argv) > 2 else None)
+    if sight is None:
+        print("맵 지오메트리를 찾을 수 없습니다.")
+        sys.exit(1)
+    print(f"맵: {sight.map_name}, 상자 {len(sight.bvh)}개")
+    print(f"벽 너머 킬: {int(sight.wallbang.sum())} / {int(sight.valid.sum())}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,290 @@
+"""
+실시간 경기 따라 읽기 - 기록 중인 CSV의 새 줄만 파싱하고 SSE로 브라우저에 전송
+
+LiveMatch는 백그라운드 스레드에서 CSV 파일 크기를 짧은 간격으로 확인해 새로 추가된
+바이트만 읽는다. 마지막 줄이 아직 다 써지지 않았으면(줄바꿈 없음) 다음 읽기까지
+남겨 두고, 완성된 줄만 fast_processor와 같은 규칙으로 TickStoreBuilder에 이어 붙인다
+(이미 읽은 부분은 다시 파싱하지 않는다). 새 틱이 닫히면 그 틱들과 닫힌 틱까지의 새
+이벤트를 SSE 메시지 하나로 한 번만 인코딩해 모든 구독자 큐에 넣는다. 메시지 id는 닫힌
+틱 수이며, Last-Event-ID로 다시 접속하면 그 틱부터의 위치와 이벤트를 다시 보낸다.
+
+구독자마다 큐 길이(LIVE_BACKLOG)를 제한해 느린 클라이언트는 오래된 메시지를 버리고
+'lag' 이벤트로 버린 수를 알려 준다 (서버 메모리와 다른 구독자에 영향 없음).
+
+    event: frames   data: {"from": 틱 인덱스, "positions": [...], "events": [...]}
+    event: lag      data: {"dropped": 버린 메시지 수}
+    event: reset    파일이 처음부터 다시 써졌을 때 (클라이언트는 상태를 비운다)
+"""
+import csv
+import io
+import json
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import deque
+
+import numpy as np
+
+from fast_processor import process_rows
+from tick_store import TickStore, TickStoreBuilder
+
+LIVE_CSV_PATH = os.environ.get('LIVE_CSV')
+# 파일 확인 간격 (초)
+POLL_INTERVAL = 0.05
+# 구독자 한 명이 쌓아 둘 수 있는 최대 메시지 수
+LIVE_BACKLOG = 256
+# 이 시간 동안 보낼 메시지가 없으면 연결 유지용 주석 전송 (초)
+HEARTBEAT_SECONDS = 15
+# 재접속(Last-Event-ID) 시 다시 보내 주는 최대 틱 수
+MAX_RESUME_TICKS = 2000
+_READ_BYTES = 4 * 1024 * 1024
+
+
+def _sse(event, data, event_id=None):
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append('data: ' + json.dumps(data, separators=(',', ':'), ensure_ascii=False))
+    return '\n'.join(lines) + '\n\n'
+
+
+class Subscriber:
+    """SSE 연결 하나의 메시지 큐 (길이 제한, 넘치면 오래된 것부터 버림)"""
+
+    def __init__(self, backlog=LIVE_BACKLOG):
+        self.queue = deque()
+        self.backlog = backlog
+        self.dropped = 0
+
+    def push(self, message):
+        if len(self.queue) >= self.backlog:
+            self.queue.popleft()
+            self.dropped += 1
+        self.queue.append(message)
+
+
+class _GrowingArrays:
+    """뒤에 이어 붙이기만 하는 배열 모음 (용량을 두 배씩 늘려 복사 비용은 상각 O(추가분))
+
+    view()는 지금까지의 길이만큼 자른 뷰이므로, 이후에 이어 붙여도 이전 뷰의 내용은 바뀌지 않는다.
+    """
+
+    def __init__(self):
+        self.arrays = {}
+        self.lengths = {}
+
+    def extend(self, name, values):
+        current = self.arrays.get(name)
+        length = self.lengths.get(name, 0)
+        needed = length + len(values)
+        if current is None or needed > len(current):
+            capacity = max(needed, 2 * length, 1024)
+            grown = np.empty((capacity,) + values.shape[1:], dtype=values.dtype)
+            if current is not None:
+                grown[:length] = current[:length]
+            self.arrays[name] = current = grown
+        current[length:needed] = values
+        self.lengths[name] = needed
+
+    def view(self, name):
+        return self.arrays[name][:self.lengths[name]]
+
+
+class LiveMatch:
+    """기록 중인 CSV 하나를 따라 읽는 수집기 + SSE 발행자"""
+
+    def __init__(self, csv_path, poll_interval=POLL_INTERVAL, backlog=LIVE_BACKLOG):
+        self.csv_path = csv_path
+        self.poll_interval = poll_interval
+        self.backlog = backlog
+        self._cond = threading.Condition()
+        self._subscribers = set()
+        self._thread = None
+        self._stopped = threading.Event()
+        self._reset_state()
+
+    def _reset_state(self):
+        self.builder = TickStoreBuilder()
+        self.events = []
+        self._event_ticks = []  # events의 tick (이진 탐색용)
+        self.fieldnames = None
+        self.offset = 0
+        self._partial = b''
+        self._published_ticks = 0
+        self._published_events = 0
+        self.rows_read = 0
+        self.last_tick = None
+        self.last_update = None
+        self._snapshot = None
+        self._arrays = _GrowingArrays()
+
+    # 수집
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='live-tail', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                if not self.poll():
+                    self._stopped.wait(self.poll_interval)
+            except OSError as e:
+                print(f"실시간 CSV 읽기 실패: {e}")
+                self._stopped.wait(1.0)
+
+    def poll(self):
+        """새로 추가된 바이트를 읽어 반영 (읽은 것이 있으면 True)"""
+        try:
+            size = os.path.getsize(self.csv_path)
+        except FileNotFoundError:
+            return False
+        if size < self.offset:
+            # 파일이 잘리거나 새로 써졌으면 처음부터 다시 읽는다
+            with self._cond:
+                self._reset_state()
+            self._broadcast(_sse('reset', {}))
+        if size == self.offset:
+            return False
+
+        with open(self.csv_path, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read(min(size - self.offset, _READ_BYTES))
+        self.offset += len(chunk)
+
+        data = self._partial + chunk
+        end = data.rfind(b'\n')
+        if end < 0:
+            # 줄바꿈이 올 때까지 기다린다
+            self._partial = data
+            return True
+        self._partial = data[end + 1:]
+        text = data[:end + 1].decode('utf-8')
+
+        with self._cond:
+            if self.fieldnames is None:
+                header, _, text = text.partition('\n')
+                self.fieldnames = next(csv.reader([header.lstrip('\ufeff')]))
+            reader = csv.DictReader(io.StringIO(text), fieldnames=self.fieldnames)
+            self.rows_read += process_rows(reader, self.builder, self.events)
+            self._event_ticks.extend(event['tick'] for event in self.events[len(self._event_ticks):])
+            self.last_update = time.time()
+        self._publish()
+        return True
+
+    def _publish(self):
+        """새로 닫힌 틱과 새 이벤트를 SSE 메시지 하나로 만들어 구독자에게 전달"""
+        with self._cond:
+            start, stop = self._published_ticks, self.builder.n_ticks
+            if start == stop:
+                return
+            # 이벤트는 그 틱이 닫힌 뒤에 보낸다 (메시지 id까지의 틱과 이벤트가 일치하도록)
+            n_events = bisect_right(self._event_ticks, self.builder.tick_value(stop - 1))
+            new_events = self.events[self._published_events:n_events]
+            positions = self.builder.snapshot(start).positions() if stop > start else []
+            if positions:
+                self.last_tick = positions[-1]['tick']
+            self._published_ticks = stop
+            self._published_events = n_events
+        message = _sse('frames', {'from': start, 'positions': positions, 'events': new_events},
+                       event_id=stop)
+        self._broadcast(message)
+
+    def _broadcast(self, message):
+        with self._cond:
+            for subscriber in self._subscribers:
+                subscriber.push(message)
+            self._cond.notify_all()
+
+    # 조회
+
+    def store(self):
+        """지금까지 닫힌 틱 전체 저장소 (이전 저장소 이후에 닫힌 틱만 복사해 이어 붙인다)"""
+        with self._cond:
+            if self._snapshot is None or self._snapshot.n_ticks != self.builder.n_ticks:
+                start = self._snapshot.n_ticks if self._snapshot is not None else 0
+                rows = self._snapshot.n_rows if self._snapshot is not None else 0
+                piece = self.builder.snapshot(start)
+                arrays = self._arrays
+                # 새 조각의 오프셋은 0부터 시작하므로 지금까지의 행 수만큼 민다 (첫 조각만 0을 포함)
+                arrays.extend('tick_offsets', piece.tick_offsets[1 if start else 0:] + rows)
+                for name in ('tick_values', 'tick_times') + TickStore.ROW_FIELDS:
+                    arrays.extend(name, getattr(piece, name))
+                self._snapshot = TickStore(players=piece.players, teams=piece.teams,
+                                           **{name: arrays.view(name) for name in TickStore.ARRAY_FIELDS})
+            return self._snapshot
+
+    def status(self):
+        with self._cond:
+            return {
+                'path': self.csv_path,
+                'bytes_read': self.offset,
+                'rows': self.rows_read,
+                'ticks': self.builder.n_ticks,
+                'events': len(self.events),
+                'last_tick': self.last_tick,
+                'last_update': self.last_update,
+                'subscribers': len(self._subscribers),
+                'backlog': self.backlog
+            }
+
+    # 구독
+
+    def stream(self, last_event_id=None):
+        """SSE 응답 본문 생성기 (연결이 끊기면 구독 해제)"""
+        subscriber = Subscriber(self.backlog)
+        with self._cond:
+            self._subscribers.add(subscriber)
+            resume_from = None
+            if last_event_id is not None:
+                resume_from = max(last_event_id, self._published_ticks - MAX_RESUME_TICKS, 0)
+                if resume_from < self._published_ticks:
+                    positions = self.store().positions(resume_from, self._published_ticks)
+                    # 놓친 틱 구간의 이벤트 (tick >= 다시 보내는 첫 틱)
+                    first = bisect_left(self._event_ticks, self.builder.tick_value(resume_from),
+                                        0, self._published_events)
+                    events = self.events[first:self._published_events]
+                    subscriber.push(_sse('frames', {'from': resume_from, 'positions': positions, 'events': events},
+                                         event_id=self._published_ticks))
+            hello = {'ticks': self._published_ticks, 'events': self._published_events}
+        try:
+            yield _sse('hello', hello)
+            while True:
+                with self._cond:
+                    if not subscriber.queue:
+                        self._cond.wait(HEARTBEAT_SECONDS)
+                    messages = list(subscriber.queue)
+                    subscriber.queue.clear()
+                    dropped, subscriber.dropped = subscriber.dropped, 0
+                if dropped:
+                    yield _sse('lag', {'dropped': dropped})
+                if messages:
+                    yield ''.join(messages)
+                else:
+                    yield ': keep-alive\n\n'
+        finally:
+            with self._cond:
+                self._subscribers.discard(subscriber)
+
+
+_live = None
+_live_lock = threading.Lock()
+
+
+def get_live(csv_path=None):
+    """LIVE_CSV(또는 csv_path) 수집기 (처음 호출 시 시작, 설정이 없으면 None)"""
+    global _live
+    path = csv_path or LIVE_CSV_PATH
+    if not path:
+        return None
+    with _live_lock:
+        if _live is None:
+            _live = LiveMatch(path).start()
+            print(f"실시간 수집 시작: {path}")
+    return _live
@@ -0,0 +1,186 @@
+"""
+궤적 LOD(level of detail) - 트레일/개요 재생용으로 위치 샘플 수를 줄인 저장소
+
+플레이어 이동은 대부분 직선 구간이라 모든 틱을 보낼 필요가 없다. 경기마다 아래
+단계의 피라미드를 처음 요청 시 한 번 만들어 두고, positions 계열 엔드포인트가
+lod / tolerance 파라미터에 맞는 단계의 TickStore를 그대로 인코딩한다.
+
+    lod=0          원본 (모든 틱)
+    lod=1..3       틱 간격 2 / 4 / 8로 솎아 낸 틱 (모든 플레이어가 같은 틱)
+    lod=4..6       플레이어 궤적별 3D Ramer-Douglas-Peucker, 허용 오차 2 / 8 / 32 units
+    tolerance=T    T 이하인 가장 큰 RDP 단계 (T가 가장 작은 단계보다 작으면 원본)
+    rate=R         초당 R 프레임으로 재샘플링한 저장소 (resample.py, lod보다 우선)
+
+RDP 단계는 바로 아래 단계에서 남은 점만으로 다시 단순화하므로 단계끼리 포함 관계를
+이루고(행마다 살아남는 최고 단계 하나만 기록), 오차는 단계 허용 오차 합계 이하이다.
+궤적은 플레이어/라운드가 바뀌거나 플레이어가 빠진 틱에서 끊고, 끊긴 구간의
+양 끝점은 항상 남긴다. 클라이언트는 남은 점 사이를 선형 보간하면 된다.
+"""
+import threading
+
+import numpy as np
+
+from resample import has_rate_args, parse_rate
+
+# 단계 정의 (종류, 값) - 인덱스 + 1이 lod 값
+LOD_LEVELS = (
+    ('stride', 2),
+    ('stride', 4),
+    ('stride', 8),
+    ('tolerance', 2.0),
+    ('tolerance', 8.0),
+    ('tolerance', 32.0),
+)
+LOD_PARAMS = ('lod', 'tolerance')
+
+
+def _segment_distance(points, a, b):
+    """점들과 선분 a-b 사이의 거리 (a == b이면 점 a까지의 거리)"""
+    ab = b - a
+    length2 = np.einsum('ij,ij->i', ab, ab)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(length2 > 0, np.einsum('ij,ij->i', points - a, ab) / length2, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    closest = a + t[:, None] * ab
+    return np.sqrt(np.einsum('ij,ij->i', points - closest, points - closest))
+
+
+def rdp_mask(points, breaks, tolerance):
+    """여러 궤적을 한꺼번에 단순화한 keep 마스크
+
+    points: float64[n, 3], 궤적들을 이어 붙인 점 (궤적 안에서는 시간 순)
+    breaks: bool[n], 각 궤적 구간의 첫 점이면 True
+    재귀 대신 모든 구간을 한 번에 나누는 반복으로 처리해 반복 횟수가 분할 깊이만큼만 든다.
+    """
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    if not n:
+        return keep
+    starts = np.flatnonzero(breaks)
+    ends = np.append(starts[1:] - 1, n - 1)
+    keep[starts] = True
+    keep[ends] = True
+
+    active = ends - starts >= 2
+    seg_start, seg_end = starts[active], ends[active]
+    while len(seg_start):
+        # 모든 구간의 내부 점을 한 배열로 펼친다
+        lengths = seg_end - seg_start - 1
+        seg_id = np.repeat(np.arange(len(seg_start)), lengths)
+        first = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        idx = np.arange(lengths.sum()) - np.repeat(first, lengths) + np.repeat(seg_start + 1, lengths)
+
+        distance = _segment_distance(points[idx], points[seg_start][seg_id], points[seg_end][seg_id])
+        seg_max = np.maximum.reduceat(distance, first)
+        # 구간별 최대 거리 점 (같은 값이 여럿이면 앞쪽)
+        at_max = np.flatnonzero(distance == seg_max[seg_id])
+        _, pick = np.unique(seg_id[at_max], return_index=True)
+        split_at = idx[at_max[pick]]
+
+        split = seg_max > tolerance
+        split_at = split_at[split]
+        keep[split_at] = True
+        seg_start = np.concatenate((seg_start[split], split_at))
+        seg_end = np.concatenate((split_at, seg_end[split]))
+        active = seg_end - seg_start >= 2
+        seg_start, seg_end = seg_start[active], seg_end[active]
+    return keep
+
+
+def track_order(store):
+    """행을 플레이어별 시간 순으로 늘어놓는 순서와 궤적 구간 시작 표시"""
+    order = np.argsort(store.player_ids, kind='stable')
+    tick_index = np.searchsorted(store.tick_offsets, order, side='right') - 1
+    player = store.player_ids[order]
+    rounds = store.rounds[order]
+    breaks = np.ones(len(order), dtype=bool)
+    breaks[1:] = ((player[1:] != player[:-1]) | (rounds[1:] != rounds[:-1])
+                  | (tick_index[1:] != tick_index[:-1] + 1))
+    return order, breaks
+
+
+class LodPyramid:
+    """경기 하나의 LOD 단계별 저장소 (처음 요청한 단계만 만들어 보관)"""
+
+    def __init__(self, store):
+        self.store = store
+        self._row_level = None  # 행마다 살아남는 최고 RDP 단계 번호 (0 = 원본만)
+        self._stores = {}
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        size = self._row_level.nbytes if self._row_level is not None else 0
+        return size + sum(store.nbytes for store in self._stores.values())
+
+    def _build_row_levels(self):
+        """RDP 단계를 작은 허용 오차부터 차례로 적용 (앞 단계에서 남은 점만 다음 단계 입력)"""
+        store = self.store
+        order, breaks = track_order(store)
+        points = store.position[order].astype(np.float64)
+        row_level = np.zeros(store.n_rows, dtype=np.int8)
+
+        rows = np.arange(len(order))
+        for level, (kind, value) in enumerate(LOD_LEVELS, 1):
+            if kind != 'tolerance':
+                continue
+            keep = rdp_mask(points[rows], breaks[rows], value)
+            rows = rows[keep]
+            row_level[order[rows]] = level
+        return row_level
+
+    def level_store(self, level):
+        """lod 단계의 저장소 (0이면 원본)"""
+        if level <= 0:
+            return self.store
+        store = self._stores.get(level)
+        if store is not None:
+            return store
+
+        with self._lock:
+            store = self._stores.get(level)
+            if store is None:
+                kind, value = LOD_LEVELS[level - 1]
+                if kind == 'stride':
+                    row_ticks = np.repeat(np.arange(self.store.n_ticks), np.diff(self.store.tick_offsets))
+                    keep = row_ticks % value == 0
+                else:
+                    if self._row_level is None:
+                        self._row_level = self._build_row_levels()
+                    keep = self._row_level >= level
+                store = self.store.take_rows(keep)
+                self._stores[level] = store
+        return store
+
+
+def has_lod_args(args):
+    return any(name in args for name in LOD_PARAMS)
+
+
+def parse_lod_args(args):
+    """lod / tolerance 파라미터를 단계 번호로 (둘 다 있으면 lod 우선, 범위 밖이면 잘라 냄)"""
+    level = args.get('lod', type=int)
+    if level is not None:
+        return min(max(level, 0), len(LOD_LEVELS))
+    tolerance = args.get('tolerance', type=float)
+    if tolerance is None:
+        return 0
+    level = 0
+    for i, (kind, value) in enumerate(LOD_LEVELS, 1):
+        if kind == 'tolerance' and value <= tolerance:
+            level = i
+    return level
+
+
+def select_store(data, args):
+    """요청 파라미터에 맞는 저장소 (rate면 재샘플링, lod/tolerance면 LOD 단계, 없으면 원본)
+
+    rate 값이 잘못되었으면 None (라우트에서 400)
+    """
+    if has_rate_args(args):
+        rate = parse_rate(args)
+        return data['resampled'].rate_store(rate) if rate is not None else None
+    if not has_lod_args(args):
+        return data['store']
+    return data['lod'].level_store(parse_lod_args(args))
+
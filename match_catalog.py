@@ -0,0 +1,186 @@
+"""
+경기 카탈로그 - 디렉터리의 여러 경기 파일을 한 서버에서 제공
+
+MATCH_DIR 디렉터리의 경기 파일(app_direct.py는 CSV, app.py는 JSON)을 경기 목록으로
+보여 주고, /api/matches/<id>/... 요청이 오면 해당 경기를 처음 한 번 로드한다
+(같은 경기의 동시 요청은 BackgroundLoader 하나의 로드를 함께 기다린다).
+로드된 경기는 대략적인 메모리 크기(위치 저장소 + 플레이어 궤적 + 이벤트 + 응답 캐시 + LOD + 재샘플링 + 공간 격자 + 라운드 샤드) 합계가
+MAX_MATCH_BYTES를 넘지 않도록 가장 오래 쓰지 않은 경기부터 내보낸다(LRU).
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from api_query import event_tick_index
+from background_load import BackgroundLoader, LoadFailed
+from event_index import EventIndex
+from lod import LodPyramid
+from player_tracks import PlayerTracks
+from resample import Resampler
+from response_cache import ResponseCache
+from round_index import RoundIndex
+from spatial_grid import SpatialGrid
+
+MATCH_DIR = os.environ.get('MATCH_DIR', 'matches')
+# 로드된 경기 전체의 최대 메모리 (대략값)
+MAX_MATCH_BYTES = int(os.environ.get('MATCH_CACHE_MB', 1024)) * 1024 * 1024
+# 이벤트 하나(dict)가 차지하는 대략적인 메모리
+EVENT_BYTES = 1024
+
+
+def make_data(store, metadata, events, rounds=None):
+    """로드된 경기 하나의 데이터 사전 (두 서버의 엔드포인트가 공통으로 쓰는 형태)
+
+    rounds: store_cache.load_rounds()의 라운드 샤드 정보 (없으면 저장소에서 잘라 쓴다)
+    """
+    events, event_ticks = event_tick_index(events)
+    event_index = EventIndex(events, store)
+    tracks = PlayerTracks(store)
+    return {
+        'metadata': metadata,
+        'store': store,
+        'events': events,
+        'event_ticks': event_ticks,
+        # 킬 이벤트 역색인 (공격자/피해자/무기/라운드/헤드샷)
+        'event_index': event_index,
+        # 플레이어별 연속 궤적 (틱 중심 저장소를 전치)
+        'tracks': tracks,
+        # 플레이어별 조준 궤적 (처음 요청 시 생성)
+        'aim_tracks': {},
+        # 궤적 LOD 단계별 저장소 (처음 요청 시 생성)
+        'lod': LodPyramid(store),
+        # 라운드 표 + 라운드별 샤드 (처음 요청 시 로드)
+        'rounds': RoundIndex(store, event_index, rounds),
+        # rate별 재샘플링 저장소 (처음 요청 시 생성)
+        'resampled': Resampler(store, tracks),
+        # 히트맵 / 반경 조회용 공간 격자 (처음 요청 시 생성)
+        'spatial': SpatialGrid(store, event_index),
+        # 맵별 킬 시야 검사 결과 (처음 요청 시 생성)
+        'sight': {},
+        # 인코딩/압축된 응답 캐시 (데이터를 다시 읽으면 새로 만들어짐)
+        'responses': ResponseCache()
+    }
+
+
+def data_nbytes(data):
+    """경기 데이터의 대략적인 메모리 크기 (응답 캐시/LOD 단계가 생기면 같이 커진다)"""
+    return (data['store'].nbytes + len(data['events']) * EVENT_BYTES
+            + data['responses'].nbytes + data['lod'].nbytes + data['spatial'].nbytes
+            + data['rounds'].nbytes + data['tracks'].nbytes + data['resampled'].nbytes)
+
+
+class MatchCatalog:
+    """경기 파일 목록 + 로드된 경기의 크기 기준 LRU 캐시"""
+
+    def __init__(self, loader, directory=MATCH_DIR, extensions=('.csv',), max_bytes=MAX_MATCH_BYTES,
+                 on_load=None):
+        self.loader = loader  # (파일 경로, progress) -> 경기 데이터 사전
+        self.on_load = on_load  # 로드가 끝난 경기마다 (경기 id, 파일 경로, 데이터)로 호출
+        self.directory = directory
+        self.extensions = extensions
+        self.max_bytes = max_bytes
+        self._loaded = OrderedDict()
+        self._loading = {}  # 경기 id -> 진행 중인 BackgroundLoader
+        self._lock = threading.Lock()
+
+    def paths(self):
+        """경기 id -> 파일 경로 (요청마다 디렉터리를 다시 읽어 새 파일을 반영)"""
+        try:
+            names = sorted(os.listdir(self.directory))
+        except OSError:
+            return {}
+        return {
+            os.path.splitext(name)[0]: os.path.join(self.directory, name)
+            for name in names if os.path.splitext(name)[1].lower() in self.extensions
+        }
+
+    def matches(self):
+        """/api/matches 응답용 경기 목록"""
+        with self._lock:
+            loaded = {match_id: data_nbytes(data) for match_id, data in self._loaded.items()}
+            loading = {match_id: loader.status() for match_id, loader in self._loading.items()}
+        result = []
+        for match_id, path in self.paths().items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            result.append({
+                'id': match_id,
+                'file': os.path.basename(path),
+                'size': stat.st_size,
+                'modified': stat.st_mtime,
+                'loaded': match_id in loaded,
+                'memory_bytes': loaded.get(match_id),
+                'loading': loading.get(match_id)
+            })
+        return result
+
+    def stats(self):
+        with self._lock:
+            used = sum(data_nbytes(data) for data in self._loaded.values())
+            return {'loaded': len(self._loaded), 'loading': len(self._loading),
+                    'memory_bytes': used, 'max_bytes': self.max_bytes}
+
+    def loading_status(self):
+        """로드 중인 경기별 진행 상황"""
+        with self._lock:
+            return {match_id: loader.status() for match_id, loader in self._loading.items()}
+
+    def get(self, match_id, wait=True):
+        """경기 데이터 반환 (처음이면 로드), 목록에 없는 id면 None
+
+        wait=False면 로드가 끝나지 않았을 때 기다리지 않고 StillLoading을 던진다.
+        로드에 실패하면 LoadFailed를 던지고 다음 요청에서 다시 시도한다.
+        """
+        with self._lock:
+            data = self._loaded.get(match_id)
+            if data is not None:
+                self._loaded.move_to_end(match_id)
+                self._evict()
+                return data
+            loader = self._loading.get(match_id)
+
+        if loader is None:
+            path = self.paths().get(match_id)
+            if path is None:
+                return None
+            with self._lock:
+                loader = self._loading.get(match_id)
+                if loader is None:
+                    print(f"경기 로드: {match_id}")
+                    loader = BackgroundLoader(lambda progress: self.loader(path, progress),
+                                              name=match_id, total_bytes=os.path.getsize(path),
+                                              on_ready=lambda data: self._ready(match_id, path, data))
+                    self._loading[match_id] = loader
+
+        try:
+            return loader.wait() if wait else loader.get()
+        except LoadFailed:
+            with self._lock:
+                if self._loading.get(match_id) is loader:
+                    del self._loading[match_id]
+            raise
+
+    def _ready(self, match_id, path, data):
+        """로드 스레드의 완료 콜백 (캐시에 먼저 넣고 on_load 호출, on_load가 실패해도 캐시는 유지)"""
+        self._add(match_id, data)
+        if self.on_load is not None:
+            self.on_load(match_id, path, data)
+
+    def _add(self, match_id, data):
+        """로드가 끝난 경기를 캐시에 넣고 한도에 맞춰 정리"""
+        with self._lock:
+            self._loaded[match_id] = data
+            self._loaded.move_to_end(match_id)
+            self._loading.pop(match_id, None)
+            self._evict()
+
+    def _evict(self):
+        """한도를 넘으면 오래된 경기부터 내보냄 (방금 쓴 경기는 남긴다, lock 안에서 호출)"""
+        sizes = {match_id: data_nbytes(data) for match_id, data in self._loaded.items()}
+        used = sum(sizes.values())
+        while used > self.max_bytes and len(self._loaded) > 1:
+            match_id, _ = self._loaded.popitem(last=False)
+            used -= sizes[match_id]
+            print(f"경기 캐시에서 제거: {match_id}")
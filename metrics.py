@@ -0,0 +1,315 @@
+"""
+계측 - 수집 단계별 시간/메모리와 Flask 라우트별 응답 시간/크기 (Prometheus 텍스트 형식)
+
+외부 라이브러리 없이 카운터/게이지/히스토그램을 프로세스 안에 모아 두고
+/api/metrics에서 Prometheus 텍스트 형식(0.0.4)으로 내보낸다. 관측 한 번은 잠금 한 번과
+덧셈 몇 번뿐이라 운영 환경에서 켜 둔 채로 쓸 수 있다.
+
+    with stage('app_direct', 'parse'):      수집 단계 시간 + 단계 직후 RSS
+        ...
+    timer = StageTimer('simple_processor')   이어지는 단계는 timer.mark('parse') 등으로
+    instrument(app)                          라우트별 지연 히스토그램 + 응답 바이트 수
+                                             /api/metrics, PROFILE_REQUESTS=1이면 ?profile=1
+
+스트리밍 응답은 본문을 다 보낸 시점에 시간을 기록하므로 인코딩/전송 시간이 포함된다.
+PROFILE_REQUESTS=1로 켠 서버에서 아무 요청에 profile=1을 붙이면 그 요청 하나만
+cProfile로 실행하고 응답 대신 누적 시간 순 통계(text/plain)를 돌려준다.
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_ENABLED = os.environ.get('PROFILE_REQUESTS') == '1'
+# 프로파일 결과에 보여 줄 함수 수
+PROFILE_LINES = 40
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def rss_bytes():
+    """현재 RSS (Linux /proc, 없으면 None)"""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_bytes():
+    """최대 RSS (Linux는 KB 단위 / macOS는 바이트 단위, 알 수 없으면 None)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _label_text(names, values):
+    if not names:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in values)
+    return '{' + ','.join(f'{n}="{v}"' for n, v in zip(names, escaped)) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """라벨 값 조합별 값을 가진 지표 하나"""
+
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def samples(self):
+        """(이름 접미사, 라벨 이름, 라벨 값, 값) 목록"""
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        for suffix, names, values, value in self.samples():
+            lines.append(f'{self.name}{suffix}{_label_text(names, values)} {_number(value)}')
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [('', self.labels, key, value) for key, value in sorted(self._values.items())]
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, *label_values):
+        with self._lock:
+            self._values[label_values] = value
+
+    def samples(self):
+        with self._lock:
+            return [('', self.labels, key, value) for key, value in sorted(self._values.items())]
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            counts = entry[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        names = self.labels + ('le',)
+        result = []
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets, counts):
+                    cumulative += n
+                    result.append(('_bucket', names, key + (_number(float(bound)),), cumulative))
+                result.append(('_bucket', names, key + ('+Inf',), count))
+                result.append(('_sum', self.labels, key, total))
+                result.append(('_count', self.labels, key, count))
+        return result
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Prometheus 텍스트 형식 (프로세스 메모리 지표는 이 시점 값)"""
+        rss = rss_bytes() or 0
+        process_rss.set(rss)
+        process_peak_rss.set(max(peak_rss_bytes() or 0, rss))
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+stage_seconds = registry.add(Histogram(
+    'fps_ingest_stage_seconds', '수집 단계별 소요 시간 (초)', ('loader', 'stage'), STAGE_BUCKETS))
+stage_last_seconds = registry.add(Gauge(
+    'fps_ingest_stage_last_seconds', '수집 단계의 마지막 소요 시간 (초)', ('loader', 'stage')))
+stage_rss = registry.add(Gauge(
+    'fps_ingest_stage_rss_bytes', '수집 단계 직후 RSS (바이트)', ('loader', 'stage')))
+stage_rss_delta = registry.add(Gauge(
+    'fps_ingest_stage_rss_delta_bytes', '수집 단계 동안의 RSS 변화 (바이트)', ('loader', 'stage')))
+ingest_rows = registry.add(Counter(
+    'fps_ingest_rows_total', '수집한 CSV 행 수', ('loader',)))
+request_seconds = registry.add(Histogram(
+    'fps_http_request_duration_seconds', '라우트별 응답 시간 (스트리밍은 본문 전송 완료까지, 초)',
+    ('route', 'method', 'status')))
+response_bytes = registry.add(Counter(
+    'fps_http_response_bytes_total', '라우트별 응답 본문 바이트 수', ('route', 'method', 'status')))
+response_size = registry.add(Histogram(
+    'fps_http_response_size_bytes', '라우트별 응답 본문 크기 (바이트)', ('route',), SIZE_BUCKETS))
+process_rss = registry.add(Gauge('fps_process_rss_bytes', '현재 RSS (바이트)'))
+process_peak_rss = registry.add(Gauge('fps_process_peak_rss_bytes', '최대 RSS (바이트)'))
+
+
+# 로더별 단계 -> 마지막 소요 시간 (실행 순서대로, CLI 출력용)
+_last_stages = {}
+
+
+def _record_stage(loader, name, elapsed, before, after):
+    _last_stages.setdefault(loader, {})[name] = elapsed
+    stage_seconds.observe(elapsed, loader, name)
+    stage_last_seconds.set(elapsed, loader, name)
+    if before is not None and after is not None:
+        stage_rss.set(after, loader, name)
+        stage_rss_delta.set(after - before, loader, name)
+
+
+@contextmanager
+def stage(loader, name):
+    """수집 단계 하나의 시간과 메모리 기록"""
+    before = rss_bytes()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record_stage(loader, name, time.perf_counter() - started, before, rss_bytes())
+
+
+class StageTimer:
+    """순서대로 이어지는 단계 기록 - mark(name)은 직전 mark 이후를 name 단계로 기록"""
+
+    def __init__(self, loader):
+        self.loader = loader
+        self._started = time.perf_counter()
+        self._rss = rss_bytes()
+
+    def mark(self, name):
+        now, rss = time.perf_counter(), rss_bytes()
+        _record_stage(self.loader, name, now - self._started, self._rss, rss)
+        self._started, self._rss = now, rss
+
+
+def stage_summary(loader):
+    """로더의 단계별 마지막 소요 시간 문자열 (CLI 출력용)"""
+    return ', '.join(f'{name} {elapsed:.2f}s' for name, elapsed in _last_stages.get(loader, {}).items())
+
+
+# Flask
+
+def _route_label(request):
+    """경로 변수 대신 라우트 규칙(/api/matches/<match_id>/...)으로 묶는다"""
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def _observe(route, method, status, elapsed, size):
+    request_seconds.observe(elapsed, route, method, status)
+    response_bytes.inc(size, route, method, status)
+    response_size.observe(size, route)
+
+
+def _counted(iterable, route, method, status, started):
+    """스트리밍 본문을 넘기면서 크기(바이트)를 세고, 다 보내면 전체 시간 기록"""
+    size = 0
+    try:
+        for chunk in iterable:
+            # 문자열 조각은 전송될 UTF-8 바이트 수로 센다
+            size += len(chunk.encode('utf-8')) if isinstance(chunk, str) else len(chunk)
+            yield chunk
+    finally:
+        _observe(route, method, status, time.perf_counter() - started, size)
+        close = getattr(iterable, 'close', None)
+        if close is not None:
+            close()
+
+
+def _profile_response(profile, response):
+    from flask import Response
+
+    text = io.StringIO()
+    stats = pstats.Stats(profile, stream=text)
+    stats.sort_stats('cumulative').print_stats(PROFILE_LINES)
+    return Response(text.getvalue(), mimetype='text/plain')
+
+
+def instrument(app):
+    """Flask 앱에 라우트 계측, /api/metrics, (PROFILE_REQUESTS=1이면) profile=1 요청 프로파일 추가"""
+    from flask import Response, g, request
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+        if PROFILE_ENABLED and request.args.get('profile') == '1':
+            g.metrics_profile = cProfile.Profile()
+            g.metrics_profile.enable()
+
+    @app.after_request
+    def _record(response):
+        started = g.pop('metrics_started', None)
+        profile = g.pop('metrics_profile', None)
+        if profile is not None:
+            # 스트리밍 본문도 프로파일 안에서 끝까지 만든다
+            response.get_data()
+            profile.disable()
+            return _profile_response(profile, response)
+        if started is None:
+            return response
+
+        route, method, status = _route_label(request), request.method, str(response.status_code)
+        if response.is_streamed:
+            response.response = _counted(response.response, route, method, status, started)
+        else:
+            _observe(route, method, status, time.perf_counter() - started, response.content_length or 0)
+        return response
+
+    @app.route('/api/metrics')
+    def get_metrics():
+        """Prometheus 텍스트 형식 지표"""
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+    return app
@@ -0,0 +1,121 @@
+"""
+플레이어 중심 궤적 저장소 - 틱 중심 TickStore를 플레이어별 연속 배열로 전치
+
+positions는 틱마다 플레이어 목록을 담고 있어, 한 플레이어의 궤적(따라가기, 이전/다음 이동,
+트레일, K/D)을 얻으려면 모든 틱의 플레이어 목록을 훑어야 했다. 로드 시 행을 플레이어
+순으로 한 번 정렬해 두면(안정 정렬이라 플레이어 안에서는 틱 순서 그대로) 플레이어 하나의
+행은 offsets[p]:offsets[p + 1] 연속 구간이 되고, 틱 구간은 그 안에서 이진 탐색으로
+잘라 내므로 조회 비용은 결과 크기에 비례한다.
+
+    tick_index / position / health / rounds / team_ids / yaw / pitch   샘플 단위 값
+    (tick / game_time은 tick_index로 저장소에서 읽는다)
+    생존 구간: 같은 플레이어, 같은 라운드에서 health > 0 여부가 같은 연속 샘플
+
+    start_tick, end_tick, start_time, end_time, offset, limit   (api_query.py와 같은 규칙)
+"""
+import numpy as np
+
+from api_query import MAX_TICKS_PER_PAGE, page_info, parse_range_args
+from tick_store import COORD_DECIMALS, nan_to_none
+
+
+class PlayerTracks:
+    """플레이어별로 연속 배치한 샘플 배열 + 생존/사망 구간"""
+
+    def __init__(self, store):
+        self.store = store
+        counts = np.bincount(store.player_ids, minlength=len(store.players)) if store.n_rows \
+            else np.zeros(len(store.players), dtype=np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+        order = np.argsort(store.player_ids, kind='stable')
+        row_ticks = np.repeat(np.arange(store.n_ticks, dtype=np.int64), np.diff(store.tick_offsets))
+        self.tick_index = row_ticks[order]
+        self.position = store.position[order]
+        self.health = store.health[order]
+        self.rounds = store.rounds[order]
+        self.team_ids = store.team_ids[order]
+        self.yaw = store.yaw[order]
+        self.pitch = store.pitch[order]
+
+        # 생존/사망 구간: 플레이어, 라운드, 생존 여부 중 하나라도 바뀌면 새 구간
+        alive = self.health > 0
+        player_of = np.repeat(np.arange(len(counts)), counts)
+        starts = np.ones(len(alive), dtype=bool)
+        starts[1:] = ((alive[1:] != alive[:-1]) | (self.rounds[1:] != self.rounds[:-1])
+                      | (player_of[1:] != player_of[:-1]))
+        self.interval_starts = np.flatnonzero(starts)
+        self.interval_ends = np.append(self.interval_starts[1:], len(alive)).astype(np.int64)
+        self.interval_alive = alive[self.interval_starts]
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in (
+            'offsets', 'tick_index', 'position', 'health', 'rounds', 'team_ids',
+            'yaw', 'pitch', 'interval_starts', 'interval_ends', 'interval_alive'))
+
+    def sample_range(self, player_id, lo, hi):
+        """플레이어 샘플 중 틱 인덱스 구간 [lo, hi)에 속하는 범위 [i, j) (전체 배열 기준)"""
+        first, last = int(self.offsets[player_id]), int(self.offsets[player_id + 1])
+        ticks = self.tick_index[first:last]
+        return (first + int(np.searchsorted(ticks, lo, side='left')),
+                first + int(np.searchsorted(ticks, hi, side='left')))
+
+    def samples(self, i, j):
+        """샘플 범위 [i, j)를 positions의 플레이어 항목과 같은 형식으로"""
+        store = self.store
+        teams = store.teams
+        tick_index = self.tick_index[i:j]
+        ticks = store.tick_values[tick_index].tolist()
+        times = store.tick_times[tick_index].tolist()
+        coords = np.round(self.position[i:j].astype(np.float64), COORD_DECIMALS).tolist()
+        return [
+            {'tick': tick, 'game_time': t, 'team': teams[team], 'position': position,
+             'health': health, 'round': round_num, 'yaw': yaw, 'pitch': pitch}
+            for tick, t, team, position, health, round_num, yaw, pitch in zip(
+                ticks, times, self.team_ids[i:j].tolist(), coords,
+                self.health[i:j].tolist(), self.rounds[i:j].tolist(),
+                nan_to_none(self.yaw[i:j]), nan_to_none(self.pitch[i:j]))
+        ]
+
+    def intervals(self, i, j):
+        """샘플 범위 [i, j)와 겹치는 생존/사망 구간 (구간 자체는 자르지 않는다)"""
+        if i >= j:
+            return []
+        k = int(np.searchsorted(self.interval_ends, i, side='right'))
+        stop = int(np.searchsorted(self.interval_starts, j, side='left'))
+        store = self.store
+        result = []
+        for start, end, alive in zip(self.interval_starts[k:stop].tolist(), self.interval_ends[k:stop].tolist(),
+                                     self.interval_alive[k:stop].tolist()):
+            first, last = self.tick_index[start], self.tick_index[end - 1]
+            result.append({
+                'alive': alive,
+                'round': int(self.rounds[start]),
+                'start_tick': int(store.tick_values[first]),
+                'end_tick': int(store.tick_values[last]),
+                'start_time': float(store.tick_times[first]),
+                'end_time': float(store.tick_times[last])
+            })
+        return result
+
+    def track(self, name, args):
+        """/api/players/<name>/track 응답 (없는 플레이어면 None)"""
+        player_id = self.store.player_id(name)
+        if player_id is None:
+            return None
+        query = parse_range_args(args)
+        lo, hi = self.store.index_range(query['start_tick'], query['end_tick'],
+                                        query['start_time'], query['end_time'])
+        i, j = self.sample_range(player_id, lo, hi)
+        # 페이지는 이 플레이어의 샘플 단위로 나눈다
+        limit = query['limit']
+        if limit is None or limit <= 0 or limit > MAX_TICKS_PER_PAGE:
+            limit = MAX_TICKS_PER_PAGE
+        start = min(i + query['offset'], j)
+        stop = min(start + limit, j)
+        result = {'player': name}
+        result.update(page_info(i, j, start, stop))
+        result['track'] = self.samples(start, stop)
+        result['intervals'] = self.intervals(i, j)
+        return result
@@ -0,0 +1,159 @@
+"""
+재생 속도용 재샘플링 - 경기 위치를 일정한 game_time 간격의 프레임으로 보간
+
+원본 틱은 간격이 고르지 않고(빠진 행), 빠른 배속에서는 화면이 그릴 수 있는 것보다 많은
+프레임을 보낸다. rate=R이면 첫 틱 시각부터 1/R초 간격 격자를 만들고, 플레이어마다
+플레이어 중심 궤적(player_tracks.py)에서 격자 시각 직전/직후 샘플을 이진 탐색으로 찾아
+한꺼번에 보간한다. 결과는 TickStore이므로 positions 계열 엔드포인트가 그대로 인코딩한다.
+
+    위치, pitch      선형 보간
+    yaw              짧은 쪽 호로 보간 (179° -> -179°는 2° 회전), 결과는 [-180, 180)
+    health           직전 샘플 값 (보간하지 않음)
+    tick             격자 시각의 원본 tick 번호를 선형 보간해 반올림
+
+다음 경우에는 보간하지 않고 직전 샘플을 그대로 쓴다: 두 샘플의 라운드가 다르거나
+(라운드 시작 시 스폰 위치로 이동), 둘 중 하나라도 죽은 상태(사망 위치에 고정, 사망 시각
+이후부터 죽은 상태로 표시). 두 샘플 간격이 GAP_SECONDS보다 길면(기록이 빠진 구간)
+그 사이 프레임에서 플레이어를 뺀다. 첫 샘플 이전/마지막 샘플 이후도 마찬가지이다.
+
+tick_times는 정렬되어 있다고 가정한다 (TickStore.index_range와 같은 가정).
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from tick_store import TickStore
+
+RATE_PARAMS = ('rate',)
+# 허용 rate 범위 (초당 프레임, MIN_RATE보다 작으면 400, MAX_RATE보다 크면 잘라 냄)
+MIN_RATE = 1.0
+MAX_RATE = 128.0
+# 경기마다 보관하는 rate 수 (오래 쓰지 않은 것부터 버린다)
+MAX_CACHED_RATES = 8
+# 이보다 긴 샘플 간격은 보간하지 않고 비운다 (초)
+GAP_SECONDS = 0.5
+# 격자 시각 소수점 자리수
+TIME_DECIMALS = 4
+
+
+def _shortest_arc(yaw0, yaw1, fraction):
+    """yaw0 -> yaw1 짧은 쪽 호 위의 fraction 지점 ([-180, 180))"""
+    delta = (yaw1 - yaw0 + 180.0) % 360.0 - 180.0
+    return (yaw0 + fraction * delta + 180.0) % 360.0 - 180.0
+
+
+def _player_frames(tracks, times, first, last, grid):
+    """플레이어 한 명(샘플 [first, last))의 격자 프레임
+
+    반환값: (present bool[n], 샘플 인덱스 s0, s1, 보간 비율 fraction, 보간 여부 blend)
+    """
+    t = times[tracks.tick_index[first:last]]
+    count = last - first
+    k = np.searchsorted(t, grid, side='right') - 1
+    k0 = np.clip(k, 0, count - 1)
+    k1 = np.minimum(k0 + 1, count - 1)
+    dt = t[k1] - t[k0]
+    exact = t[k0] == grid
+    gap = dt > GAP_SECONDS
+    present = (k >= 0) & (grid <= t[-1]) & (~gap | exact)
+
+    s0, s1 = first + k0, first + k1
+    blend = ((dt > 0) & ~gap & (tracks.rounds[s0] == tracks.rounds[s1])
+             & (tracks.health[s0] > 0) & (tracks.health[s1] > 0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fraction = np.where(blend, (grid - t[k0]) / dt, 0.0)
+    return present, s0, s1, fraction, blend
+
+
+def resample(store, tracks, rate):
+    """store를 1/rate초 간격 격자로 보간한 새 TickStore (tracks: store의 PlayerTracks)"""
+    if not store.n_ticks or not store.n_rows:
+        return store
+    start, end = float(store.tick_times[0]), float(store.tick_times[-1])
+    n_frames = int(np.floor((end - start) * rate + 1e-9)) + 1
+    grid = start + np.arange(n_frames, dtype=np.float64) / rate
+    grid_ticks = np.rint(np.interp(grid, store.tick_times, store.tick_values)).astype(np.int64)
+
+    n_players = len(store.players)
+    present = np.zeros((n_players, n_frames), dtype=bool)
+    position = np.zeros((n_players, n_frames, 3), dtype=np.float32)
+    health = np.zeros((n_players, n_frames), dtype=np.float32)
+    rounds = np.zeros((n_players, n_frames), dtype=store.rounds.dtype)
+    team_ids = np.zeros((n_players, n_frames), dtype=store.team_ids.dtype)
+    yaw = np.full((n_players, n_frames), np.nan, dtype=np.float32)
+    pitch = np.full((n_players, n_frames), np.nan, dtype=np.float32)
+
+    for player_id in range(n_players):
+        first, last = int(tracks.offsets[player_id]), int(tracks.offsets[player_id + 1])
+        if first == last:
+            continue
+        present[player_id], s0, s1, fraction, blend = _player_frames(
+            tracks, store.tick_times, first, last, grid)
+
+        p0 = tracks.position[s0].astype(np.float64)
+        p1 = tracks.position[s1].astype(np.float64)
+        position[player_id] = np.where(blend[:, None], p0 + fraction[:, None] * (p1 - p0), p0)
+        y0, y1 = tracks.yaw[s0].astype(np.float64), tracks.yaw[s1].astype(np.float64)
+        yaw[player_id] = np.where(blend, _shortest_arc(y0, y1, fraction), y0)
+        q0, q1 = tracks.pitch[s0].astype(np.float64), tracks.pitch[s1].astype(np.float64)
+        pitch[player_id] = np.where(blend, q0 + fraction * (q1 - q0), q0)
+        health[player_id] = tracks.health[s0]
+        rounds[player_id] = tracks.rounds[s0]
+        team_ids[player_id] = tracks.team_ids[s0]
+
+    # (플레이어, 프레임) -> 프레임 순 행 (프레임 안에서는 플레이어 id 순)
+    keep = present.T
+    player_ids = np.broadcast_to(np.arange(n_players, dtype=store.player_ids.dtype), keep.shape)
+    counts = keep.sum(axis=1)
+    return TickStore(
+        tick_values=grid_ticks,
+        tick_times=np.round(grid, TIME_DECIMALS),
+        tick_offsets=np.concatenate(([0], np.cumsum(counts))).astype(np.int64),
+        player_ids=player_ids[keep],
+        team_ids=team_ids.T[keep],
+        position=position.transpose(1, 0, 2)[keep],
+        health=health.T[keep],
+        rounds=rounds.T[keep],
+        yaw=yaw.T[keep],
+        pitch=pitch.T[keep],
+        players=store.players,
+        teams=store.teams
+    )
+
+
+class Resampler:
+    """경기 하나의 rate별 재샘플링 저장소 (처음 요청한 rate만 만들어 보관)"""
+
+    def __init__(self, store, tracks):
+        self.store = store
+        self.tracks = tracks
+        self._stores = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        return sum(store.nbytes for store in list(self._stores.values()))
+
+    def rate_store(self, rate):
+        with self._lock:
+            store = self._stores.get(rate)
+            if store is None:
+                store = resample(self.store, self.tracks, rate)
+                self._stores[rate] = store
+                while len(self._stores) > MAX_CACHED_RATES:
+                    self._stores.popitem(last=False)
+            self._stores.move_to_end(rate)
+            return store
+
+
+def has_rate_args(args):
+    return 'rate' in args
+
+
+def parse_rate(args):
+    """rate 파라미터 (초당 프레임, MAX_RATE보다 크면 잘라 냄), 숫자가 아니거나 MIN_RATE보다 작으면 None"""
+    rate = args.get('rate', type=float)
+    if rate is None or not np.isfinite(rate) or rate < MIN_RATE:
+        return None
+    return round(min(rate, MAX_RATE), 3)
@@ -0,0 +1,211 @@
+"""
+응답 캐시 - 엔드포인트 응답을 한 번만 인코딩/압축해 두고 재사용
+
+요청(경로 + 쿼리 문자열)마다 JSON을 한 번 인코딩하면서 gzip(가능하면 zstd도)으로
+압축한 바이트열과 강한 ETag를 만들어 둔다. 처음 요청은 인코딩하는 대로 스트리밍하고
+(응답 전체를 메모리에 모으지 않음), 이후 요청은 Accept-Encoding에 맞는 변형을 그대로
+돌려주고, If-None-Match가 일치하면 304만 응답한다.
+
+캐시는 로드된 데이터(_data_cache / SIMULATION_DATA)마다 하나씩 만들어지므로
+데이터를 다시 읽으면 새 캐시로 바뀌어 자동으로 무효화된다.
+"""
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+
+from flask import Response, request, stream_with_context
+
+try:
+    import zstandard
+except ImportError:  # 선택 의존성
+    zstandard = None
+
+# 캐시 전체 최대 크기 (압축본 + 원본 합계)
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+# 이보다 큰 응답은 비압축 원본을 보관하지 않고 요청 시 스트리밍으로 다시 만든다
+MAX_IDENTITY_BYTES = 4 * 1024 * 1024
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+
+
+class CachedPayload:
+    """인코딩이 끝난 응답 한 건 (ETag + 인코딩별 바이트열)"""
+
+    def __init__(self, digest, variants):
+        self.digest = digest
+        self.variants = variants  # 'identity' / 'gzip' / 'zstd' -> bytes
+
+    @property
+    def nbytes(self):
+        return sum(len(body) for body in self.variants.values())
+
+    def etag(self, encoding):
+        # 강한 ETag는 표현(인코딩)마다 달라야 한다
+        return self.digest if encoding == 'identity' else f'{self.digest}-{encoding}'
+
+
+class PayloadEncoder:
+    """문자열 조각을 받을 때마다 해시와 압축본(gzip / zstd)을 이어서 만든다
+
+    압축본 합계가 max_bytes를 넘으면 조각을 더 보관하지 않고(캐시하지 않음) 출력만 돌려준다.
+    """
+
+    def __init__(self, max_bytes=MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.digest = hashlib.sha1()
+        self.compressors = {'gzip': zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)}  # wbits=31: gzip 헤더
+        if zstandard:
+            self.compressors['zstd'] = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+        self.parts = {name: [] for name in self.compressors}
+        self.size = 0
+        self.identity = []
+        self.identity_size = 0
+
+    @property
+    def encodings(self):
+        return tuple(self.compressors) + ('identity',)
+
+    def _keep(self, outputs):
+        if self.parts is None:
+            return
+        for name in self.compressors:
+            self.parts[name].append(outputs[name])
+            self.size += len(outputs[name])
+        if self.size > self.max_bytes:
+            self.parts = self.identity = None
+
+    def feed(self, chunk):
+        """조각 하나를 넣고 인코딩별 출력 반환 (압축 출력은 비어 있을 수 있다)"""
+        data = chunk.encode('utf-8')
+        self.digest.update(data)
+        outputs = {name: obj.compress(data) for name, obj in self.compressors.items()}
+        outputs['identity'] = data
+        self._keep(outputs)
+        if self.identity is not None:
+            self.identity_size += len(data)
+            self.identity.append(data)
+            if self.identity_size > MAX_IDENTITY_BYTES:
+                self.identity = None
+        return outputs
+
+    def finish(self):
+        """(인코딩별 남은 출력, CachedPayload) - 한도를 넘었으면 CachedPayload는 None"""
+        outputs = {name: obj.flush() for name, obj in self.compressors.items()}
+        outputs['identity'] = b''
+        self._keep(outputs)
+        if self.parts is None:
+            return outputs, None
+        variants = {name: b''.join(parts) for name, parts in self.parts.items()}
+        if self.identity is not None:
+            variants['identity'] = b''.join(self.identity)
+        return outputs, CachedPayload(self.digest.hexdigest(), variants)
+
+
+def encode_payload(chunks):
+    """문자열 조각들을 한 번 훑으면서 해시와 압축본을 동시에 만든다"""
+    encoder = PayloadEncoder(max_bytes=float('inf'))
+    for chunk in chunks:
+        encoder.feed(chunk)
+    return encoder.finish()[1]
+
+
+class ResponseCache:
+    """요청 키별 CachedPayload를 크기 한도 안에서 LRU로 보관"""
+
+    def __init__(self, max_bytes=MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        return self._size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def get(self, key, produce):
+        """캐시된 응답 반환, 없으면 produce()로 만들어 저장"""
+        entry = self.lookup(key)
+        if entry is None:
+            entry = encode_payload(produce())
+            self.store(key, entry)
+        return entry
+
+    def lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def store(self, key, entry):
+        with self._lock:
+            if key not in self._entries and entry.nbytes <= self.max_bytes:
+                self._entries[key] = entry
+                self._size += entry.nbytes
+                while self._size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= evicted.nbytes
+
+    def respond(self, produce, mimetype='application/json'):
+        """현재 요청에 맞는 캐시 응답 (304 / 압축본 / 원본)
+
+        produce: JSON 문자열 조각을 생성하는 함수. 캐시에 없으면 조각을 인코딩하면서 바로
+        스트리밍하고 끝까지 보낸 뒤에 캐시에 넣는다 (이 응답에는 아직 ETag가 없다).
+        원본을 보관하지 않은 큰 응답을 비압축으로 보낼 때도 다시 호출한다.
+        요청 하나에서 produce()는 한 번만 호출한다.
+        """
+        key = request.full_path
+        entry = self.lookup(key)
+        if entry is None:
+            return self._stream(key, produce, mimetype)
+        encoding = _choose_encoding(entry.variants)
+        etag = entry.etag(encoding)
+
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        elif encoding == 'identity' and 'identity' not in entry.variants:
+            response = Response(stream_with_context(produce()), mimetype=mimetype)
+        else:
+            response = Response(entry.variants[encoding], mimetype=mimetype)
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def _stream(self, key, produce, mimetype):
+        """캐시에 없는 응답을 인코딩하면서 스트리밍 (끝까지 보내면 캐시에 저장)"""
+        encoder = PayloadEncoder(self.max_bytes)
+        encoding = _choose_encoding(encoder.encodings)
+
+        def generate():
+            for chunk in produce():
+                body = encoder.feed(chunk)[encoding]
+                if body:
+                    yield body
+            outputs, entry = encoder.finish()
+            if outputs[encoding]:
+                yield outputs[encoding]
+            if entry is not None:
+                self.store(key, entry)
+
+        response = Response(stream_with_context(generate()), mimetype=mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+def _choose_encoding(available):
+    """Accept-Encoding 중 available에 있는 가장 작은 변형 선택 (zstd > gzip > 원본)"""
+    accepted = request.accept_encodings
+    for encoding in ('zstd', 'gzip'):
+        if encoding in available and accepted[encoding]:
+            return encoding
+    return 'identity'
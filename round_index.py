@@ -0,0 +1,116 @@
+"""
+라운드 색인 - 라운드별 틱 구간/시간/킬 수와 라운드 단위 샤드
+
+행마다 있는 round 값으로 라운드 경계(틱 인덱스 구간, 시작/끝 tick과 game_time,
+킬 수)를 계산한다. store_cache는 전처리 캐시를 저장할 때 이 표와 함께 라운드마다
+위치 배열과 이벤트를 따로 기록하고(rounds/<번호>/), 서버는 라운드를 처음 요청받을 때
+그 라운드의 파일만 메모리 매핑으로 읽는다. 캐시 샤드가 없으면(.csd, 캐시 저장 실패)
+로드된 저장소의 같은 구간을 뷰로 잘라 쓴다.
+
+    /api/rounds                       라운드 목록 (round, start/end_tick, start/end_time, ticks, rows, kills)
+    /api/rounds/<n>/positions         라운드 n의 positions (구간/페이지 파라미터 사용 가능)
+    /api/rounds/<n>/events            라운드 n의 이벤트
+
+라운드 구간은 그 라운드 번호를 가진 첫 틱부터 마지막 틱까지이며, 플레이어 행이 없는 틱은
+경계를 정할 때 건너뛴다.
+"""
+import threading
+from collections import Counter
+
+import numpy as np
+
+# /api/rounds 응답에 넣지 않는 내부 값 (저장소 틱 인덱스)
+INTERNAL_FIELDS = ('start_index', 'end_index')
+
+
+def round_bounds(store):
+    """(라운드 번호, 시작 틱 인덱스, 끝 틱 인덱스(미포함)) 목록 - 라운드 번호 순"""
+    tick_rounds = store.tick_rounds()
+    with_rows = np.flatnonzero(tick_rounds >= 0)
+    if not len(with_rows):
+        return []
+    rounds = tick_rounds[with_rows]
+    numbers, first = np.unique(rounds, return_index=True)
+    _, last_reversed = np.unique(rounds[::-1], return_index=True)
+    last = len(rounds) - 1 - last_reversed
+    return [(int(n), int(with_rows[a]), int(with_rows[b]) + 1)
+            for n, a, b in zip(numbers.tolist(), first.tolist(), last.tolist())]
+
+
+def round_table(store, event_rounds):
+    """라운드별 경계와 킬 수 (event_rounds: 이벤트마다의 라운드 번호, 없으면 None)"""
+    kills = Counter(r for r in event_rounds if r is not None)
+    table = []
+    for round_num, start, stop in round_bounds(store):
+        row_start, row_stop = store.row_range(start, stop)
+        table.append({
+            'round': round_num,
+            'start_index': start,
+            'end_index': stop,
+            'start_tick': int(store.tick_values[start]),
+            'end_tick': int(store.tick_values[stop - 1]),
+            'start_time': float(store.tick_times[start]),
+            'end_time': float(store.tick_times[stop - 1]),
+            'ticks': stop - start,
+            'rows': row_stop - row_start,
+            'kills': kills.get(round_num, 0)
+        })
+    return table
+
+
+class RoundShard:
+    """라운드 하나의 저장소와 이벤트(tick 순)"""
+
+    def __init__(self, store, events, from_disk=False):
+        self.store = store
+        self.events = events
+        self.from_disk = from_disk
+
+
+class RoundIndex:
+    """라운드 표 + 처음 요청 시 로드하는 라운드 샤드
+
+    shards: store_cache.load_rounds()의 (샤드 디렉터리, 라운드 표), 없으면 저장소에서 계산
+    """
+
+    def __init__(self, store, event_index, shards=None):
+        self.store = store
+        self.event_index = event_index
+        if shards is not None:
+            self.directory, self.table = shards
+        else:
+            self.directory, self.table = None, round_table(store, event_index.rounds)
+        self._rows = {row['round']: row for row in self.table}
+        self._shards = {}
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        """디스크에서 읽은 샤드 배열 크기 (잘라 낸 뷰는 원본 저장소와 메모리를 공유)"""
+        return sum(shard.store.nbytes for shard in list(self._shards.values()) if shard.from_disk)
+
+    def rounds(self):
+        """/api/rounds 응답용 라운드 목록"""
+        return [{k: v for k, v in row.items() if k not in INTERNAL_FIELDS} for row in self.table]
+
+    def get(self, round_num):
+        """라운드 샤드 (처음이면 로드), 없는 라운드면 None"""
+        row = self._rows.get(round_num)
+        if row is None:
+            return None
+        with self._lock:
+            shard = self._shards.get(round_num)
+            if shard is None:
+                shard = self._load(row)
+                self._shards[round_num] = shard
+            return shard
+
+    def _load(self, row):
+        if self.directory is not None:
+            import store_cache
+            loaded = store_cache.load_round(self.directory, row['round'], self.store.players, self.store.teams)
+            if loaded is not None:
+                return RoundShard(*loaded, from_disk=True)
+        ids = self.event_index.by_round.get(row['round'], ())
+        events = [self.event_index.events[i] for i in np.asarray(ids).tolist()]
+        return RoundShard(self.store.slice_ticks(row['start_index'], row['end_index']), events)
@@ -5,7 +5,11 @@ import csv
 import json
 from collections import defaultdict
 
+from metrics import StageTimer, ingest_rows
+
 def process_csv_to_json(csv_path, output_path):
+    timer = StageTimer('simple_processor')
+    rows = 0
     positions = []
     events = []
     
@@ -17,6 +21,7 @@ def process_csv_to_json(csv_path, output_path):
         reader = csv.DictReader(f)
         
         for row in reader:
+            rows += 1
             tick = int(row['tick']) if row['tick'] else None
             game_time = float(row['game_time']) if row['game_time'] else 0.0
             
@@ -97,6 +102,9 @@ def process_csv_to_json(csv_path, output_path):
                 'players': tick_data.get('players', [])
             })
     
+    timer.mark('parse')
+    ingest_rows.inc(rows, 'simple_processor')
+    
     # 메타데이터 생성
     game_times = [p['game_time'] for p in positions]
     ticks = [p['tick'] for p in positions]
@@ -127,10 +135,12 @@ def process_csv_to_json(csv_path, output_path):
         'positions': positions,
         'events': events
     }
+    timer.mark('metadata')
     
     # JSON 저장
     with open(output_path, 'w', encoding='utf-8') as f:
         json.dump(result, f, indent=2, ensure_ascii=False)
+    timer.mark('serialization')
     
     print(f"Processed {metadata['total_ticks']} ticks")
     print(f"Found {metadata['total_events']} events")
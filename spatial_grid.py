@@ -0,0 +1,298 @@
+"""
+공간 격자 색인 - 히트맵(점유/킬/데스)과 반경 내 플레이어 조회
+
+맵 경계(모든 위치의 X/Y 범위)를 README의 구역 표시와 같은 10x10 격자로 나누고
+(행 A~J, 열 1~10 -> 'A1' ~ 'J10'), 처음 요청 시 종류별로 한 번만
+(라운드, 플레이어, 팀, 행, 열) 5차원 히스토그램을 np.histogramdd로 만들어 둔다.
+라운드/팀/플레이어 필터는 이 큐브를 해당 축으로 잘라 더하기만 하므로
+라운드를 여러 개 합치거나 필터를 바꿔도 위치를 다시 세지 않는다.
+
+    kind=occupancy   플레이어 위치 샘플 수 (틱 수)
+    kind=kills       킬 이벤트의 공격자 위치
+    kind=deaths      킬 이벤트의 피해자 위치
+
+반경 조회는 더 촘촘한 균일 격자(INDEX_CELLS x INDEX_CELLS)에 행 번호를 셀별로
+정렬해 두고, 원과 겹치는 셀의 행 중 틱 구간에 드는 것만 이진 탐색으로 잘라
+거리를 계산한다 (한 틱처럼 구간이 짧으면 구간의 행을 바로 본다).
+"""
+import threading
+
+import numpy as np
+
+# 히트맵 격자 크기 (README 구역 표시와 동일)
+GRID_SIZE = 10
+# 반경 조회용 색인 격자 크기 (축마다)
+INDEX_CELLS = 64
+HEATMAP_KINDS = ('occupancy', 'kills', 'deaths')
+# 반경 조회 결과 최대 행 수
+MAX_NEARBY_ROWS = 5000
+
+
+def zone_label(row, col):
+    """격자 칸 이름 (행 A~, 열 1~)"""
+    return f'{chr(ord("A") + row)}{col + 1}'
+
+
+class SpatialGrid:
+    """경기 하나의 공간 격자 (히트맵 큐브와 반경 조회 색인은 처음 요청 시 생성)"""
+
+    def __init__(self, store, event_index, size=GRID_SIZE):
+        self.store = store
+        self.event_index = event_index
+        self.size = size
+        finite = np.isfinite(store.position[:, 0]) & np.isfinite(store.position[:, 1])
+        plane = store.position[finite, :2]
+        if len(plane):
+            self.min_x, self.min_y = (float(v) for v in plane.min(axis=0))
+            self.max_x, self.max_y = (float(v) for v in plane.max(axis=0))
+        else:
+            self.min_x = self.min_y = 0.0
+            self.max_x = self.max_y = 1.0
+        # 경계가 한 점이면 칸 크기가 0이 되지 않도록 넓힌다
+        if self.max_x <= self.min_x:
+            self.max_x = self.min_x + 1.0
+        if self.max_y <= self.min_y:
+            self.max_y = self.min_y + 1.0
+
+        self.rounds = np.unique(np.concatenate((
+            store.rounds.astype(np.int64),
+            np.array([r for r in event_index.rounds if r is not None], dtype=np.int64))))
+        # 저장소에 없는 이벤트의 플레이어/팀 이름은 뒤에 붙인다 (저장소 id는 그대로 유지)
+        self.players = list(store.players)
+        self.teams = list(store.teams)
+        for event in event_index.events:
+            for side in ('attacker', 'victim'):
+                who = event.get(side) or {}
+                if who.get('name') not in self.players:
+                    self.players.append(who.get('name'))
+                if who.get('team') not in self.teams:
+                    self.teams.append(who.get('team'))
+        self._cubes = {}
+        self._index = None
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        size = sum(cube.nbytes for cube in self._cubes.values())
+        if self._index is not None:
+            size += sum(a.nbytes for a in self._index)
+        return size
+
+    def bounds(self):
+        return {'min_x': self.min_x, 'max_x': self.max_x, 'min_y': self.min_y, 'max_y': self.max_y}
+
+    def _clip(self, x, y):
+        """경계 밖 좌표(이벤트 위치 등)는 가장자리 칸에 넣는다"""
+        return np.clip(x, self.min_x, self.max_x), np.clip(y, self.min_y, self.max_y)
+
+    def _histogram(self, rounds, players, teams, x, y):
+        """(라운드, 플레이어, 팀, 행(y), 열(x)) 히스토그램"""
+        x, y = self._clip(x, y)
+        round_code = np.searchsorted(self.rounds, rounds)
+        edges = lambda n: np.arange(n + 1) - 0.5
+        cube, _ = np.histogramdd(
+            (round_code, players, teams, y, x),
+            bins=(edges(len(self.rounds)), edges(len(self.players)), edges(len(self.teams)),
+                  np.linspace(self.min_y, self.max_y, self.size + 1),
+                  np.linspace(self.min_x, self.max_x, self.size + 1)))
+        return cube.astype(np.int64)
+
+    def _build_occupancy(self):
+        store = self.store
+        finite = np.isfinite(store.position[:, 0]) & np.isfinite(store.position[:, 1])
+        return self._histogram(store.rounds[finite].astype(np.int64), store.player_ids[finite],
+                               store.team_ids[finite], store.position[finite, 0].astype(np.float64),
+                               store.position[finite, 1].astype(np.float64))
+
+    def _build_events(self, side):
+        """킬 이벤트의 공격자(kills) 또는 피해자(deaths) 위치 히스토그램"""
+        rounds, players, teams, xs, ys = [], [], [], [], []
+        for event, round_num in zip(self.event_index.events, self.event_index.rounds):
+            who = event.get(side) or {}
+            position = who.get('position') or []
+            if round_num is None or len(position) < 2 or position[0] is None or position[1] is None:
+                continue
+            rounds.append(round_num)
+            players.append(self.players.index(who.get('name')))
+            teams.append(self.teams.index(who.get('team')))
+            xs.append(position[0])
+            ys.append(position[1])
+        return self._histogram(np.array(rounds, dtype=np.int64), np.array(players, dtype=np.int64),
+                               np.array(teams, dtype=np.int64), np.array(xs, dtype=np.float64),
+                               np.array(ys, dtype=np.float64))
+
+    def cube(self, kind):
+        """종류별 5차원 히스토그램 (처음 한 번만 생성)"""
+        cube = self._cubes.get(kind)
+        if cube is not None:
+            return cube
+        with self._lock:
+            cube = self._cubes.get(kind)
+            if cube is None:
+                if kind == 'occupancy':
+                    cube = self._build_occupancy()
+                else:
+                    cube = self._build_events('attacker' if kind == 'kills' else 'victim')
+                self._cubes[kind] = cube
+        return cube
+
+    def heatmap(self, kind='occupancy', rounds=None, team=None, player=None):
+        """필터에 맞는 size x size 격자 (라운드 목록은 합산, 없는 값이면 0 격자)"""
+        cube = self.cube(kind)
+        selected = cube
+        if rounds is not None:
+            selected = selected[np.flatnonzero(np.isin(self.rounds, rounds))]
+        if player is not None:
+            selected = selected[:, [self.players.index(player)] if player in self.players else []]
+        if team is not None:
+            selected = selected[:, :, [self.teams.index(team)] if team in self.teams else []]
+        return selected.sum(axis=(0, 1, 2))
+
+    def heatmap_report(self, kind='occupancy', rounds=None, team=None, player=None, top=5):
+        counts = self.heatmap(kind, rounds, team, player)
+        flat = counts.ravel()
+        order = np.argsort(-flat, kind='stable')[:top]
+        return {
+            'kind': kind,
+            'filters': {'rounds': rounds.tolist() if rounds is not None else None,
+                        'team': team, 'player': player},
+            'grid': {
+                'size': self.size,
+                'bounds': self.bounds(),
+                'cell_width': (self.max_x - self.min_x) / self.size,
+                'cell_height': (self.max_y - self.min_y) / self.size
+            },
+            'total': int(flat.sum()),
+            'max': int(flat.max()) if len(flat) else 0,
+            'counts': counts.tolist(),
+            'top_zones': [
+                {'zone': zone_label(*divmod(int(i), self.size)), 'count': int(flat[i])}
+                for i in order.tolist() if flat[i] > 0
+            ]
+        }
+
+    # 반경 조회
+
+    def _cell_xy(self, x, y):
+        """좌표 -> 색인 격자 칸 (열, 행)"""
+        x, y = np.nan_to_num(x), np.nan_to_num(y)
+        cx = ((x - self.min_x) / (self.max_x - self.min_x) * INDEX_CELLS).astype(np.int64)
+        cy = ((y - self.min_y) / (self.max_y - self.min_y) * INDEX_CELLS).astype(np.int64)
+        return np.clip(cx, 0, INDEX_CELLS - 1), np.clip(cy, 0, INDEX_CELLS - 1)
+
+    def _build_index(self):
+        """행 번호를 색인 칸별로 모은 (order, offsets) - 칸 안에서는 행 번호(시간) 순"""
+        position = self.store.position
+        finite = np.isfinite(position[:, 0]) & np.isfinite(position[:, 1])
+        cx, cy = self._cell_xy(position[:, 0].astype(np.float64), position[:, 1].astype(np.float64))
+        cell = np.where(finite, cy * INDEX_CELLS + cx, INDEX_CELLS * INDEX_CELLS)
+        order = np.argsort(cell, kind='stable')
+        offsets = np.searchsorted(cell[order], np.arange(INDEX_CELLS * INDEX_CELLS + 1))
+        return order, offsets
+
+    def index(self):
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._build_index()
+        return self._index
+
+    def _candidate_rows(self, x, y, radius, row_start, row_stop):
+        """원과 겹치는 색인 칸의 행 중 [row_start, row_stop)에 드는 행"""
+        order, offsets = self.index()
+        (x0, x1), (y0, y1) = (self._cell_xy(np.array([x - radius, x + radius]),
+                                            np.array([y - radius, y + radius])))
+        cells = (np.arange(y0, y1 + 1)[:, None] * INDEX_CELLS + np.arange(x0, x1 + 1)[None, :]).ravel()
+        if offsets[cells + 1].sum() - offsets[cells].sum() > row_stop - row_start:
+            # 구간이 칸들보다 작으면 구간을 바로 훑는 편이 싸다
+            return np.arange(row_start, row_stop)
+        parts = []
+        for cell in cells.tolist():
+            rows = order[offsets[cell]:offsets[cell + 1]]
+            lo, hi = np.searchsorted(rows, (row_start, row_stop))
+            parts.append(rows[lo:hi])
+        return np.sort(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int64)
+
+    def nearby(self, x, y, radius, start=0, stop=None, z=None, team=None, limit=MAX_NEARBY_ROWS):
+        """틱 인덱스 구간 [start, stop)에서 (x, y[, z])로부터 radius 안에 있던 플레이어 위치
+
+        z가 있으면 3D 거리, 없으면 평면 거리. 결과는 틱, 거리 순.
+        """
+        store = self.store
+        row_start, row_stop = store.row_range(start, stop)
+        rows = self._candidate_rows(x, y, radius, row_start, row_stop)
+        position = store.position[rows].astype(np.float64)
+        delta = position[:, :2] - (x, y)
+        distance2 = np.einsum('ij,ij->i', delta, delta)
+        if z is not None:
+            distance2 = distance2 + (position[:, 2] - z) ** 2
+        hit = distance2 <= radius * radius
+        if team is not None:
+            team_id = store.teams.index(team) if team in store.teams else -1
+            hit &= store.team_ids[rows] == team_id
+        rows, distance = rows[hit], np.sqrt(distance2[hit])
+
+        tick_index = np.searchsorted(store.tick_offsets, rows, side='right') - 1
+        order = np.lexsort((distance, tick_index))
+        total = len(order)
+        order = order[:limit]
+        rows, distance, tick_index = rows[order], distance[order], tick_index[order]
+        return {
+            'total': total,
+            'truncated': total > len(order),
+            'players': [
+                {'tick': int(store.tick_values[t]), 'game_time': float(store.tick_times[t]),
+                 'name': store.players[p], 'team': store.teams[tm],
+                 'position': [float(v) for v in pos], 'distance': round(float(d), 3)}
+                for t, p, tm, pos, d in zip(tick_index.tolist(), store.player_ids[rows].tolist(),
+                                            store.team_ids[rows].tolist(), store.position[rows].tolist(),
+                                            distance.tolist())
+            ]
+        }
+
+
+def heatmap_args(args):
+    """kind / round(쉼표 구분 여러 개) / team / player 파라미터 해석 (잘못된 kind나 정수가 아닌 round면 None)"""
+    kind = args.get('kind', 'occupancy')
+    if kind not in HEATMAP_KINDS:
+        return None
+    rounds = args.get('round')
+    if rounds:
+        try:
+            rounds = np.array(sorted({int(r) for r in rounds.split(',') if r.strip()}), dtype=np.int64)
+        except ValueError:
+            return None
+    else:
+        rounds = None
+    return {'kind': kind, 'rounds': rounds, 'team': args.get('team') or None,
+            'player': args.get('player') or None}
+
+
+def nearby_query(data, args):
+    """/api/nearby 요청 처리 (x, y, radius 필수, tick 하나 또는 start_tick/end_tick 구간)
+
+    tick이 저장소에 없으면 그 이전의 가장 가까운 틱을 쓴다. 잘못된 요청이면 None.
+    """
+    x, y, radius = args.get('x', type=float), args.get('y', type=float), args.get('radius', type=float)
+    if x is None or y is None or radius is None or not np.isfinite((x, y, radius)).all() or radius < 0:
+        return None
+    store = data['store']
+    tick = args.get('tick', type=int)
+    if tick is not None:
+        start = max(int(np.searchsorted(store.tick_values, tick, side='right')) - 1, 0)
+        stop = min(start + 1, store.n_ticks)
+    else:
+        start, stop = store.index_range(start_tick=args.get('start_tick', type=int),
+                                        end_tick=args.get('end_tick', type=int))
+    # limit이 없거나 0 이하 / 최대값 초과면 최대값 (aim_report, PlayerTracks.track과 같은 규칙)
+    limit = args.get('limit', type=int)
+    if limit is None or limit <= 0 or limit > MAX_NEARBY_ROWS:
+        limit = MAX_NEARBY_ROWS
+    result = data['spatial'].nearby(x, y, radius, start, stop, z=args.get('z', type=float),
+                                    team=args.get('team') or None, limit=limit)
+    result['query'] = {
+        'x': x, 'y': y, 'z': args.get('z', type=float), 'radius': radius,
+        'start_tick': int(store.tick_values[start]) if start < stop else None,
+        'end_tick': int(store.tick_values[stop - 1]) if start < stop else None
+    }
+    return result
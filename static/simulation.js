@@ -1,6 +1,62 @@
 /**
  * CS:GO 3D 시뮬레이션 - Three.js 기반
  */
+
+/**
+ * /api/positions.bin 응답 디코더 (binary_frames.py 형식)
+ * 본문 섹션마다 ArrayBuffer 위에 TypedArray를 씌우기만 하므로 파싱 비용이 없다.
+ */
+const FRAME_ARRAY_TYPES = {
+    '<i4': Int32Array,
+    '<u2': Uint16Array,
+    '<f4': Float32Array,
+    '<f8': Float64Array
+};
+
+function decodeFrames(buffer) {
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+    if (magic !== 'CSF1') {
+        throw new Error(`Unknown frame format: ${magic}`);
+    }
+    const headerLength = view.getUint32(4, true);
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)));
+    const bodyStart = Math.ceil((8 + headerLength) / 8) * 8;
+
+    const columns = {};
+    header.sections.forEach(section => {
+        const ArrayType = FRAME_ARRAY_TYPES[section.dtype];
+        columns[section.name] = new ArrayType(buffer, bodyStart + section.offset, section.length);
+    });
+
+    // 틱별 행 시작 위치 (player_count 누적합)
+    const rowOffsets = new Uint32Array(header.tick_count + 1);
+    for (let i = 0; i < header.tick_count; i++) {
+        rowOffsets[i + 1] = rowOffsets[i] + columns.player_count[i];
+    }
+
+    return { header, columns, rowOffsets };
+}
+/**
+ * 서버가 경기를 백그라운드에서 로드하는 동안은 503 + Retry-After를 응답하므로
+ * 그 시간만큼 기다렸다가 다시 요청한다. onLoading(status)에는 응답의 loading 진행 상황을 넘긴다.
+ */
+async function fetchReady(url, onLoading) {
+    for (;;) {
+        const response = await fetch(url);
+        if (response.status !== 503) {
+            if (!response.ok) {
+                throw new Error(`${url}: HTTP ${response.status}`);
+            }
+            return response;
+        }
+        const body = await response.json().catch(() => ({}));
+        if (onLoading) onLoading(body.loading || {});
+        const seconds = parseFloat(response.headers.get('Retry-After')) || 2;
+        await new Promise(resolve => setTimeout(resolve, seconds * 1000));
+    }
+}
+
 class CombatSimulation {
     constructor() {
         this.scene = null;
@@ -9,6 +65,9 @@ class CombatSimulation {
         this.controls = null;
         
         this.data = null;
+        this.pageSize = 2000; // 한 번에 받아 오는 틱 수
+        this.pageRequests = new Map(); // 페이지 번호 -> 진행 중/완료된 요청
+        this.frameBlocks = new Map(); // 페이지 번호 -> decodeFrames 결과
         this.currentTick = 0;
         this.isPlaying = false;
         this.playSpeed = 1;
@@ -147,19 +206,93 @@ class CombatSimulation {
 
     async loadData() {
         try {
-            const response = await fetch('/api/data');
-            this.data = await response.json();
+            // 메타데이터와 이벤트를 먼저 받고, 위치 데이터는 페이지 단위로 받는다
+            const [metadata, events] = await Promise.all([
+                fetchReady('/api/metadata', status => this.showLoading(status)).then(response => response.json()),
+                fetchReady('/api/events').then(response => response.json())
+            ]);
+            this.data = {
+                metadata: metadata,
+                events: events
+            };
             
             // UI 업데이트
             this.updateUI();
             
-            // 초기 틱 렌더링
+            // 첫 페이지만 받으면 바로 렌더링하고 나머지는 뒤에서 이어서 받음
+            await this.ensureTickLoaded(0);
             this.renderTick(0);
+            this.streamPositions();
         } catch (error) {
             console.error('Failed to load data:', error);
         }
     }
 
+    showLoading(status) {
+        // 로드가 끝날 때까지 총 틱 자리에 진행률 표시
+        const progress = status.progress != null ? ` ${Math.round(status.progress * 100)}%` : '';
+        document.getElementById('total-ticks').textContent = `로딩 중${progress}`;
+    }
+
+    totalTicks() {
+        return this.data ? this.data.metadata.total_ticks : 0;
+    }
+
+    ensureTickLoaded(tickIndex) {
+        // tickIndex가 속한 페이지를 한 번만 요청
+        const page = Math.floor(tickIndex / this.pageSize);
+        if (!this.pageRequests.has(page)) {
+            const offset = page * this.pageSize;
+            const request = fetchReady(`/api/positions.bin?offset=${offset}&limit=${this.pageSize}`)
+                .then(response => response.arrayBuffer())
+                .then(buffer => {
+                    this.frameBlocks.set(page, decodeFrames(buffer));
+                })
+                .catch(error => {
+                    this.pageRequests.delete(page);
+                    console.error('Failed to load positions page:', error);
+                });
+            this.pageRequests.set(page, request);
+        }
+        return this.pageRequests.get(page);
+    }
+
+    getTick(tickIndex) {
+        // 받아 둔 프레임 블록에서 해당 틱 하나만 객체로 꺼낸다
+        const page = Math.floor(tickIndex / this.pageSize);
+        const block = this.frameBlocks.get(page);
+        if (!block) return null;
+
+        const local = tickIndex - page * this.pageSize;
+        if (local < 0 || local >= block.header.tick_count) return null;
+
+        const { header, columns, rowOffsets } = block;
+        const players = [];
+        for (let r = rowOffsets[local]; r < rowOffsets[local + 1]; r++) {
+            players.push({
+                name: header.players[columns.player[r]],
+                team: header.teams[columns.team[r]],
+                position: columns.position.subarray(r * 3, r * 3 + 3),
+                health: columns.health[r],
+                round: columns.round[r],
+                yaw: Number.isNaN(columns.yaw[r]) ? null : columns.yaw[r],
+                pitch: Number.isNaN(columns.pitch[r]) ? null : columns.pitch[r]
+            });
+        }
+        return {
+            tick: columns.tick[local],
+            game_time: columns.game_time[local],
+            players: players
+        };
+    }
+
+    async streamPositions() {
+        // 나머지 페이지를 순서대로 채운다 (seek한 구간은 ensureTickLoaded가 먼저 받음)
+        for (let offset = 0; offset < this.totalTicks(); offset += this.pageSize) {
+            await this.ensureTickLoaded(offset);
+        }
+    }
+
     updateUI() {
         if (!this.data) return;
 
@@ -202,9 +335,9 @@ class CombatSimulation {
     }
 
     renderTick(tickIndex) {
-        if (!this.data || !this.data.positions) return;
+        if (!this.data) return;
 
-        const tickData = this.data.positions[tickIndex];
+        const tickData = this.getTick(tickIndex);
         if (!tickData) return;
 
         // 기존 플레이어 오브젝트 제거
@@ -383,10 +516,11 @@ class CombatSimulation {
         playBtn.textContent = this.isPlaying ? '⏸' : '▶';
     }
 
-    seekTo(percent) {
+    async seekTo(percent) {
         if (!this.data) return;
-        const maxTick = this.data.positions.length - 1;
+        const maxTick = this.totalTicks() - 1;
         this.currentTick = Math.floor(percent * maxTick);
+        await this.ensureTickLoaded(this.currentTick);
         this.renderTick(this.currentTick);
         this.updateTimeDisplay();
     }
@@ -395,7 +529,7 @@ class CombatSimulation {
         if (!this.data) return;
         
         const metadata = this.data.metadata;
-        const currentTickData = this.data.positions[this.currentTick];
+        const currentTickData = this.getTick(this.currentTick);
         
         if (currentTickData) {
             const currentTime = currentTickData.game_time - metadata.time_range.min;
@@ -404,7 +538,7 @@ class CombatSimulation {
             document.getElementById('time-display').textContent = 
                 `${this.formatTime(currentTime)} / ${this.formatTime(totalTime)}`;
             
-            const progress = (this.currentTick / (this.data.positions.length - 1)) * 100;
+            const progress = (this.currentTick / (this.totalTicks() - 1)) * 100;
             document.getElementById('timeline-progress').style.width = `${progress}%`;
         }
     }
@@ -434,9 +568,15 @@ class CombatSimulation {
             
             const delta = (now - this.lastUpdateTime);
             if (delta > (16 / this.playSpeed)) { // 재생 속도에 따라 조절
+                if (!this.getTick(this.currentTick + 1) && this.currentTick + 1 < this.totalTicks()) {
+                    // 다음 페이지가 아직 도착하지 않았으면 기다림
+                    this.ensureTickLoaded(this.currentTick + 1);
+                    this.renderer.render(this.scene, this.camera);
+                    return;
+                }
                 this.currentTick += 1;
-                if (this.currentTick >= this.data.positions.length) {
-                    this.currentTick = this.data.positions.length - 1;
+                if (this.currentTick >= this.totalTicks()) {
+                    this.currentTick = this.totalTicks() - 1;
                     this.isPlaying = false;
                     document.getElementById('play-btn').textContent = '▶';
                 } else {
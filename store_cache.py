@@ -0,0 +1,248 @@
+"""
+전처리 결과 디스크 캐시 - 서버 시작 시 CSV/JSON 파싱을 건너뛴다
+
+원본 파일마다 캐시 디렉터리 하나를 만들고, TickStore 배열은 컬럼별 .npy 파일로,
+플레이어/팀 테이블과 metadata, events는 meta.json에 저장한다. 불러올 때는
+np.load(mmap_mode='r')로 메모리 매핑하므로 시작이 거의 즉시 끝나고,
+여러 워커 프로세스가 같은 물리 페이지를 공유한다.
+
+라운드별 샤드(rounds/<번호>/의 위치 배열 .npy + events.json)와 라운드 표(rounds/index.json)도
+함께 기록해, 라운드 하나만 볼 때는 그 라운드의 파일만 읽는다(round_index.py).
+
+캐시 키는 원본 파일의 절대 경로이며, meta.json에 기록한 크기/수정 시각/내용 해시가
+현재 파일과 다르면 캐시를 버리고 다시 만든다.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from event_index import event_rounds
+from round_index import round_table
+from tick_store import TickStore
+
+CACHE_DIR = os.environ.get('STORE_CACHE_DIR', '.store_cache')
+
+# 저장 형식이 바뀌면 올린다 (이전 버전 캐시는 자동으로 다시 생성)
+CACHE_VERSION = 3
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def file_digest(path):
+    """파일 내용의 SHA-1 해시"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_info(path):
+    """캐시 키를 이루는 원본 파일 정보 (내용 해시는 필요할 때만 계산)"""
+    stat = os.stat(path)
+    return {
+        'path': os.path.abspath(path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns
+    }
+
+
+def cache_path(path, cache_dir=None):
+    """원본 파일의 캐시 디렉터리 경로"""
+    key = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir or CACHE_DIR, f'{name}-{key}')
+
+
+def _read_meta(directory):
+    try:
+        with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_fresh(meta, path):
+    """캐시가 현재 원본 파일과 일치하는지 확인"""
+    if meta is None or meta.get('version') != CACHE_VERSION:
+        return False
+    current = source_info(path)
+    cached = meta.get('source', {})
+    if cached.get('path') != current['path'] or cached.get('size') != current['size']:
+        return False
+    if cached.get('mtime_ns') == current['mtime_ns']:
+        return True
+    # 수정 시각만 바뀐 경우(복사, touch 등)는 내용 해시로 판단
+    return cached.get('sha1') == file_digest(path)
+
+
+def _refresh_mtime(directory, meta, path):
+    """내용이 같은 것으로 확인된 캐시의 수정 시각을 갱신 (다음 시작 때 해시 생략)"""
+    mtime_ns = source_info(path)['mtime_ns']
+    if meta['source'].get('mtime_ns') == mtime_ns:
+        return
+    meta['source']['mtime_ns'] = mtime_ns
+    _rewrite_json(os.path.join(directory, 'meta.json'), meta)
+    rounds_path = os.path.join(directory, 'rounds', 'index.json')
+    try:
+        with open(rounds_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return
+    index['source']['mtime_ns'] = mtime_ns
+    _rewrite_json(rounds_path, index)
+
+
+def _rewrite_json(file_path, value):
+    """임시 파일에 쓴 뒤 교체 (실패하면 그대로 둔다)"""
+    tmp_path = file_path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(value, f, separators=(',', ':'), ensure_ascii=False)
+        os.replace(tmp_path, file_path)
+    except OSError:
+        pass
+
+
+def _load_arrays(directory, players, teams):
+    """directory의 컬럼별 .npy를 메모리 매핑으로 읽은 TickStore"""
+    arrays = {
+        name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+        for name in TickStore.ARRAY_FIELDS
+    }
+    return TickStore(players=players, teams=teams, **arrays)
+
+
+def _save_arrays(directory, store):
+    for name in TickStore.ARRAY_FIELDS:
+        np.save(os.path.join(directory, f'{name}.npy'), np.ascontiguousarray(getattr(store, name)))
+
+
+def _save_rounds(directory, store, events, info):
+    """라운드 표와 라운드별 샤드 기록"""
+    events = sorted(events, key=lambda e: e['tick'])
+    rounds = event_rounds(np.array([e['tick'] for e in events], dtype=np.int64), store)
+    table = round_table(store, rounds)
+    rounds_dir = os.path.join(directory, 'rounds')
+    os.makedirs(rounds_dir)
+    for row in table:
+        shard_dir = os.path.join(rounds_dir, str(row['round']))
+        os.makedirs(shard_dir)
+        _save_arrays(shard_dir, store.slice_ticks(row['start_index'], row['end_index']))
+        with open(os.path.join(shard_dir, 'events.json'), 'w', encoding='utf-8') as f:
+            json.dump([e for e, r in zip(events, rounds) if r == row['round']], f,
+                      separators=(',', ':'), ensure_ascii=False)
+    with open(os.path.join(rounds_dir, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump({'source': info, 'rounds': table}, f, separators=(',', ':'), ensure_ascii=False)
+
+
+def load(path, cache_dir=None):
+    """캐시가 유효하면 (store, metadata, events) 반환, 아니면 None"""
+    if not os.path.exists(path):
+        return None
+    directory = cache_path(path, cache_dir)
+    meta = _read_meta(directory)
+    if not _is_fresh(meta, path):
+        return None
+
+    try:
+        store = _load_arrays(directory, meta['players'], meta['teams'])
+    except (OSError, ValueError):
+        return None
+
+    _refresh_mtime(directory, meta, path)
+    return store, meta['metadata'], meta['events']
+
+
+def load_rounds(path, cache_dir=None):
+    """캐시의 (라운드 샤드 디렉터리, 라운드 표), 없거나 원본 파일과 다르면 None"""
+    rounds_dir = os.path.join(cache_path(path, cache_dir), 'rounds')
+    try:
+        with open(os.path.join(rounds_dir, 'index.json'), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        current = source_info(path)
+    except (OSError, ValueError):
+        return None
+    if not _same_source(index.get('source', {}), current):
+        return None
+    return rounds_dir, index['rounds']
+
+
+def _same_source(source, current):
+    return all(source.get(key) == current[key] for key in ('path', 'size', 'mtime_ns'))
+
+
+def load_extra(path, name, cache_dir=None):
+    """save_extra로 저장한 부가 결과 (없거나 원본 파일이 바뀌었으면 None)"""
+    try:
+        with open(os.path.join(cache_path(path, cache_dir), name), 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        current = source_info(path)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(saved, dict) or not _same_source(saved.get('source', {}), current):
+        return None
+    return saved.get('value')
+
+
+def save_extra(path, name, value, cache_dir=None):
+    """원본 파일에서 계산한 부가 결과(JSON, 통계 등)를 캐시 디렉터리에 기록"""
+    directory = cache_path(path, cache_dir)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        _rewrite_json(os.path.join(directory, name), {'source': source_info(path), 'value': value})
+    except OSError as e:
+        print(f"캐시 저장 실패: {e}")
+
+
+def load_round(rounds_dir, round_num, players, teams):
+    """라운드 샤드 하나의 (store, events), 읽을 수 없으면 None"""
+    shard_dir = os.path.join(rounds_dir, str(round_num))
+    try:
+        store = _load_arrays(shard_dir, players, teams)
+        with open(os.path.join(shard_dir, 'events.json'), 'r', encoding='utf-8') as f:
+            events = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return store, events
+
+
+def save(path, store, metadata, events, cache_dir=None):
+    """전처리 결과를 캐시에 기록 (임시 디렉터리에 쓴 뒤 교체하므로 동시 실행에도 안전)"""
+    directory = cache_path(path, cache_dir)
+    parent = os.path.dirname(directory)
+    os.makedirs(parent, exist_ok=True)
+
+    info = source_info(path)
+    info['sha1'] = file_digest(path)
+    meta = {
+        'version': CACHE_VERSION,
+        'source': info,
+        'players': store.players,
+        'teams': store.teams,
+        'metadata': metadata,
+        'events': events
+    }
+
+    tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=parent)
+    try:
+        _save_arrays(tmp_dir, store)
+        _save_rounds(tmp_dir, store, events, info)
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, separators=(',', ':'), ensure_ascii=False)
+
+        if os.path.exists(directory):
+            shutil.rmtree(directory, ignore_errors=True)
+        try:
+            os.replace(tmp_dir, directory)
+        except OSError:
+            # 다른 프로세스가 먼저 만든 경우 그쪽 캐시를 쓴다
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    except OSError as e:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        print(f"캐시 저장 실패: {e}")
+    return directory
@@ -0,0 +1,157 @@
+"""
+합성 경기 CSV 생성기 - README의 컬럼 구성을 따르는 킬 틱 데이터를 원하는 크기로 생성
+
+벤치마크와 부하 테스트용. 라운드마다 두 팀이 스폰 지점에서 출발해 무작위로 이동하고
+(NumPy 누적합으로 한 라운드를 한꺼번에 생성), 틱마다 kill_density 확률로 살아 있는
+플레이어끼리 킬이 난다. 킬 틱에는 공격자의 조준이 피해자 방향으로 꺾이고, 공격자 행에
+킬 이벤트 컬럼이 채워진다. 죽은 플레이어는 라운드가 끝날 때까지 체력 0으로 제자리에
+남고, 후반전(라운드 절반 이후)에는 팀이 바뀐다. 라운드 단위로 바로 파일에 쓰므로
+수천만 행도 메모리를 크게 쓰지 않는다.
+
+    python synth_match.py synthetic.csv --players 10 --ticks 100000 --rounds 24
+    python synth_match.py synthetic.csv --rows 10000000 --kill-density 0.005
+"""
+import argparse
+import math
+import os
+import time
+
+import numpy as np
+
+COLUMNS = ('tick', 'game_time', 'round', 'team_name', 'name', 'X', 'Y', 'Z', 'health', 'yaw', 'pitch',
+           'event', 'attacker_name', 'attacker_team_name', 'attacker_X', 'attacker_Y', 'attacker_Z',
+           'attacker_yaw', 'attacker_pitch', 'attacker_health', 'victim_name', 'victim_team_name',
+           'victim_X', 'victim_Y', 'victim_Z', 'victim_health', 'weapon', 'headshot')
+TEAMS = ('CT', 'TERRORIST')
+WEAPONS = ('ak47', 'm4a1', 'awp', 'deagle', 'usp_silencer', 'glock', 'mp9', 'famas')
+HEADSHOT_RATE = 0.4
+
+# 맵 평면 범위와 팀 스폰 (map_data.json의 Anubis와 같은 크기)
+MAP_HALF_SIZE = 2000.0
+SPAWNS = {'CT': (-1800.0, -1800.0), 'TERRORIST': (1800.0, 1800.0)}
+# 틱당 이동 거리 표준편차 / 스폰 -> 맵 중앙으로 끌리는 비율
+STEP_STD = 4.0
+DRIFT = 0.002
+# 빈 킬 이벤트 컬럼 (event ~ headshot 16개)
+_NO_EVENT = ',' * 16
+
+
+def _round_rows(rng, players, teams, ticks, times, round_num, kill_density):
+    """라운드 하나의 CSV 줄 목록과 킬 수"""
+    n_ticks, n_players = len(ticks), len(players)
+
+    # 평면 위치: 스폰 + 무작위 이동 (맵 중앙 쪽으로 약하게 끌림)
+    spawn = np.array([SPAWNS[team] for team in teams], dtype=np.float64)
+    spawn += rng.normal(0, 60, spawn.shape)
+    steps = rng.normal(0, STEP_STD, (n_ticks, n_players, 2))
+    steps += -spawn[None] * DRIFT * rng.uniform(0.5, 1.5, (1, n_players, 1))
+    plane = np.clip(spawn[None] + np.cumsum(steps, axis=0), -MAP_HALF_SIZE, MAP_HALF_SIZE)
+    height = np.clip(20 + np.cumsum(rng.normal(0, 0.5, (n_ticks, n_players)), axis=0), 0, 200)
+    yaw = np.cumsum(rng.normal(0, 3, (n_ticks, n_players)), axis=0) + rng.uniform(-180, 180, n_players)
+    pitch = np.clip(np.cumsum(rng.normal(0, 0.5, (n_ticks, n_players)), axis=0), -60, 60)
+    health = np.full((n_ticks, n_players), 100.0)
+
+    # 킬: 살아 있는 상대 팀 플레이어 중에서 (한 팀이 전멸하면 그 라운드 킬 종료)
+    alive = np.ones(n_players, dtype=bool)
+    team_code = np.array([TEAMS.index(team) for team in teams])
+    kills = {}
+    for t in np.flatnonzero(rng.random(n_ticks) < kill_density).tolist():
+        side = int(rng.integers(2))
+        attackers = np.flatnonzero(alive & (team_code == side))
+        victims = np.flatnonzero(alive & (team_code != side))
+        if not len(attackers) or not len(victims):
+            if not (alive & (team_code == 0)).any() or not (alive & (team_code == 1)).any():
+                break
+            continue
+        a, v = int(rng.choice(attackers)), int(rng.choice(victims))
+        # 공격자 조준을 피해자 방향으로 (이후 궤적도 같이 이동)
+        dx, dz = plane[t, v] - plane[t, a]
+        yaw[t:, a] += math.degrees(math.atan2(dz, dx)) - yaw[t, a]
+        health[t:, a] = np.minimum(health[t:, a], rng.integers(1, 101))
+        # 피해자는 죽은 자리에 체력 0으로 남는다
+        plane[t:, v] = plane[t, v]
+        height[t:, v] = height[t, v]
+        health[t:, v] = 0.0
+        alive[v] = False
+        kills[(t, a)] = v
+
+    yaw = (yaw + 180) % 360 - 180
+    # 줄 만들기는 파이썬 리스트에서 (NumPy 스칼라 인덱싱보다 훨씬 빠르다)
+    xs, zs = plane[..., 0].tolist(), plane[..., 1].tolist()
+    ys, hs, yaws, pitches = height.tolist(), health.tolist(), yaw.tolist(), pitch.tolist()
+    lines = []
+    for t in range(n_ticks):
+        prefix = f'{ticks[t]},{times[t]:.4f},{round_num},'
+        x_t, y_t, z_t, h_t, yaw_t, pitch_t = xs[t], ys[t], zs[t], hs[t], yaws[t], pitches[t]
+        for p in range(n_players):
+            line = (f'{prefix}{teams[p]},{players[p]},{x_t[p]:.3f},{y_t[p]:.3f},{z_t[p]:.3f},'
+                    f'{h_t[p]:.0f},{yaw_t[p]:.4f},{pitch_t[p]:.4f},')
+            v = kills.get((t, p)) if kills else None
+            if v is None:
+                line += _NO_EVENT
+            else:
+                line += (f'kill,{players[p]},{teams[p]},{x_t[p]:.3f},{y_t[p]:.3f},{z_t[p]:.3f},'
+                         f'{yaw_t[p]:.4f},{pitch_t[p]:.4f},{h_t[p]:.0f},'
+                         f'{players[v]},{teams[v]},{x_t[v]:.3f},{y_t[v]:.3f},{z_t[v]:.3f},0,'
+                         f'{WEAPONS[int(rng.integers(len(WEAPONS)))]},{rng.random() < HEADSHOT_RATE}')
+            lines.append(line)
+    return lines, len(kills)
+
+
+def generate(path, players=10, ticks=10000, rounds=24, kill_density=0.01, tick_step=2,
+             tickrate=64, seed=0, progress=False):
+    """합성 경기 CSV를 path에 쓰고 {'rows', 'ticks', 'rounds', 'kills', 'bytes', 'seconds'} 반환"""
+    rng = np.random.default_rng(seed)
+    names = [f'Player{i + 1}' for i in range(players)]
+    rounds = max(1, min(rounds, ticks))
+    bounds = np.linspace(0, ticks, rounds + 1).astype(np.int64)
+    started = time.time()
+    total_kills = 0
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(','.join(COLUMNS) + '\n')
+        for r in range(rounds):
+            # 후반전에는 팀이 바뀐다
+            first_half = r < rounds // 2 or rounds == 1
+            teams = [TEAMS[(i * 2 // players + (0 if first_half else 1)) % 2] for i in range(players)]
+            tick_numbers = (np.arange(bounds[r], bounds[r + 1]) * tick_step + tick_step).tolist()
+            times = [tick / tickrate for tick in tick_numbers]
+            lines, kills = _round_rows(rng, names, teams, tick_numbers, times, r + 1, kill_density)
+            total_kills += kills
+            if lines:
+                f.write('\n'.join(lines) + '\n')
+            if progress:
+                print(f"라운드 {r + 1}/{rounds} 생성 ({bounds[r + 1] * players}줄)")
+
+    return {
+        'rows': int(ticks * players),
+        'ticks': int(ticks),
+        'rounds': int(rounds),
+        'kills': total_kills,
+        'bytes': os.path.getsize(path),
+        'seconds': round(time.time() - started, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='README 컬럼 구성의 합성 킬 틱 CSV 생성')
+    parser.add_argument('output', help='출력 CSV 경로')
+    parser.add_argument('--players', type=int, default=10)
+    parser.add_argument('--ticks', type=int, default=10000, help='틱 수 (--rows가 있으면 무시)')
+    parser.add_argument('--rows', type=int, help='전체 행 수 (틱 수 = rows / players)')
+    parser.add_argument('--rounds', type=int, default=24)
+    parser.add_argument('--kill-density', type=float, default=0.01, help='틱마다 킬이 날 확률')
+    parser.add_argument('--tick-step', type=int, default=2, help='기록된 틱 번호 간격')
+    parser.add_argument('--tickrate', type=int, default=64)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    ticks = args.ticks if args.rows is None else max(1, args.rows // args.players)
+    stats = generate(args.output, args.players, ticks, args.rounds, args.kill_density,
+                     args.tick_step, args.tickrate, args.seed, progress=True)
+    print(f"완료! {args.output}: {stats['rows']}줄, 킬 {stats['kills']}개, "
+          f"{stats['bytes'] / 1024 / 1024:.1f}MB ({stats['seconds']}초)")
+
+
+if __name__ == '__main__':
+    main()
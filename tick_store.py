@@ -0,0 +1,431 @@
+"""
+컬럼형 틱 저장소 - 플레이어 위치를 NumPy 연속 배열로 보관
+
+기존 positions 구조(틱마다 dict + 플레이어마다 dict/list)는 행 하나당
+수백 바이트를 쓰고 이름/팀 문자열이 행마다 반복된다. TickStore는 행 단위 값을
+타입이 고정된 배열에 담고, 플레이어/팀 이름은 한 번만 저장(intern)한 뒤
+정수 id로 참조한다.
+
+    tick_values[i], tick_times[i]         i번째 틱의 tick / game_time
+    tick_offsets[i]:tick_offsets[i + 1]   i번째 틱에 속한 행 범위
+    player_ids / team_ids / position / health / rounds / yaw / pitch   행 단위 값
+
+yaw / pitch는 CSV에 플레이어별 조준 각도 컬럼이 있을 때만 채워지고 없으면 NaN이다.
+
+API 응답 형식(positions 리스트)은 필요한 구간만 그때그때 만들어 반환한다.
+"""
+from array import array
+
+import numpy as np
+
+# JSON으로 내보낼 때 좌표 소수점 자리수 (float32 정밀도에 맞춤)
+COORD_DECIMALS = 4
+
+NAN = float('nan')
+
+
+class TickStore:
+    """틱 단위로 묶인 플레이어 행을 담는 읽기 전용 컬럼 저장소"""
+
+    # 행 단위 배열 (정렬/병합 시 같은 순서로 함께 재배치)
+    ROW_FIELDS = ('player_ids', 'team_ids', 'position', 'health', 'rounds', 'yaw', 'pitch')
+    # 배열 속성 이름 (디스크 캐시 등에서 같은 순서로 저장/복원)
+    ARRAY_FIELDS = ('tick_values', 'tick_times', 'tick_offsets') + ROW_FIELDS
+
+    def __init__(self, tick_values, tick_times, tick_offsets,
+                 player_ids, team_ids, position, health, rounds,
+                 players, teams, yaw=None, pitch=None):
+        self.tick_values = tick_values      # int64[n_ticks]
+        self.tick_times = tick_times        # float64[n_ticks]
+        self.tick_offsets = tick_offsets    # int64[n_ticks + 1]
+        self.player_ids = player_ids        # int32[n_rows]
+        self.team_ids = team_ids            # int16[n_rows]
+        self.position = position            # float32[n_rows, 3] (X, Z, Y 순서)
+        self.health = health                # float32[n_rows]
+        self.rounds = rounds                # int16[n_rows]
+        # float32[n_rows] (조준 각도, 없으면 NaN)
+        self.yaw = yaw if yaw is not None else np.full(len(player_ids), np.nan, np.float32)
+        self.pitch = pitch if pitch is not None else np.full(len(player_ids), np.nan, np.float32)
+        self.players = players              # id -> 이름
+        self.teams = teams                  # id -> 팀명
+
+    @property
+    def n_ticks(self):
+        return len(self.tick_values)
+
+    @property
+    def n_rows(self):
+        return len(self.player_ids)
+
+    @property
+    def nbytes(self):
+        """배열이 차지하는 바이트 수 (대략적인 메모리 사용량)"""
+        return sum(getattr(self, name).nbytes for name in self.ARRAY_FIELDS)
+
+    @property
+    def has_aim(self):
+        """플레이어별 yaw/pitch 데이터가 있는지 여부"""
+        return bool(self.n_rows) and not np.isnan(self.yaw).all()
+
+    def tick_rounds(self):
+        """틱마다 첫 행의 라운드 번호 (플레이어 행이 없는 틱은 -1)"""
+        counts = np.diff(self.tick_offsets)
+        rounds = np.full(self.n_ticks, -1, dtype=np.int64)
+        has_rows = counts > 0
+        rounds[has_rows] = self.rounds[self.tick_offsets[:-1][has_rows]]
+        return rounds
+
+    def player_id(self, name):
+        """플레이어 이름의 id (없으면 None)"""
+        try:
+            return self.players.index(name)
+        except ValueError:
+            return None
+
+    def row_range(self, start=0, stop=None):
+        """틱 인덱스 구간 [start, stop)에 해당하는 행 범위 반환"""
+        if stop is None:
+            stop = self.n_ticks
+        return int(self.tick_offsets[start]), int(self.tick_offsets[stop])
+
+    def index_range(self, start_tick=None, end_tick=None, start_time=None, end_time=None):
+        """tick / game_time 구간(양 끝 포함)에 해당하는 틱 인덱스 범위 [lo, hi) 반환
+
+        tick_values와 tick_times가 정렬되어 있으므로 이진 탐색(O(log n))만 사용한다.
+        """
+        lo, hi = 0, self.n_ticks
+        if start_tick is not None:
+            lo = max(lo, int(np.searchsorted(self.tick_values, start_tick, side='left')))
+        if end_tick is not None:
+            hi = min(hi, int(np.searchsorted(self.tick_values, end_tick, side='right')))
+        if start_time is not None:
+            lo = max(lo, int(np.searchsorted(self.tick_times, start_time, side='left')))
+        if end_time is not None:
+            hi = min(hi, int(np.searchsorted(self.tick_times, end_time, side='right')))
+        return lo, max(lo, hi)
+
+    def player_names(self):
+        """저장소에 등장하는 플레이어 이름 (정렬)"""
+        return sorted(self.players)
+
+    def iter_positions(self, start=0, stop=None):
+        """틱 인덱스 구간 [start, stop)을 기존 positions 형식으로 생성"""
+        if stop is None:
+            stop = self.n_ticks
+        if start >= stop:
+            return
+
+        row_start, row_stop = self.row_range(start, stop)
+        # 구간 전체를 컬럼 단위로 한 번에 파이썬 값으로 변환
+        names = [self.players[i] for i in self.player_ids[row_start:row_stop].tolist()]
+        teams = [self.teams[i] for i in self.team_ids[row_start:row_stop].tolist()]
+        coords = np.round(self.position[row_start:row_stop].astype(np.float64),
+                          COORD_DECIMALS).tolist()
+        health = self.health[row_start:row_stop].tolist()
+        rounds = self.rounds[row_start:row_stop].tolist()
+        aim = self.has_aim
+        if aim:
+            yaws = nan_to_none(self.yaw[row_start:row_stop])
+            pitches = nan_to_none(self.pitch[row_start:row_stop])
+
+        ticks = self.tick_values[start:stop].tolist()
+        times = self.tick_times[start:stop].tolist()
+        offsets = (self.tick_offsets[start:stop + 1] - row_start).tolist()
+
+        for i, tick in enumerate(ticks):
+            players = []
+            for r in range(offsets[i], offsets[i + 1]):
+                player = {
+                    'name': names[r],
+                    'team': teams[r],
+                    'position': coords[r],
+                    'health': health[r],
+                    'round': rounds[r]
+                }
+                if aim:
+                    player['yaw'] = yaws[r]
+                    player['pitch'] = pitches[r]
+                players.append(player)
+            yield {
+                'tick': tick,
+                'game_time': times[i],
+                'players': players
+            }
+
+    def positions(self, start=0, stop=None):
+        """틱 인덱스 구간 [start, stop)을 positions 리스트로 반환"""
+        return list(self.iter_positions(start, stop))
+
+    def slice_ticks(self, start=0, stop=None):
+        """틱 인덱스 구간 [start, stop)만 담은 새 저장소 (배열은 복사하지 않고 뷰로 공유)"""
+        if stop is None:
+            stop = self.n_ticks
+        row_start, row_stop = self.row_range(start, stop)
+        return TickStore(
+            tick_values=self.tick_values[start:stop],
+            tick_times=self.tick_times[start:stop],
+            tick_offsets=self.tick_offsets[start:stop + 1] - row_start,
+            players=self.players,
+            teams=self.teams,
+            **{name: getattr(self, name)[row_start:row_stop] for name in self.ROW_FIELDS}
+        )
+
+    def take_rows(self, keep):
+        """keep(bool[n_rows])이 True인 행만 남긴 새 저장소 (남은 행이 없는 틱은 제외)"""
+        keep = np.asarray(keep, dtype=bool)
+        kept_before = np.concatenate(([0], np.cumsum(keep)))
+        counts = np.diff(kept_before[self.tick_offsets])
+        has_rows = counts > 0
+        return TickStore(
+            tick_values=self.tick_values[has_rows],
+            tick_times=self.tick_times[has_rows],
+            tick_offsets=np.concatenate(([0], np.cumsum(counts[has_rows]))).astype(np.int64),
+            players=self.players,
+            teams=self.teams,
+            **{name: getattr(self, name)[keep] for name in self.ROW_FIELDS}
+        )
+
+    @classmethod
+    def from_positions(cls, positions):
+        """기존 positions 리스트(JSON)로부터 저장소 생성"""
+        builder = TickStoreBuilder()
+        for entry in positions:
+            builder.begin_tick(entry['tick'], entry.get('game_time', 0))
+            for player in entry.get('players', []):
+                x, y, z = player['position']
+                builder.add_player(player.get('name', ''), player.get('team', ''),
+                                   x, y, z,
+                                   player.get('health', 100.0),
+                                   player.get('round', 1),
+                                   _none_to_nan(player.get('yaw')),
+                                   _none_to_nan(player.get('pitch')))
+            # 원본 positions의 항목 경계(빈 틱 포함)를 그대로 유지
+            builder.end_tick(keep_empty=True)
+        return builder.build()
+
+
+class TickStoreBuilder:
+    """CSV 행을 순서대로 받아 TickStore를 만드는 빌더
+
+    기존 로더와 같은 규칙을 따른다: 틱 번호가 바뀌는 시점에 이전 틱을 닫고,
+    플레이어 행이 하나도 없는 틱은 버리며, 틱의 game_time은 마지막 행 값을 쓴다.
+    """
+
+    def __init__(self):
+        self._tick_values = array('q')
+        self._tick_times = array('d')
+        self._tick_offsets = array('q', [0])
+        self._player_ids = array('i')
+        self._team_ids = array('h')
+        self._position = array('f')
+        self._health = array('f')
+        self._rounds = array('h')
+        self._yaw = array('f')
+        self._pitch = array('f')
+
+        self._player_lookup = {}
+        self._team_lookup = {}
+        self.players = []
+        self.teams = []
+
+        self._current_tick = None
+        self._current_time = 0.0
+
+    @property
+    def n_rows(self):
+        return len(self._player_ids)
+
+    @property
+    def n_ticks(self):
+        """닫힌 틱 수 (아직 행을 받는 중인 현재 틱은 제외)"""
+        return len(self._tick_values)
+
+    def tick_value(self, index):
+        """닫힌 틱 index의 tick 번호"""
+        return self._tick_values[index]
+
+    def snapshot(self, start=0):
+        """닫힌 틱 [start, n_ticks)만 담은 TickStore (현재 틱은 열어 둔 채로 복사)
+
+        파일을 따라 읽으며 계속 행을 추가하는 경우(live_tail)에 쓴다. 입력 틱이
+        정렬되어 있다고 가정하며 build()와 달리 다시 정렬하지 않는다.
+        """
+        row_start = self._tick_offsets[start]
+        row_stop = self._tick_offsets[-1]
+        return TickStore(
+            tick_values=np.array(self._tick_values[start:], dtype=np.int64),
+            tick_times=np.array(self._tick_times[start:], dtype=np.float64),
+            tick_offsets=np.array(self._tick_offsets[start:], dtype=np.int64) - row_start,
+            player_ids=np.array(self._player_ids[row_start:row_stop], dtype=np.int32),
+            team_ids=np.array(self._team_ids[row_start:row_stop], dtype=np.int16),
+            position=np.array(self._position[row_start * 3:row_stop * 3], dtype=np.float32).reshape(-1, 3),
+            health=np.array(self._health[row_start:row_stop], dtype=np.float32),
+            rounds=np.array(self._rounds[row_start:row_stop], dtype=np.int16),
+            yaw=np.array(self._yaw[row_start:row_stop], dtype=np.float32),
+            pitch=np.array(self._pitch[row_start:row_stop], dtype=np.float32),
+            players=list(self.players),
+            teams=list(self.teams)
+        )
+
+    def _pending_rows(self):
+        return len(self._player_ids) - self._tick_offsets[-1]
+
+    def _intern(self, value, lookup, table):
+        idx = lookup.get(value)
+        if idx is None:
+            idx = len(table)
+            lookup[value] = idx
+            table.append(value)
+        return idx
+
+    def begin_tick(self, tick, game_time):
+        """행 하나를 읽을 때마다 호출 - 틱이 바뀌었으면 이전 틱을 닫는다"""
+        if self._current_tick != tick and self._current_tick is not None:
+            self.end_tick()
+        self._current_tick = tick
+        self._current_time = game_time
+
+    def end_tick(self, keep_empty=False):
+        """현재 틱을 닫는다 (keep_empty가 아니면 플레이어 행이 없는 틱은 버림)"""
+        if self._current_tick is None:
+            return
+        if not keep_empty and not self._pending_rows():
+            return
+        self._tick_values.append(self._current_tick)
+        self._tick_times.append(self._current_time)
+        self._tick_offsets.append(len(self._player_ids))
+
+    def add_player(self, name, team, x, y, z, health, round_num, yaw=NAN, pitch=NAN):
+        """현재 틱에 플레이어 행 추가 (x, y, z는 position 순서 그대로)"""
+        self._player_ids.append(self._intern(name, self._player_lookup, self.players))
+        self._team_ids.append(self._intern(team, self._team_lookup, self.teams))
+        self._position.extend((x, y, z))
+        self._health.append(health)
+        self._rounds.append(round_num)
+        self._yaw.append(yaw)
+        self._pitch.append(pitch)
+
+    def build(self):
+        """남은 틱을 닫고 NumPy 배열로 변환한 TickStore 반환
+
+        구간 조회가 이진 탐색을 쓰므로 틱 순서가 뒤섞인 입력은 틱 기준으로
+        (같은 틱끼리는 원래 순서대로) 다시 정렬한다.
+        """
+        self.end_tick()
+        self._current_tick = None
+
+        store = TickStore(
+            tick_values=np.frombuffer(self._tick_values, dtype=np.int64).copy(),
+            tick_times=np.frombuffer(self._tick_times, dtype=np.float64).copy(),
+            tick_offsets=np.frombuffer(self._tick_offsets, dtype=np.int64).copy(),
+            player_ids=np.frombuffer(self._player_ids, dtype=np.int32).copy(),
+            team_ids=np.frombuffer(self._team_ids, dtype=np.int16).copy(),
+            position=np.frombuffer(self._position, dtype=np.float32).reshape(-1, 3).copy(),
+            health=np.frombuffer(self._health, dtype=np.float32).copy(),
+            rounds=np.frombuffer(self._rounds, dtype=np.int16).copy(),
+            yaw=np.frombuffer(self._yaw, dtype=np.float32).copy(),
+            pitch=np.frombuffer(self._pitch, dtype=np.float32).copy(),
+            players=list(self.players),
+            teams=list(self.teams)
+        )
+        # 마지막 틱 뒤에 닫히지 않은 행은 버린다 (플레이어 없이 끝난 경우 없음)
+        row_stop = int(store.tick_offsets[-1])
+        if row_stop != store.n_rows:
+            for name in TickStore.ROW_FIELDS:
+                setattr(store, name, getattr(store, name)[:row_stop])
+        if store.n_ticks > 1 and np.any(np.diff(store.tick_values) < 0):
+            _sort_ticks(store)
+        return store
+
+
+def concat_stores(stores):
+    """여러 저장소를 순서대로 이어 붙인 저장소 반환
+
+    플레이어/팀 테이블은 앞쪽 저장소부터 처음 등장한 순서로 다시 만들므로,
+    파일을 구간별로 나눠 만든 저장소를 합치면 한 번에 만든 것과 같은 결과가 된다.
+    """
+    players, teams = [], []
+    player_lookup, team_lookup = {}, {}
+
+    def remap(names, lookup, table):
+        ids = []
+        for name in names:
+            if name not in lookup:
+                lookup[name] = len(table)
+                table.append(name)
+            ids.append(lookup[name])
+        return np.array(ids, dtype=np.int64)
+
+    parts = {name: [] for name in TickStore.ARRAY_FIELDS}
+    parts['tick_offsets'].append(np.zeros(1, dtype=np.int64))
+    row_base = 0
+    for store in stores:
+        player_map = remap(store.players, player_lookup, players)
+        team_map = remap(store.teams, team_lookup, teams)
+        parts['tick_values'].append(store.tick_values)
+        parts['tick_times'].append(store.tick_times)
+        parts['tick_offsets'].append(store.tick_offsets[1:] + row_base)
+        parts['player_ids'].append(player_map[store.player_ids].astype(np.int32))
+        parts['team_ids'].append(team_map[store.team_ids].astype(np.int16))
+        for name in ('position', 'health', 'rounds', 'yaw', 'pitch'):
+            parts[name].append(getattr(store, name))
+        row_base += store.n_rows
+
+    if not stores:
+        return TickStoreBuilder().build()
+    merged = TickStore(players=players, teams=teams,
+                       **{name: np.concatenate(parts[name]) for name in TickStore.ARRAY_FIELDS})
+    # 각 저장소는 이미 안정 정렬되어 있으므로 합친 뒤 한 번 더 안정 정렬하면
+    # 전체를 한꺼번에 정렬한 것과 같다
+    if merged.n_ticks > 1 and np.any(np.diff(merged.tick_values) < 0):
+        _sort_ticks(merged)
+    return merged
+
+
+def _sort_ticks(store):
+    """틱 항목을 tick 기준으로 안정 정렬하고 행 배열도 같은 순서로 재배치"""
+    order = np.argsort(store.tick_values, kind='stable')
+    counts = np.diff(store.tick_offsets)[order]
+    starts = store.tick_offsets[:-1][order]
+    # 새 순서의 각 행이 원래 어느 행이었는지 계산
+    new_offsets = np.concatenate(([0], np.cumsum(counts)))
+    rows = np.repeat(starts - new_offsets[:-1], counts) + np.arange(new_offsets[-1])
+
+    store.tick_values = store.tick_values[order]
+    store.tick_times = store.tick_times[order]
+    store.tick_offsets = new_offsets.astype(np.int64)
+    for name in TickStore.ROW_FIELDS:
+        setattr(store, name, getattr(store, name)[rows])
+
+
+def nan_to_none(values):
+    """float 배열을 리스트로 (NaN은 None)"""
+    return [None if v != v else v for v in values.astype(np.float64).round(COORD_DECIMALS).tolist()]
+
+
+def _none_to_nan(value):
+    return NAN if value is None else value
+
+
+def build_metadata(store, events):
+    """저장소와 이벤트 목록으로부터 metadata dict 생성"""
+    times = store.tick_times[store.tick_times != 0]
+    ticks = store.tick_values[store.tick_values != 0]
+
+    present = np.unique(store.player_ids)
+    players = sorted(name for name in (store.players[i] for i in present.tolist()) if name)
+
+    return {
+        'total_ticks': store.n_ticks,
+        'total_events': len(events),
+        'time_range': {
+            'min': float(times.min()) if len(times) else 0,
+            'max': float(times.max()) if len(times) else 0
+        },
+        'tick_range': {
+            'min': int(ticks.min()) if len(ticks) else 0,
+            'max': int(ticks.max()) if len(ticks) else 0
+        },
+        'players': players,
+        'teams': ['CT', 'TERRORIST']
+    }